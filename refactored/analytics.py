@@ -0,0 +1,230 @@
+"""Station analytics over the global history log, for all stations at once.
+
+For every station in the log:
+
+- time in each status ('under_min', 'normal', 'at_max'): each update's
+  status lasts until the station's next update (the last one until now),
+  judged against the limits recorded with that update;
+- breaches: runs of consecutive updates below min_lru or at/over
+  max_lru, with how many there were and the longest one;
+- percentiles of the recorded counts;
+- an hourly profile: the average count recorded in each hour of the day.
+
+With NumPy installed the log's columns are processed as arrays (a
+million rows take a fraction of a second, see
+scripts/benchmarks/bench_analytics.py); without it the same results
+come from a pure-Python pass.
+"""
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Union
+from models import GlobalHistoryEntry, GlobalHistoryLog
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency; the pure-Python path is used instead
+    np = None
+
+HAS_NUMPY = np is not None
+
+UNDER_MIN = 'under_min'
+NORMAL = 'normal'
+AT_MAX = 'at_max'
+STATUSES = (UNDER_MIN, NORMAL, AT_MAX)
+BREACHES = (UNDER_MIN, AT_MAX)
+
+DEFAULT_PERCENTILES = (50, 90, 95)
+
+
+@dataclass
+class StationAnalytics:
+    """Analytics for one station."""
+    updates: int
+    # Seconds spent in each status
+    seconds: Dict[str, int] = field(default_factory=dict)
+    # Number of breach runs and the longest one (seconds), per breach status
+    breaches: Dict[str, int] = field(default_factory=dict)
+    longest_breach: Dict[str, int] = field(default_factory=dict)
+    percentiles: Dict[float, float] = field(default_factory=dict)
+    # Average count per hour of day (None for hours without updates)
+    hourly_profile: List[Optional[float]] = field(default_factory=list)
+
+    @property
+    def tracked_seconds(self) -> int:
+        return sum(self.seconds.values())
+
+    def time_in_status(self, status: str) -> float:
+        """Fraction of the tracked time spent in status (0.0 - 1.0)."""
+        tracked = self.tracked_seconds
+        return self.seconds.get(status, 0) / tracked if tracked else 0.0
+
+
+def analyze(history: Union[GlobalHistoryLog, Sequence[GlobalHistoryEntry]],
+            now: Optional[int] = None,
+            percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+            use_numpy: Optional[bool] = None) -> Dict[str, StationAnalytics]:
+    """Analytics for every station with history, keyed by station name.
+
+    now ends the last status of each station (default: the newest update
+    in the log). use_numpy=None uses NumPy when it is installed.
+    """
+    if not isinstance(history, GlobalHistoryLog):
+        history = GlobalHistoryLog(history)
+    if not len(history):
+        return {}
+    if use_numpy is None:
+        use_numpy = HAS_NUMPY
+    elif use_numpy and not HAS_NUMPY:
+        raise RuntimeError("NumPy is not installed")
+    if use_numpy:
+        return _analyze_numpy(history, now, percentiles)
+    return _analyze_python(history, now, percentiles)
+
+
+def _percentile(sorted_counts: Sequence[int], q: float) -> float:
+    """Linear-interpolated percentile (NumPy's default method)."""
+    pos = (len(sorted_counts) - 1) * q / 100
+    lo = math.floor(pos)
+    hi = math.ceil(pos)
+    return sorted_counts[lo] + (sorted_counts[hi] - sorted_counts[lo]) * (pos - lo)
+
+
+def _analyze_python(log: GlobalHistoryLog, now: Optional[int],
+                    percentiles: Sequence[float]) -> Dict[str, StationAnalytics]:
+    if now is None:
+        now = max(log.epochs)
+    rows: Dict[int, list] = {}
+    for row in zip(log.station_ids, log.epochs, log.counts, log.mins, log.maxes):
+        rows.setdefault(row[0], []).append(row[1:])
+
+    names = log.station_names
+    result = {}
+    for sid, station_rows in rows.items():
+        station_rows.sort(key=lambda r: r[0])  # Stable, like the NumPy lexsort
+        seconds = dict.fromkeys(STATUSES, 0)
+        breaches = dict.fromkeys(BREACHES, 0)
+        longest = dict.fromkeys(BREACHES, 0)
+        hour_sums = [0] * 24
+        hour_counts = [0] * 24
+        run_status = None
+        run_seconds = 0
+
+        for i, (epoch, count, min_lru, max_lru) in enumerate(station_rows):
+            status = UNDER_MIN if count < min_lru else AT_MAX if count >= max_lru else NORMAL
+            until = station_rows[i + 1][0] if i + 1 < len(station_rows) else now
+            duration = max(until - epoch, 0)
+            seconds[status] += duration
+            if status != run_status:
+                run_status = status
+                run_seconds = 0
+                if status in breaches:
+                    breaches[status] += 1
+            run_seconds += duration
+            if status in longest:
+                longest[status] = max(longest[status], run_seconds)
+            hour = (epoch // 3600) % 24
+            hour_sums[hour] += count
+            hour_counts[hour] += 1
+
+        counts = sorted(r[1] for r in station_rows)
+        result[names[sid]] = StationAnalytics(
+            updates=len(station_rows),
+            seconds=seconds,
+            breaches=breaches,
+            longest_breach=longest,
+            percentiles={q: float(_percentile(counts, q)) for q in percentiles},
+            hourly_profile=[s / n if n else None for s, n in zip(hour_sums, hour_counts)])
+    return result
+
+
+def _column(values) -> 'np.ndarray':
+    return np.frombuffer(values, dtype=values.typecode)
+
+
+def _station_order(sid: 'np.ndarray', epochs: 'np.ndarray', k: int) -> 'np.ndarray':
+    """Row order grouped by station, in time order within each station."""
+    if k <= np.iinfo(np.int16).max and bool(np.all(epochs[1:] >= epochs[:-1])):
+        # The log is normally appended in time order, so a stable sort by
+        # station alone is enough, and on int16 NumPy uses a radix sort
+        return np.argsort(sid.astype(np.int16), kind='stable')
+    return np.lexsort((epochs, sid))
+
+
+def _analyze_numpy(log: GlobalHistoryLog, now: Optional[int],
+                   percentiles: Sequence[float]) -> Dict[str, StationAnalytics]:
+    sid = _column(log.station_ids).astype(np.int64)
+    epochs = _column(log.epochs)
+    counts = _column(log.counts)
+    k = len(log.station_names)
+    if now is None:
+        now = int(epochs.max())
+
+    order = _station_order(sid, epochs, k)
+    s = sid[order]
+    e = epochs[order]
+    c = counts[order]
+    status = np.where(c < _column(log.mins)[order], 0,
+                      np.where(c >= _column(log.maxes)[order], 2, 1))
+
+    n = len(s)
+    new_station = np.ones(n, dtype=bool)
+    new_station[1:] = s[1:] != s[:-1]
+    last = np.ones(n, dtype=bool)
+    last[:-1] = new_station[1:]
+    until = np.empty(n, dtype=np.int64)
+    until[:-1] = e[1:]
+    until[last] = now
+    duration = np.maximum(until - e, 0)
+
+    updates = np.bincount(s, minlength=k)
+    seconds = np.bincount(s * 3 + status, weights=duration, minlength=k * 3).reshape(k, 3)
+
+    # Runs of equal status within a station
+    run_start = new_station.copy()
+    run_start[1:] |= status[1:] != status[:-1]
+    run_id = np.cumsum(run_start) - 1
+    run_seconds = np.bincount(run_id, weights=duration)
+    run_station = s[run_start]
+    run_status = status[run_start]
+    breach_counts = {}
+    longest = {}
+    for code, name in ((0, UNDER_MIN), (2, AT_MAX)):
+        mask = run_status == code
+        breach_counts[name] = np.bincount(run_station[mask], minlength=k)
+        longest[name] = np.zeros(k)
+        np.maximum.at(longest[name], run_station[mask], run_seconds[mask])
+
+    # Percentiles from each station's sorted counts; packing (station,
+    # count) into one int64 key lets a plain sort do the grouping
+    low = int(counts.min())
+    keys = np.sort(sid << 32 | (counts.astype(np.int64) - low))
+    sorted_counts = ((keys & 0xFFFFFFFF) + low).astype(np.float64)
+    offsets = np.concatenate(([0], np.cumsum(updates)[:-1]))
+    has_rows = updates > 0
+    quantiles = {}
+    for q in percentiles:
+        pos = np.where(has_rows, (updates - 1) * q / 100, 0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        first = np.minimum(offsets + lo, n - 1)
+        second = np.minimum(offsets + hi, n - 1)
+        quantiles[q] = sorted_counts[first] + \
+            (sorted_counts[second] - sorted_counts[first]) * (pos - lo)
+
+    hour_key = sid * 24 + (epochs // 3600) % 24
+    hour_sums = np.bincount(hour_key, weights=counts, minlength=k * 24).reshape(k, 24)
+    hour_counts = np.bincount(hour_key, minlength=k * 24).reshape(k, 24)
+
+    result = {}
+    for i in np.flatnonzero(has_rows):
+        profile_sums = hour_sums[i].tolist()
+        profile_counts = hour_counts[i].tolist()
+        result[log.station_names[i]] = StationAnalytics(
+            updates=int(updates[i]),
+            seconds={name: int(seconds[i, j]) for j, name in enumerate(STATUSES)},
+            breaches={name: int(breach_counts[name][i]) for name in BREACHES},
+            longest_breach={name: int(longest[name][i]) for name in BREACHES},
+            percentiles={q: float(quantiles[q][i]) for q in percentiles},
+            hourly_profile=[total / num if num else None
+                            for total, num in zip(profile_sums, profile_counts)])
+    return result
@@ -4,6 +4,10 @@ Handles intelligent auto-saving based on:
 - User idle detection
 - Change tracking
 - Configurable save intervals
+- A maximum time changes may stay unsaved while the user keeps working
+
+The timer thread sleeps until the next save deadline (or indefinitely
+when nothing is unsaved) instead of polling.
 """
 import time
 import threading
@@ -20,7 +24,8 @@ class AutoSaveManager:
     def __init__(self, 
                  save_callback: Callable[[], None],
                  auto_save_interval: int = 180,  # 3 minutes default
-                 idle_threshold: int = 30):       # 30 seconds of no activity = idle
+                 idle_threshold: int = 30,        # 30 seconds of no activity = idle
+                 max_latency: Optional[int] = 600):  # Save after 10 min even if busy
         """
         Initialize auto-save manager.
         
@@ -28,20 +33,30 @@ class AutoSaveManager:
             save_callback: Function to call when auto-saving
             auto_save_interval: Seconds between auto-saves (default 180 = 3 min)
             idle_threshold: Seconds of inactivity before considering user idle (default 30)
+            max_latency: Longest time changes stay unsaved, idle or not
+                (default 600 = 10 min, None = wait for idle)
         """
         self.save_callback = save_callback
         self.auto_save_interval = auto_save_interval
         self.idle_threshold = idle_threshold
+        self.max_latency = max_latency
         
-        # State tracking
+        # State tracking (wall clock, for status text)
         self.has_unsaved_changes = False
         self.last_activity_time = time.time()
         self.last_save_time = time.time()
         self.is_running = False
         
+        # Scheduling uses the monotonic clock
+        self._activity = time.monotonic()
+        self._last_save = time.monotonic()
+        self._first_change: Optional[float] = None
+        
         # Threading
         self._timer_thread: Optional[threading.Thread] = None
-        self._stop_event = threading.Event()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self.wakeups = 0  # Timer wakeups, for diagnostics
         
         # Callbacks for UI updates
         self.on_save_status_change: Optional[Callable[[str], None]] = None
@@ -53,7 +68,7 @@ class AutoSaveManager:
             return
             
         self.is_running = True
-        self._stop_event.clear()
+        self._stopping = False
         self._timer_thread = threading.Thread(target=self._auto_save_loop, daemon=True)
         self._timer_thread.start()
         logger.info(f"Auto-save started (interval: {self.auto_save_interval}s, idle threshold: {self.idle_threshold}s)")
@@ -64,43 +79,63 @@ class AutoSaveManager:
             return
             
         self.is_running = False
-        self._stop_event.set()
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
         if self._timer_thread:
             self._timer_thread.join(timeout=2)
         logger.info("Auto-save stopped")
     
     def mark_changed(self) -> None:
         """Mark that data has been changed (needs saving)."""
-        self.has_unsaved_changes = True
-        self.last_activity_time = time.time()
+        with self._cond:
+            now = time.monotonic()
+            self._activity = now
+            if not self.has_unsaved_changes:
+                # Arm the deadline; later changes only ever push it back
+                self._first_change = now
+                self._cond.notify_all()
+            self.has_unsaved_changes = True
+            self.last_activity_time = time.time()
         self._update_status()
         logger.debug("Data marked as changed")
     
     def mark_saved(self) -> None:
         """Mark that data has been saved."""
-        self.has_unsaved_changes = False
-        self.last_save_time = time.time()
+        with self._cond:
+            self.has_unsaved_changes = False
+            self._first_change = None
+            self._last_save = time.monotonic()
+            self.last_save_time = time.time()
         self._update_status()
         logger.debug("Data marked as saved")
     
     def register_activity(self) -> None:
-        """Register user activity (keyboard/mouse)."""
-        self.last_activity_time = time.time()
+        """Register user activity (keyboard/mouse).
+        
+        Called for every input event, so it only stores a timestamp; the
+        timer thread picks it up when its current deadline expires.
+        """
+        self._activity = time.monotonic()
     
     def is_user_idle(self) -> bool:
         """Check if user is currently idle."""
-        return (time.time() - self.last_activity_time) >= self.idle_threshold
+        return (time.monotonic() - self._activity) >= self.idle_threshold
+    
+    def next_save_due(self) -> Optional[float]:
+        """Monotonic time of the next auto-save, or None if nothing is unsaved."""
+        if not self.has_unsaved_changes:
+            return None
+        due = max(self._activity + self.idle_threshold,
+                  self._last_save + self.auto_save_interval)
+        if self.max_latency is not None and self._first_change is not None:
+            due = min(due, self._first_change + self.max_latency)
+        return due
     
     def should_auto_save(self) -> bool:
         """Determine if auto-save should happen now."""
-        if not self.has_unsaved_changes:
-            return False
-        
-        if not self.is_user_idle():
-            return False
-        
-        time_since_last_save = time.time() - self.last_save_time
-        return time_since_last_save >= self.auto_save_interval
+        due = self.next_save_due()
+        return due is not None and time.monotonic() >= due
     
     def force_save(self) -> None:
         """Force an immediate save regardless of idle state."""
@@ -108,15 +143,24 @@ class AutoSaveManager:
             self._perform_save()
     
     def _auto_save_loop(self) -> None:
-        """Background thread that checks and performs auto-saves."""
-        while not self._stop_event.is_set():
+        """Background thread that sleeps until the next save is due."""
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping:
+                        return
+                    due = self.next_save_due()
+                    if due is None:
+                        self._cond.wait()
+                    else:
+                        delay = due - time.monotonic()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    self.wakeups += 1
+            
             try:
-                if self.should_auto_save():
-                    self._perform_save()
-                
-                # Check every 5 seconds
-                self._stop_event.wait(5)
-                
+                self._perform_save()
             except Exception as e:
                 logger.error(f"Error in auto-save loop: {e}")
     
@@ -129,6 +173,9 @@ class AutoSaveManager:
             logger.info("Auto-save completed")
         except Exception as e:
             logger.error(f"Auto-save failed: {e}")
+            # Back off a full interval instead of retrying immediately
+            with self._cond:
+                self._last_save = self._first_change = time.monotonic()
     
     def _update_status(self) -> None:
         """Update UI status callback if registered."""
@@ -177,3 +224,7 @@ class AutoSaveManager:
         if idle_threshold is not None:
             self.idle_threshold = idle_threshold
             logger.info(f"Idle threshold updated to {idle_threshold}s")
+        
+        # The pending deadline may now be earlier
+        with self._cond:
+            self._cond.notify_all()
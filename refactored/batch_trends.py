@@ -0,0 +1,173 @@
+"""Batch trend report generation for many stations.
+
+Per-station reports are rendered in worker processes, so building
+hundreds of workbooks neither blocks the Tk event loop nor competes with
+it for the GIL. Workers receive plain station dicts; lazily loaded
+history is materialized once, up front, in the calling process.
+"""
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fnmatch import fnmatch
+from typing import Callable, Dict, List, Optional, Tuple
+from models import Station
+from export_manager import ExportManager
+from logger import get_logger
+
+logger = get_logger()
+
+UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\-. ]')
+
+
+def filter_stations(stations: Dict[str, Station], pattern: str = '',
+                    require_history: bool = True) -> List[Station]:
+    """Stations whose name matches pattern, sorted by name.
+
+    pattern is a case-insensitive substring, or a glob when it contains
+    * ? or [. An empty pattern matches every station.
+    """
+    pattern = pattern.strip().lower()
+    is_glob = any(ch in pattern for ch in '*?[')
+    selected = []
+    for name in sorted(stations):
+        lowered = name.lower()
+        if pattern and not (fnmatch(lowered, pattern) if is_glob else pattern in lowered):
+            continue
+        if require_history and not stations[name].history:
+            continue
+        selected.append(stations[name])
+    return selected
+
+
+def trend_filename(directory: str, station_name: str, suffix: str = '') -> str:
+    """File path for one station's trend report."""
+    safe = UNSAFE_FILENAME_CHARS.sub('_', station_name).strip() or 'station'
+    return os.path.join(directory, f"Trend_{safe}{suffix}.xlsx")
+
+
+def _render_trend(name: str, station_data: dict, filename: str) -> str:
+    """Worker process entry point: write one station's trend report."""
+    ExportManager().create_trend_report(filename, Station.from_dict(name, station_data))
+    return filename
+
+
+class BatchCancelled(Exception):
+    """Raised inside a batch job when it has been cancelled."""
+    pass
+
+
+class BatchTrendJob:
+    """Generates trend reports for several stations in the background.
+
+    start() returns immediately. poll() only reads a few counters, so the
+    UI can call it from root.after() to drive a progress bar.
+    """
+
+    def __init__(self, stations: List[Station], output: str, single_workbook: bool = False,
+                 max_workers: Optional[int] = None,
+                 executor_factory: Callable[..., object] = ProcessPoolExecutor):
+        """
+        Args:
+            stations: Stations to report on
+            output: Directory for per-station files, or the workbook path
+                when single_workbook is True
+            single_workbook: One workbook with a sheet per station
+            max_workers: Worker process count (default: CPU count)
+            executor_factory: Executor class used for per-station files
+        """
+        self.output = output
+        self.single_workbook = single_workbook
+        self.max_workers = max_workers
+        self.executor_factory = executor_factory
+
+        # Snapshot station data now so the caller can keep editing stations
+        self._payload: List[Tuple[str, dict]] = [(s.name, s.to_dict()) for s in stations]
+        self.total = len(self._payload)
+        self.done = 0
+        self.files: List[str] = []
+        self.errors: List[str] = []
+
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    def start(self) -> None:
+        """Start generating reports on a background thread."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Stop after the reports already in progress."""
+        self._cancel.set()
+
+    def poll(self) -> Tuple[int, int, bool]:
+        """Return (done, total, finished)."""
+        with self._lock:
+            return self.done, self.total, self._finished.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes; returns False on timeout."""
+        return self._finished.wait(timeout)
+
+    def _run(self) -> None:
+        try:
+            if self.single_workbook:
+                self._run_single_workbook()
+            else:
+                self._run_per_station()
+        except BatchCancelled:
+            logger.info("Batch trend report cancelled")
+        except Exception as e:
+            logger.error(f"Batch trend report failed: {e}")
+            self.errors.append(str(e))
+        finally:
+            self._finished.set()
+        logger.info(f"Batch trend report: {len(self.files)} files, {len(self.errors)} errors")
+
+    def _advance(self, count: int = 1) -> None:
+        with self._lock:
+            self.done += count
+
+    def _run_per_station(self) -> None:
+        os.makedirs(self.output, exist_ok=True)
+        used = set()
+        with self.executor_factory(max_workers=self.max_workers) as pool:
+            futures = {}
+            for name, data in self._payload:
+                filename = trend_filename(self.output, name)
+                suffix = 1
+                while filename.lower() in used:
+                    suffix += 1
+                    filename = trend_filename(self.output, name, f"_{suffix}")
+                used.add(filename.lower())
+                futures[pool.submit(_render_trend, name, data, filename)] = name
+
+            for future in as_completed(futures):
+                if self._cancel.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    raise BatchCancelled()
+                try:
+                    self.files.append(future.result())
+                except Exception as e:
+                    self.errors.append(f"{futures[future]}: {e}")
+                self._advance()
+
+    def _run_single_workbook(self) -> None:
+        # Sheets of one openpyxl workbook can't be built in separate
+        # processes, so the workbook is assembled on this thread instead
+        def progress(done: int) -> None:
+            if self._cancel.is_set():
+                raise BatchCancelled()
+            with self._lock:
+                self.done = done
+
+        stations = [Station.from_dict(name, data) for name, data in self._payload]
+        ExportManager().create_multi_trend_report(self.output, stations, progress=progress)
+        self.files.append(self.output)
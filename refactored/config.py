@@ -8,12 +8,65 @@ UPDATE_CHECK_URL = "https://raw.githubusercontent.com/HaltTheGrey/lru-tracker/ma
 DATA_FILE = "lru_data.json"
 BACKUP_SUFFIX = ".backup"
 TEMP_SUFFIX = ".tmp"
+JOURNAL_SUFFIX = ".journal"
+
+# Journaled storage: count updates are appended to a log next to DATA_FILE
+# and compacted into the snapshot every JOURNAL_CHECKPOINT_INTERVAL records
+USE_JOURNAL = True
+JOURNAL_CHECKPOINT_INTERVAL = 200
+
+# Move closed months of history out of DATA_FILE into monthly archive
+# files in HISTORY_ARCHIVE_DIR (json backend only)
+ARCHIVE_HISTORY = True
+HISTORY_ARCHIVE_DIR = "history"
+
+# Storage backend: "json" (default, DATA_FILE) or "sqlite" (SQLITE_DATA_FILE)
+STORAGE_BACKEND = "json"
+SQLITE_DATA_FILE = "lru_data.db"
+
+# On-disk format of DATA_FILE: "json" (indented, the default), "compact"
+# (minified JSON), "gzip" or "lzma" (compressed minified JSON). Opt in to
+# a smaller file here; any setting loads files written in any format,
+# which is detected from the file itself.
+DATA_FORMAT = "json"
+
+# GitHub sync: shards downloaded by the last sync are kept here so the
+# next pull only fetches files that changed
+SYNC_CACHE_DIR = "sync_cache"
+
+# Background sync: seconds between remote change checks, and how long
+# after a save the push waits so a burst of updates goes up as one
+SYNC_INTERVAL = 300
+SYNC_PUSH_DELAY = 30
+
+# History retention: raw count updates are kept this many days, then
+# rolled into hourly min/max/avg/last rollups, which after
+# RETENTION_HOURLY_DAYS become daily ones (None = keep that tier forever).
+# With ARCHIVE_HISTORY the live data holds only the current month, so the
+# windows apply to whole archived months: a month is rolled up once it
+# ended before the window, and the current month always stays raw.
+RETENTION_RAW_DAYS = 90
+RETENTION_HOURLY_DAYS = 365
+RETENTION_START_DELAY_MS = 60 * 1000        # First run after startup
+RETENTION_INTERVAL_MS = 24 * 60 * 60 * 1000  # Then once a day
+
+# Station stats keep the average of this many most recent counts
+STATS_RECENT_WINDOW = 10
 
 # Validation limits
 MAX_STATION_NAME_LENGTH = 200
 MIN_LRU_VALUE = 0
 MAX_LRU_VALUE = 999999
 
+# Reports with at least this many history rows use the streaming
+# (write-only) Excel export so memory stays flat
+STREAMING_EXPORT_THRESHOLD = 5000
+
+# "Append to Existing" rolls every snapshot into one long-format sheet
+# instead of adding a Snapshot_* sheet per append
+ROLLUP_SNAPSHOTS = False
+SNAPSHOT_ROLLUP_SHEET = "Snapshots"
+
 # UI Colors
 class Colors:
     PRIMARY = '#2c3e50'
@@ -1,62 +1,168 @@
 """Data persistence manager."""
+import gzip
+import io
 import json
+import lzma
 import os
 import shutil
-from typing import Dict, List, Tuple
-from models import Station, GlobalHistoryEntry
-from config import DATA_FILE, BACKUP_SUFFIX, TEMP_SUFFIX
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+from models import (Station, GlobalHistoryEntry, GlobalHistoryLog, LazyHistory, parse_timestamp,
+                    rollups_from_list, now_epoch)
+from config import (DATA_FILE, BACKUP_SUFFIX, TEMP_SUFFIX, JOURNAL_SUFFIX,
+                    USE_JOURNAL, JOURNAL_CHECKPOINT_INTERVAL, STORAGE_BACKEND, DATA_FORMAT,
+                    ARCHIVE_HISTORY, HISTORY_ARCHIVE_DIR)
+from json_stream import JSONStreamReader
+from history_archive import HistoryArchive, month_start, split_closed
+from logger import get_logger
+
+logger = get_logger()
 
 
 class DataManager:
-    """Handles data loading, saving, and backup operations."""
-    
-    def __init__(self, data_file: str = DATA_FILE):
+    """Handles data loading, saving, and backup operations.
+
+    In journaled mode, single count updates are appended to a small log
+    next to the data file instead of rewriting the whole snapshot. The
+    log is replayed on load and compacted into the snapshot by save_data.
+
+    data_format selects how snapshots are written (see DATA_FORMATS);
+    loading detects the format, so switching it needs no migration.
+
+    With archive_dir, history from closed months is moved into monthly
+    archive files on save (see history_archive) and load_data returns
+    only the current month; query self.archive for older history.
+    """
+
+    def __init__(self, data_file: str = DATA_FILE, journaled: bool = USE_JOURNAL,
+                 data_format: str = DATA_FORMAT, archive_dir: Optional[str] = None):
+        if data_format not in DATA_FORMATS:
+            raise ValueError(f"Unknown data format: {data_format}")
         self.data_file = data_file
-    
-    def load_data(self) -> Tuple[Dict[str, Station], List[GlobalHistoryEntry]]:
-        """Load stations and history from file."""
-        if not os.path.exists(self.data_file):
-            return {}, []
-        
+        self.data_format = data_format
+        self.archive = HistoryArchive(archive_dir) if archive_dir else None
+        self.journal_file = data_file + JOURNAL_SUFFIX
+        self.journaled = journaled
+        self._journal_seq = 0        # Last sequence number written or replayed
+        self._journal_records = 0    # Records appended since the last checkpoint
+
+    @property
+    def journal_pending(self) -> bool:
+        """True when the journal holds records not yet in the snapshot."""
+        return self._journal_records > 0
+
+    def load_data(self) -> Tuple[Dict[str, Station], GlobalHistoryLog]:
+        """Load stations and history from file, replaying any journal tail."""
+        if not os.path.exists(self.data_file) and not os.path.exists(self.journal_file):
+            return {}, GlobalHistoryLog()
+
+        stations: Dict[str, Station] = {}
+        history = GlobalHistoryLog()
+        snapshot_seq = 0
+
         try:
-            with open(self.data_file, 'r') as f:
-                content = f.read()
-                data = json.loads(content)
-            
-            if not isinstance(data, dict):
-                raise ValueError("Invalid data format")
-            
-            # Load stations
-            stations = {}
-            stations_data = data.get('stations', {})
-            if isinstance(stations_data, dict):
-                for name, station_data in stations_data.items():
-                    stations[name] = Station.from_dict(name, station_data)
-            
-            # Load global history
-            history = []
-            history_data = data.get('history', [])
-            if isinstance(history_data, list):
-                for entry in history_data:
-                    try:
-                        history.append(GlobalHistoryEntry.from_dict(entry))
-                    except (KeyError, TypeError):
-                        continue
-            
+            if os.path.exists(self.data_file):
+                with open_document(self.data_file) as stream:
+                    snapshot_seq = self._read_snapshot(JSONStreamReader(stream),
+                                                       stations, history)
+
+            self._journal_seq = snapshot_seq
+            self._journal_records = 0
+            self._replay_journal(stations, history, snapshot_seq)
+
+            if self.archive is not None:
+                self._archive_on_load(stations, history)
             return stations, history
-            
-        except (json.JSONDecodeError, ValueError, IOError) as e:
+
+        except (json.JSONDecodeError, ValueError, IOError, EOFError, lzma.LZMAError) as e:
             raise DataLoadError(f"Failed to load data: {str(e)}")
-    
-    def save_data(self, stations: Dict[str, Station], 
+
+    @staticmethod
+    def _read_snapshot(reader: JSONStreamReader, stations: Dict[str, Station],
+                       history: GlobalHistoryLog) -> int:
+        """Build stations and history while parsing; returns journal_seq.
+
+        Only one station or history row is held as parsed JSON at a time,
+        so loading doesn't need the whole document tree in memory.
+        """
+        if reader.peek_type() != 'object':
+            raise ValueError("Invalid data format")
+
+        snapshot_seq = 0
+        for key in reader.items():
+            if key == 'stations' and reader.peek_type() == 'object':
+                for name in reader.items():
+                    station_data = reader.value()
+                    if isinstance(station_data, dict):
+                        stations[name] = Station.from_dict(name, station_data)
+            elif key == 'history' and reader.peek_type() == 'array':
+                # Global history goes straight into columns
+                for _ in reader.array():
+                    entry = reader.value()
+                    try:
+                        history.append_values(entry['station'],
+                                              parse_timestamp(entry['timestamp']),
+                                              entry['count'], entry['min'], entry['max'])
+                    except (KeyError, TypeError, ValueError):
+                        continue
+            elif key == 'journal_seq':
+                snapshot_seq = reader.value()
+            else:
+                reader.value()
+        reader.end()
+        return snapshot_seq
+
+    def _archive_on_load(self, stations: Dict[str, Station], history: GlobalHistoryLog) -> None:
+        """Move closed months still in the data file to the archive.
+
+        Happens once after a month ends (or for a file written before
+        archiving); the rewritten data file then starts at this month.
+        Histories are in time order, so only each station's first entry
+        is checked, and only stations with closed entries are touched.
+        """
+        cutoff = month_start(now_epoch())
+        closed_stations = [name for name, station in stations.items()
+                           if (station.history.first_timestamp() or cutoff) < cutoff]
+        if not closed_stations and not (history and min(history.epochs) < parse_timestamp(cutoff)):
+            return
+
+        try:
+            self.save_data(stations, history)
+        except DataSaveError as e:
+            # Everything is still in the data file; try again next save
+            logger.warning(f"Could not archive closed months: {e}")
+            return
+        history.drop_before(parse_timestamp(cutoff))
+        for name in closed_stations:
+            station = stations[name]
+            station.history = LazyHistory(
+                raw=[e for e in station.history.to_list() if e['timestamp'] >= cutoff])
+
+    def _archive_closed(self, data: dict) -> dict:
+        """data without entries from before this month, which go to the archive."""
+        data, station_history, closed = split_closed(data, month_start(now_epoch()))
+        if closed or station_history:
+            self.archive.add(station_history, closed)
+        return data
+
+    def save_data(self, stations: Dict[str, Station],
                   history: List[GlobalHistoryEntry]) -> None:
-        """Save stations and history to file with atomic write."""
+        """Save stations and history to file with atomic write.
+
+        Also acts as the journal checkpoint: once the snapshot is in place
+        the journal is truncated. With an archive, closed months are
+        archived first and left out of the data file.
+        """
         data = {
             'stations': {name: station.to_dict() for name, station in stations.items()},
-            'history': [entry.to_dict() for entry in history]
+            'history': history_to_list(history),
+            'journal_seq': self._journal_seq
         }
-        
+
         try:
+            if self.archive is not None:
+                data = self._archive_closed(data)
+
             # Create backup before saving
             if os.path.exists(self.data_file):
                 backup_file = self.data_file + BACKUP_SUFFIX
@@ -64,20 +170,209 @@ class DataManager:
                     shutil.copy2(self.data_file, backup_file)
                 except IOError:
                     pass  # Backup is best-effort
-            
+
             # Write to temporary file first for atomic write
             temp_file = self.data_file + TEMP_SUFFIX
-            with open(temp_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            
+            with open(temp_file, 'wb') as f:
+                f.write(encode_document(data, self.data_format))
+
             # Atomic rename
             if os.path.exists(self.data_file):
                 os.remove(self.data_file)
             os.rename(temp_file, self.data_file)
-            
-        except IOError as e:
+
+        except (IOError, ValueError) as e:
             raise DataSaveError(f"Failed to save data: {str(e)}")
 
+        # Snapshot now covers every journaled record. If truncation fails the
+        # records are skipped on replay anyway because of journal_seq.
+        if os.path.exists(self.journal_file):
+            try:
+                open(self.journal_file, 'w').close()
+            except IOError as e:
+                logger.warning(f"Could not truncate journal: {e}")
+        self._journal_records = 0
+
+    def append_update(self, entry: GlobalHistoryEntry) -> bool:
+        """Append a single count update to the journal.
+
+        Returns True when the journal is long enough that the caller
+        should checkpoint with save_data.
+        """
+        return self.append_records([update_record(entry)])
+
+    def append_records(self, records: List[dict]) -> bool:
+        """Append journal records (see update_record etc.) in one write.
+
+        Returns True when the caller should checkpoint with save_data.
+        """
+        lines = []
+        seq = self._journal_seq
+        for record in records:
+            seq += 1
+            lines.append(json.dumps(dict(record, seq=seq), separators=(',', ':')) + '\n')
+
+        try:
+            with open(self.journal_file, 'a') as f:
+                f.write(''.join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+        except IOError as e:
+            raise DataSaveError(f"Failed to write journal: {str(e)}")
+
+        self._journal_seq = seq
+        self._journal_records += len(records)
+        return self._journal_records >= JOURNAL_CHECKPOINT_INTERVAL
+
+    def _replay_journal(self, stations: Dict[str, Station],
+                        history: GlobalHistoryLog, snapshot_seq: int) -> None:
+        """Apply journal records newer than the snapshot."""
+        if not os.path.exists(self.journal_file):
+            return
+
+        with open(self.journal_file, 'rb') as f:
+            raw = f.read()
+
+        valid_end = 0
+        offset = 0
+        while offset < len(raw):
+            newline = raw.find(b'\n', offset)
+            if newline == -1:
+                break  # Torn final write - no newline
+            line = raw[offset:newline]
+            offset = newline + 1
+            valid_end = offset
+            try:
+                record = json.loads(line)
+                seq = record['seq']
+                if seq <= snapshot_seq:
+                    continue
+                apply_record(stations, history, record)
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Skipping unreadable journal record")
+                continue
+            self._journal_seq = max(self._journal_seq, seq)
+            self._journal_records += 1
+
+        # Drop a torn tail so the next append starts on a clean line
+        if valid_end < len(raw):
+            logger.warning("Truncating incomplete journal record")
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(valid_end)
+
+        if self._journal_records:
+            logger.info(f"Replayed {self._journal_records} journal records")
+
+
+# Journal records, applied in order on load:
+#   update - count update: station history, current count and global log
+#   append - global history row only
+#   upsert - station fields; carries 'history' and 'stats' only for a new station
+#   delete - remove a station
+
+def update_record(entry: GlobalHistoryEntry) -> dict:
+    return dict(entry.to_dict(), op='update')
+
+
+def append_record(entry: GlobalHistoryEntry) -> dict:
+    return dict(entry.to_dict(), op='append')
+
+
+def upsert_record(station: Station, include_history: bool = False) -> dict:
+    # Stats only change with history, which update records carry, so a
+    # settings edit leaves both out and never loads the history
+    record = station.to_dict() if include_history else station.settings_dict()
+    record.update(op='upsert', station=station.name)
+    return record
+
+
+def delete_record(name: str) -> dict:
+    return {'op': 'delete', 'station': name}
+
+
+def apply_record(stations: Dict[str, Station], history: GlobalHistoryLog,
+                 record: dict) -> None:
+    """Apply one journal record to loaded data."""
+    op = record.get('op', 'update')
+    if op == 'update':
+        entry = GlobalHistoryEntry.from_dict(record)
+        station = stations.get(entry.station)
+        if station is not None:
+            station.add_history(entry.count, entry.timestamp)
+        history.append(entry)
+    elif op == 'append':
+        history.append(GlobalHistoryEntry.from_dict(record))
+    elif op == 'upsert':
+        name = record['station']
+        station = stations.get(name)
+        if station is None or 'history' in record:
+            stations[name] = Station.from_dict(name, record)
+        else:
+            station.current = record['current']
+            station.min_lru = record['min']
+            station.max_lru = record['max']
+            station.test_description = record.get('test_description', '')
+            station.rack_location = record.get('rack_location', '')
+            station.hourly = rollups_from_list(record.get('hourly'))
+            station.daily = rollups_from_list(record.get('daily'))
+    elif op == 'delete':
+        stations.pop(record['station'], None)
+    else:
+        raise ValueError(f"Unknown journal op {op!r}")
+
+
+# Snapshot formats. Compressed files are recognized by their magic
+# bytes; anything else is JSON text.
+GZIP_MAGIC = b'\x1f\x8b'
+LZMA_MAGIC = b'\xfd7zXZ\x00'
+DATA_FORMATS = ('json', 'compact', 'gzip', 'lzma')
+
+
+def encode_document(data: dict, data_format: str = 'compact') -> bytes:
+    """Serialize a snapshot document in the given format."""
+    if data_format == 'json':
+        return json.dumps(data, indent=2).encode('utf-8')
+    text = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    if data_format == 'gzip':
+        # mtime=0 keeps identical data byte-identical
+        return gzip.compress(text, compresslevel=6, mtime=0)
+    if data_format == 'lzma':
+        return lzma.compress(text, preset=1)
+    return text
+
+
+@contextmanager
+def open_document(path: str) -> Iterator[TextIO]:
+    """Open a snapshot in any of DATA_FORMATS as a decompressed text stream."""
+    with open(path, 'rb') as f:
+        magic = f.read(len(LZMA_MAGIC))
+        f.seek(0)
+        if magic.startswith(GZIP_MAGIC):
+            raw = gzip.GzipFile(fileobj=f)
+        elif magic.startswith(LZMA_MAGIC):
+            raw = lzma.LZMAFile(f)
+        else:
+            raw = f
+        with io.TextIOWrapper(raw, encoding='utf-8') as stream:
+            yield stream
+
+
+def history_to_list(history: List[GlobalHistoryEntry]) -> List[dict]:
+    """Serialize global history, using the columnar fast path when possible."""
+    if isinstance(history, GlobalHistoryLog):
+        return history.to_list()
+    return [entry.to_dict() for entry in history]
+
+
+def create_data_manager(backend: str = STORAGE_BACKEND):
+    """Create the storage backend selected in config."""
+    if backend == "sqlite":
+        from sqlite_manager import SQLiteDataManager
+        return SQLiteDataManager()
+    if backend != "json":
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return DataManager(archive_dir=HISTORY_ARCHIVE_DIR if ARCHIVE_HISTORY else None)
+
 
 class DataLoadError(Exception):
     """Raised when data loading fails."""
@@ -0,0 +1,211 @@
+"""Shared named styles for the openpyxl exporters.
+
+Every style used by the Excel exports is defined once here. A StyleRegistry
+adds a style to its workbook the first time a cell uses it, after which
+cells refer to it by name, so no Font/Fill/Border objects are built per
+cell and the workbook's style tables stay small.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from config import Colors
+
+
+class ExcelColors:
+    """Color scheme for Excel exports."""
+    HEADER_PRIMARY = '1F4788'      # Deep blue
+    HEADER_BLUE = HEADER_PRIMARY
+    HEADER_SECONDARY = '2E5C8A'    # Medium blue
+    SHIFT1_HEADER = HEADER_SECONDARY
+    SHIFT2_HEADER = '34495E'       # Slate
+    CRITICAL = 'E74C3C'            # Red
+    WARNING = 'F39C12'             # Orange
+    SUCCESS = '27AE60'             # Green
+    INFO = '3498DB'                # Light blue
+    NEUTRAL = 'ECF0F1'             # Light gray
+    ROW_ALT = 'F8F9FA'             # Near-white row stripe
+    WHITE = 'FFFFFF'
+    TEXT_DARK = '2C3E50'           # Dark gray
+    BORDER_COLOR = 'BDC3C7'        # Gray border
+    LIGHT_BLUE = 'D6EAF8'
+    LIGHT_GREEN = 'D5F4E6'
+
+
+def solid_fill(color: str) -> PatternFill:
+    """Solid background fill."""
+    return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+
+def box_border(color: str = ExcelColors.BORDER_COLOR, top: Optional[Side] = None,
+               bottom: Optional[Side] = None) -> Border:
+    """Thin border on all sides, with optional top/bottom overrides."""
+    thin = Side(style='thin', color=color)
+    return Border(left=thin, right=thin, top=top or thin, bottom=bottom or thin)
+
+
+# Shared style objects for code that still styles individual cells
+THIN_BORDER = box_border()
+HEADER_BORDER = box_border(bottom=Side(style='medium', color=ExcelColors.WHITE))
+HEADER_FILL = solid_fill(ExcelColors.HEADER_PRIMARY)
+HEADER_FONT = Font(color=ExcelColors.WHITE, bold=True, size=13, name='Calibri')
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='center', wrap_text=True)
+STATUS_FILLS = {
+    'critical': solid_fill(ExcelColors.CRITICAL),
+    'warning': solid_fill(ExcelColors.WARNING),
+    'success': solid_fill(ExcelColors.SUCCESS),
+}
+
+CENTER = Alignment(horizontal='center', vertical='center')
+LEFT = Alignment(horizontal='left', vertical='center')
+RIGHT = Alignment(horizontal='right', vertical='center')
+CARD_BORDER = box_border(bottom=Side(style='medium', color=ExcelColors.BORDER_COLOR))
+TEMPLATE_BORDER = Border(left=Side(style='thin'), right=Side(style='thin'),
+                         top=Side(style='thin'), bottom=Side(style='thin'))
+
+
+def status_key(current: int, min_val: int, max_val: int) -> str:
+    """'critical' below min, 'warning' at or over max, else 'success'."""
+    if current < min_val:
+        return 'critical'
+    elif current >= max_val:
+        return 'warning'
+    return 'success'
+
+
+def _build_specs() -> Dict[str, Dict[str, Any]]:
+    """NamedStyle keyword arguments for every style, keyed by style name."""
+    white_bold = dict(bold=True, color=ExcelColors.WHITE, name='Calibri')
+    specs: Dict[str, Dict[str, Any]] = {
+        # Report titles and notes
+        'lru_title': dict(font=Font(size=16, bold=True, color=ExcelColors.HEADER_PRIMARY,
+                                    name='Calibri'), alignment=CENTER),
+        'lru_title_banner': dict(font=Font(size=16, bold=True, color=ExcelColors.HEADER_PRIMARY,
+                                           name='Calibri'),
+                                 alignment=CENTER, fill=solid_fill(ExcelColors.NEUTRAL)),
+        'lru_subtitle': dict(font=Font(size=11, italic=True, color=ExcelColors.TEXT_DARK,
+                                       name='Calibri'), alignment=CENTER),
+        'lru_note': dict(font=Font(size=10, italic=True, color=ExcelColors.TEXT_DARK,
+                                   name='Calibri'), alignment=CENTER),
+        'lru_header': dict(fill=HEADER_FILL, font=HEADER_FONT, alignment=HEADER_ALIGNMENT,
+                           border=HEADER_BORDER),
+
+        # Trend report statistics cards
+        'lru_card_header': dict(font=Font(size=10, **white_bold), alignment=CENTER,
+                                fill=solid_fill(ExcelColors.HEADER_SECONDARY), border=THIN_BORDER),
+        'lru_card_value': dict(font=Font(size=12, bold=True, name='Calibri'), alignment=CENTER,
+                               fill=solid_fill(ExcelColors.ROW_ALT), border=CARD_BORDER),
+        'lru_card_plain': dict(font=Font(size=12, bold=True, name='Calibri'), alignment=CENTER,
+                               border=CARD_BORDER),
+
+        # FC schedule
+        'fc_shift1_banner': dict(font=Font(size=12, **white_bold), alignment=CENTER,
+                                 fill=solid_fill(ExcelColors.SHIFT1_HEADER)),
+        'fc_shift2_banner': dict(font=Font(size=12, **white_bold), alignment=CENTER,
+                                 fill=solid_fill(ExcelColors.SHIFT2_HEADER)),
+        'fc_lru': dict(font=Font(size=11, bold=True, name='Calibri'), alignment=LEFT,
+                       fill=solid_fill(ExcelColors.LIGHT_BLUE), border=THIN_BORDER),
+        'fc_test': dict(font=Font(size=10, name='Calibri'), border=THIN_BORDER,
+                        alignment=Alignment(horizontal='left', vertical='center', wrap_text=True)),
+        'fc_location': dict(font=Font(size=10, name='Calibri'), alignment=CENTER,
+                            border=THIN_BORDER),
+        'fc_slot_1st': dict(font=Font(size=11, name='Calibri'), alignment=CENTER, number_format='0',
+                            fill=solid_fill(ExcelColors.WHITE), border=THIN_BORDER),
+        'fc_slot_2nd': dict(font=Font(size=11, name='Calibri'), alignment=CENTER, number_format='0',
+                            fill=solid_fill(ExcelColors.ROW_ALT), border=THIN_BORDER),
+        'fc_total': dict(font=Font(size=11, bold=True, name='Calibri'), alignment=CENTER,
+                         fill=solid_fill(ExcelColors.LIGHT_GREEN), border=THIN_BORDER),
+        'fc_summary_label': dict(font=Font(size=11, bold=True, color=ExcelColors.TEXT_DARK,
+                                           name='Calibri'),
+                                 alignment=RIGHT, fill=solid_fill(ExcelColors.INFO)),
+        'fc_summary_total': dict(
+            font=Font(size=11, **white_bold), alignment=CENTER, fill=solid_fill(ExcelColors.INFO),
+            border=box_border(top=Side(style='medium', color=ExcelColors.TEXT_DARK),
+                              bottom=Side(style='medium', color=ExcelColors.TEXT_DARK))),
+
+        # Bulk import template
+        'template_title': dict(font=Font(size=16, bold=True, color=ExcelColors.WHITE),
+                               fill=solid_fill(Colors.HEADER_BG), alignment=CENTER),
+        'template_note': dict(font=Font(italic=True), alignment=Alignment(horizontal='center')),
+        'template_header': dict(font=Font(bold=True, size=12, color=ExcelColors.WHITE),
+                                fill=solid_fill(Colors.HEADER_SECONDARY), alignment=CENTER,
+                                border=TEMPLATE_BORDER),
+        'template_example': dict(fill=solid_fill(Colors.EXAMPLE_BG), border=TEMPLATE_BORDER),
+        'template_example_center': dict(fill=solid_fill(Colors.EXAMPLE_BG), border=TEMPLATE_BORDER,
+                                        alignment=Alignment(horizontal='center')),
+        'template_input': dict(border=TEMPLATE_BORDER),
+        'template_heading': dict(font=Font(size=14, bold=True)),
+    }
+
+    # Table cells: plain and striped rows, left/center (report) or
+    # right/center (trend index column)
+    for suffix, fill in (('', PatternFill()), ('_alt', solid_fill(ExcelColors.NEUTRAL))):
+        specs[f'lru_cell{suffix}'] = dict(font=Font(name='Calibri', size=11), alignment=LEFT,
+                                          border=THIN_BORDER, fill=fill)
+        specs[f'lru_cell_center{suffix}'] = dict(font=Font(name='Calibri', size=11),
+                                                 alignment=CENTER, border=THIN_BORDER, fill=fill)
+    for suffix, fill in (('', solid_fill(ExcelColors.WHITE)), ('_alt', solid_fill(ExcelColors.ROW_ALT))):
+        specs[f'trend_cell{suffix}'] = dict(font=Font(name='Calibri', size=10), alignment=CENTER,
+                                            border=THIN_BORDER, fill=fill)
+        specs[f'trend_cell_index{suffix}'] = dict(font=Font(name='Calibri', size=10), alignment=RIGHT,
+                                                  border=THIN_BORDER, fill=fill)
+        specs[f'trend_variance_up{suffix}'] = dict(
+            font=Font(bold=True, color=ExcelColors.SUCCESS, size=10, name='Calibri'),
+            alignment=CENTER, border=THIN_BORDER, fill=fill)
+        specs[f'trend_variance_down{suffix}'] = dict(
+            font=Font(bold=True, color=ExcelColors.CRITICAL, size=10, name='Calibri'),
+            alignment=CENTER, border=THIN_BORDER, fill=fill)
+
+    # Status colored cells (white bold text on the status color)
+    for key, fill in STATUS_FILLS.items():
+        specs[f'lru_status_{key}'] = dict(font=Font(size=11, **white_bold), fill=fill,
+                                          alignment=CENTER, border=THIN_BORDER)
+        specs[f'trend_status_{key}'] = dict(font=Font(size=10, **white_bold), fill=fill,
+                                            alignment=CENTER, border=THIN_BORDER)
+        specs[f'lru_card_{key}'] = dict(font=Font(size=12, **white_bold), fill=fill,
+                                        alignment=CENTER, border=CARD_BORDER)
+        specs[f'fc_status_{key}'] = dict(font=Font(size=10, **white_bold), fill=fill,
+                                         alignment=CENTER, border=THIN_BORDER)
+
+    # FC schedule column headers, colored by column group
+    for group, color in (('lru', ExcelColors.HEADER_BLUE), ('shift1', ExcelColors.SHIFT1_HEADER),
+                         ('shift2', ExcelColors.SHIFT2_HEADER), ('summary', ExcelColors.INFO)):
+        specs[f'fc_header_{group}'] = dict(font=Font(size=11, **white_bold), fill=solid_fill(color),
+                                           alignment=HEADER_ALIGNMENT, border=HEADER_BORDER)
+    return specs
+
+
+STYLE_SPECS = _build_specs()
+
+
+class StyleRegistry:
+    """Named styles for one workbook, registered on first use."""
+
+    def __init__(self, wb: openpyxl.Workbook):
+        self.wb = wb
+        self._registered = set(wb.style_names)
+
+    def name(self, style: str) -> str:
+        """Make sure a style exists in the workbook and return its name."""
+        if style not in self._registered:
+            self.wb.add_named_style(NamedStyle(name=style, **STYLE_SPECS[style]))
+            self._registered.add(style)
+        return style
+
+    def apply(self, cell, style: str) -> None:
+        """Style a cell by reference."""
+        cell.style = self.name(style)
+
+    def apply_row(self, ws, row: int, styles: Iterable[str], start_col: int = 1) -> None:
+        """Style consecutive cells of a row."""
+        for col, style in enumerate(styles, start_col):
+            ws.cell(row, col).style = self.name(style)
+
+    def row(self, ws, values: Iterable[Any], styles: Iterable[str]) -> List[WriteOnlyCell]:
+        """Build a row of styled cells for a write-only worksheet."""
+        cells = []
+        for value, style in zip(values, styles):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = self.name(style)
+            cells.append(cell)
+        return cells
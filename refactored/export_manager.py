@@ -1,26 +1,42 @@
 """Export functionality for Excel and CSV reports."""
+import re
+from itertools import chain
 import openpyxl
 from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.styles import PatternFill
 from openpyxl.chart import LineChart, Reference
 from openpyxl.worksheet.worksheet import Worksheet
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime
-from models import Station, GlobalHistoryEntry
-from config import Colors, TIMESTAMP_FORMAT, FILE_TIMESTAMP_FORMAT
+from models import Station, GlobalHistoryEntry, GlobalHistoryLog
+from retention import RAW, trend_points
+from history_archive import HistoryArchive
+import analytics
+from config import (Colors, TIMESTAMP_FORMAT, FILE_TIMESTAMP_FORMAT, STREAMING_EXPORT_THRESHOLD,
+                    ROLLUP_SNAPSHOTS, SNAPSHOT_ROLLUP_SHEET)
+import xlsx_append
+from excel_styles import (ExcelColors, StyleRegistry, HEADER_FILL, HEADER_FONT, HEADER_ALIGNMENT,
+                          HEADER_BORDER, STATUS_FILLS, THIN_BORDER, status_key)
+from logger import get_logger
 
+logger = get_logger()
 
-class ExcelColors:
-    """Enhanced color scheme for Excel exports."""
-    HEADER_PRIMARY = '1F4788'      # Deep blue
-    HEADER_SECONDARY = '2E5C8A'    # Medium blue
-    CRITICAL = 'E74C3C'            # Red
-    WARNING = 'F39C12'             # Orange
-    SUCCESS = '27AE60'             # Green
-    INFO = '3498DB'                # Light blue
-    NEUTRAL = 'ECF0F1'             # Light gray
-    TEXT_DARK = '2C3E50'           # Dark gray
-    BORDER_COLOR = 'BDC3C7'        # Gray border
+# (values, style names) for one table row
+TableRow = Tuple[list, List[str]]
+
+STATUS_HEADERS = ["Station Name", "Current LRU", "Min", "Max", "Status", "Last Updated"]
+STATUS_WIDTHS = (30, 15, 12, 12, 18, 22)
+HISTORY_HEADERS = ["Station", "Timestamp", "Count", "Min", "Max"]
+HISTORY_WIDTHS = (30, 22, 15, 12, 12)
+SNAPSHOT_HEADERS = ["Timestamp", "Station Name", "Current LRU", "Min", "Max", "Status"]
+SNAPSHOT_WIDTHS = (22, 30, 15, 12, 12, 18)
+ANALYTICS_HEADERS = ["Station", "Updates", "% Under Min", "% Normal", "% At Max",
+                     "Low Breaches", "Longest Low (h)", "High Breaches", "Longest High (h)",
+                     "P50", "P90", "P95"]
+ANALYTICS_WIDTHS = (30, 12, 14, 12, 12, 14, 16, 14, 17, 10, 10, 10)
+
+# Characters Excel does not allow in sheet titles
+INVALID_TITLE_CHARS = re.compile(r'[\\/*?:\[\]]')
 
 
 class ExportManager:
@@ -29,276 +45,301 @@ class ExportManager:
     @staticmethod
     def create_header_style() -> tuple:
         """Create enhanced header styling."""
-        fill = PatternFill(start_color=ExcelColors.HEADER_PRIMARY, end_color=ExcelColors.HEADER_PRIMARY, fill_type="solid")
-        font = Font(color="FFFFFF", bold=True, size=13, name='Calibri')
-        alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        border = Border(
-            left=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-            right=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-            top=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-            bottom=Side(style='medium', color='FFFFFF')
-        )
-        return fill, font, alignment, border
+        return HEADER_FILL, HEADER_FONT, HEADER_ALIGNMENT, HEADER_BORDER
     
     @staticmethod
     def get_status_fill(current: int, min_val: int, max_val: int) -> PatternFill:
         """Get enhanced status fill color based on values."""
-        if current < min_val:
-            return PatternFill(start_color=ExcelColors.CRITICAL, end_color=ExcelColors.CRITICAL, fill_type="solid")
-        elif current >= max_val:
-            return PatternFill(start_color=ExcelColors.WARNING, end_color=ExcelColors.WARNING, fill_type="solid")
-        return PatternFill(start_color=ExcelColors.SUCCESS, end_color=ExcelColors.SUCCESS, fill_type="solid")
+        return STATUS_FILLS[status_key(current, min_val, max_val)]
     
     @staticmethod
     def apply_cell_border(cell) -> None:
         """Apply consistent border to cell."""
-        cell.border = Border(
-            left=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-            right=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-            top=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-            bottom=Side(style='thin', color=ExcelColors.BORDER_COLOR)
-        )
+        cell.border = THIN_BORDER
     
-    def export_new_report(self, filename: str, stations: Dict[str, Station], 
-                         history: List[GlobalHistoryEntry]) -> None:
-        """Export enhanced Excel report with current status and history."""
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        assert ws is not None  # Type assertion: wb.active is never None for new workbooks
-        ws.title = "Current Status"
-        
-        # Add title row
-        ws.merge_cells('A1:F1')
-        title_cell = ws['A1']
-        title_cell.value = f"LRU Tracker Report - {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
-        title_cell.font = Font(size=16, bold=True, color=ExcelColors.HEADER_PRIMARY, name='Calibri')
-        title_cell.alignment = Alignment(horizontal='center', vertical='center')
-        ws.row_dimensions[1].height = 30
-        
-        # Header
-        headers = ["Station Name", "Current LRU", "Min", "Max", "Status", "Last Updated"]
-        ws.append(headers)
-        
-        # Style header
-        header_fill, header_font, header_align, header_border = self.create_header_style()
-        for col in range(1, len(headers) + 1):
-            cell = ws.cell(2, col)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_align
-            cell.border = header_border
-        ws.row_dimensions[2].height = 25
-        
-        # Data
-        for name in sorted(stations.keys()):
-            station = stations[name]
-            status = station.get_status()
-            last_updated = station.history[-1].timestamp if station.history else "Never"
-            
-            row = [name, station.current, station.min_lru, station.max_lru, status, last_updated]
-            ws.append(row)
-            row_num = ws.max_row
-            
-            # Style data cells
-            for col in range(1, 7):
-                cell = ws.cell(row_num, col)
-                self.apply_cell_border(cell)
-                cell.alignment = Alignment(horizontal='center' if col > 1 else 'left', vertical='center')
-                cell.font = Font(name='Calibri', size=11)
-                
-                # Alternate row colors
-                if row_num % 2 == 0:
-                    cell.fill = PatternFill(start_color=ExcelColors.NEUTRAL, end_color=ExcelColors.NEUTRAL, fill_type="solid")
-            
-            # Color code status with white text
-            status_cell = ws.cell(row_num, 5)
-            status_cell.fill = self.get_status_fill(station.current, station.min_lru, station.max_lru)
-            status_cell.font = Font(bold=True, color='FFFFFF', size=11, name='Calibri')
+    def export_new_report(self, filename: str, stations: Dict[str, Station],
+                         history: List[GlobalHistoryEntry],
+                         streaming: Optional[bool] = None,
+                         archive: Optional[HistoryArchive] = None) -> None:
+        """Export enhanced Excel report with current status and history.
+        
+        streaming: use the write-only workbook so memory stays flat for
+        large histories. Defaults to on at STREAMING_EXPORT_THRESHOLD rows.
+        archive: archived months to include ahead of history; they are
+        read one month at a time while the sheet is written.
+        """
+        archived_rows = archive.row_count() if archive is not None else 0
+        if streaming is None:
+            streaming = len(history) + archived_rows >= STREAMING_EXPORT_THRESHOLD
+        
+        if streaming:
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet("Current Status")
+        else:
+            wb = openpyxl.Workbook()
+            ws = wb.active
+            assert ws is not None  # Type assertion: wb.active is never None for new workbooks
+            ws.title = "Current Status"
+        styles = StyleRegistry(wb)
         
-        # Adjust column widths
-        ws.column_dimensions['A'].width = 30
-        ws.column_dimensions['B'].width = 15
-        ws.column_dimensions['C'].width = 12
-        ws.column_dimensions['D'].width = 12
-        ws.column_dimensions['E'].width = 18
-        ws.column_dimensions['F'].width = 22
-        
-        # Freeze panes
-        ws.freeze_panes = 'A3'
+        title = f"LRU Tracker Report - {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
+        self._write_table(ws, styles, title, STATUS_HEADERS, STATUS_WIDTHS,
+                          self._status_rows(stations), write_only=streaming)
         
         # Create history sheet if there's history
-        if history:
-            self._add_history_sheet(wb, history)
+        if history or archived_rows:
+            self._add_history_sheet(wb, history, styles, write_only=streaming, archive=archive)
         
         wb.save(filename)
     
-    def _add_history_sheet(self, wb: openpyxl.Workbook, 
-                          history: List[GlobalHistoryEntry]) -> None:
-        """Add enhanced history sheet to workbook."""
+    def _add_history_sheet(self, wb: openpyxl.Workbook,
+                          history: List[GlobalHistoryEntry],
+                          styles: Optional[StyleRegistry] = None,
+                          write_only: bool = False,
+                          archive: Optional[HistoryArchive] = None,
+                          start: Optional[int] = None, end: Optional[int] = None) -> None:
+        """Add enhanced history sheet to workbook.
+        
+        With an archive, archived rows come first; start/end limit the
+        sheet to [start, end) and only overlapping archive months are read.
+        """
+        archived = archive.iter_history(start, end) if archive is not None else ()
+        if start is not None or end is not None:
+            history = [e for e in history
+                       if (start is None or e.epoch >= start) and (end is None or e.epoch < end)]
         ws_history = wb.create_sheet("History")
-        
-        # Add title
-        ws_history.merge_cells('A1:E1')
-        title_cell = ws_history['A1']
-        title_cell.value = "LRU Update History"
-        title_cell.font = Font(size=16, bold=True, color=ExcelColors.HEADER_PRIMARY, name='Calibri')
-        title_cell.alignment = Alignment(horizontal='center', vertical='center')
-        ws_history.row_dimensions[1].height = 30
-        
-        history_headers = ["Station", "Timestamp", "Count", "Min", "Max"]
-        ws_history.append(history_headers)
-        
-        # Style header
-        header_fill, header_font, header_align, header_border = self.create_header_style()
-        for col in range(1, len(history_headers) + 1):
-            cell = ws_history.cell(2, col)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_align
-            cell.border = header_border
-        ws_history.row_dimensions[2].height = 25
-        
-        # Add history data
-        for record in history:
-            ws_history.append([
-                record.station, record.timestamp, record.count,
-                record.min_lru, record.max_lru
-            ])
-            row_num = ws_history.max_row
-            
-            # Style cells
-            for col in range(1, 6):
-                cell = ws_history.cell(row_num, col)
-                self.apply_cell_border(cell)
-                cell.alignment = Alignment(horizontal='center' if col > 1 else 'left', vertical='center')
-                cell.font = Font(name='Calibri', size=11)
-                
-                # Alternate row colors
-                if row_num % 2 == 0:
-                    cell.fill = PatternFill(start_color=ExcelColors.NEUTRAL, end_color=ExcelColors.NEUTRAL, fill_type="solid")
-        
-        # Adjust column widths
-        ws_history.column_dimensions['A'].width = 30
-        ws_history.column_dimensions['B'].width = 22
-        ws_history.column_dimensions['C'].width = 15
-        ws_history.column_dimensions['D'].width = 12
-        ws_history.column_dimensions['E'].width = 12
-        
-        # Freeze panes
-        ws_history.freeze_panes = 'A3'
+        self._write_table(ws_history, styles or StyleRegistry(wb), "LRU Update History",
+                          HISTORY_HEADERS, HISTORY_WIDTHS, self._history_rows(history, archived),
+                          write_only=write_only)
     
-    def append_to_existing(self, filename: str, stations: Dict[str, Station]) -> str:
-        """Append enhanced snapshot to existing Excel file."""
-        wb = openpyxl.load_workbook(filename)
-        
-        # Create new sheet with timestamp
-        sheet_name = f"Snapshot_{datetime.now().strftime(FILE_TIMESTAMP_FORMAT)}"
-        ws = wb.create_sheet(sheet_name)
-        
-        # Add title
-        ws.merge_cells('A1:F1')
-        title_cell = ws['A1']
-        title_cell.value = f"Snapshot - {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
-        title_cell.font = Font(size=16, bold=True, color=ExcelColors.HEADER_PRIMARY, name='Calibri')
-        title_cell.alignment = Alignment(horizontal='center', vertical='center')
+    @staticmethod
+    def _write_table(ws: Worksheet, styles: StyleRegistry, title: str, headers: List[str],
+                     widths: Sequence[int], rows: Iterable[TableRow],
+                     write_only: bool = False) -> None:
+        """Write a title row, header row and data rows with frozen headers.
+        
+        Rows are appended one at a time, so a write-only worksheet streams
+        them straight to disk.
+        """
+        # Sheet layout goes first: a write-only sheet fixes it at the first row
         ws.row_dimensions[1].height = 30
-        
-        # Header
-        headers = ["Station Name", "Current LRU", "Min", "Max", "Status", "Timestamp"]
-        ws.append(headers)
-        
-        # Style header
-        header_fill, header_font, header_align, header_border = self.create_header_style()
-        for col in range(1, len(headers) + 1):
-            cell = ws.cell(2, col)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_align
-            cell.border = header_border
         ws.row_dimensions[2].height = 25
+        for col, width in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(col)].width = width
+        ws.freeze_panes = 'A3'
         
-        # Data
-        timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
-        for name in sorted(stations.keys()):
+        title_range = f"A1:{get_column_letter(len(headers))}1"
+        header_styles = ['lru_header'] * len(headers)
+        
+        if write_only:
+            ws.merged_cells.add(title_range)
+            ws.append(styles.row(ws, [title], ['lru_title']))
+            ws.append(styles.row(ws, headers, header_styles))
+            for values, row_styles in rows:
+                ws.append(styles.row(ws, values, row_styles))
+        else:
+            ws.merge_cells(title_range)
+            ws['A1'] = title
+            styles.apply(ws['A1'], 'lru_title')
+            ws.append(headers)
+            styles.apply_row(ws, 2, header_styles)
+            for row_num, (values, row_styles) in enumerate(rows, 3):
+                ws.append(values)
+                styles.apply_row(ws, row_num, row_styles)
+    
+    @staticmethod
+    def _row_styles(row_num: int, columns: int) -> List[str]:
+        """Bordered cell styles for a data row, striped on even rows."""
+        suffix = '_alt' if row_num % 2 == 0 else ''
+        return [f'lru_cell{suffix}'] + [f'lru_cell_center{suffix}'] * (columns - 1)
+    
+    def _status_rows(self, stations: Dict[str, Station],
+                     timestamp: Optional[str] = None) -> Iterator[TableRow]:
+        """Current status rows; timestamp replaces the last-updated column."""
+        for row_num, name in enumerate(sorted(stations.keys()), 3):
             station = stations[name]
-            status = station.get_status()
-            
-            row = [name, station.current, station.min_lru, station.max_lru, status, timestamp]
-            ws.append(row)
-            row_num = ws.max_row
-            
-            # Style cells
-            for col in range(1, 7):
-                cell = ws.cell(row_num, col)
-                self.apply_cell_border(cell)
-                cell.alignment = Alignment(horizontal='center' if col > 1 else 'left', vertical='center')
-                cell.font = Font(name='Calibri', size=11)
-                
-                # Alternate row colors
-                if row_num % 2 == 0:
-                    cell.fill = PatternFill(start_color=ExcelColors.NEUTRAL, end_color=ExcelColors.NEUTRAL, fill_type="solid")
+            if timestamp is None:
+                last_updated = station.history.last_timestamp() or "Never"
+            else:
+                last_updated = timestamp
             
-            # Color code status
-            status_cell = ws.cell(row_num, 5)
-            status_cell.fill = self.get_status_fill(station.current, station.min_lru, station.max_lru)
-            status_cell.font = Font(bold=True, color='FFFFFF', size=11, name='Calibri')
-        
-        # Adjust column widths
-        ws.column_dimensions['A'].width = 30
-        ws.column_dimensions['B'].width = 15
-        ws.column_dimensions['C'].width = 12
-        ws.column_dimensions['D'].width = 12
-        ws.column_dimensions['E'].width = 18
-        ws.column_dimensions['F'].width = 22
+            row_styles = self._row_styles(row_num, 6)
+            # Color code status with white text
+            row_styles[4] = 'lru_status_' + status_key(station.current, station.min_lru,
+                                                       station.max_lru)
+            yield ([name, station.current, station.min_lru, station.max_lru,
+                    station.get_status(), last_updated], row_styles)
+    
+    def create_analytics_report(self, filename: str, history: List[GlobalHistoryEntry],
+                                archive: Optional[HistoryArchive] = None) -> None:
+        """Workbook with per-station analytics (see analytics.py) over all history.
+        
+        archive: archived months to include along with history.
+        """
+        if archive is not None:
+            history = GlobalHistoryLog(chain(archive.iter_history(), history))
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        assert ws is not None  # Type assertion: wb.active is never None for new workbooks
+        ws.title = "Station Analytics"
+        title = f"Station Analytics - {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
+        self._write_table(ws, StyleRegistry(wb), title, ANALYTICS_HEADERS, ANALYTICS_WIDTHS,
+                          self._analytics_rows(history))
+        wb.save(filename)
+    
+    def _analytics_rows(self, history: List[GlobalHistoryEntry]) -> Iterator[TableRow]:
+        """Per-station analytics rows computed over history."""
+        results = analytics.analyze(history, percentiles=(50, 90, 95))
+        for row_num, name in enumerate(sorted(results), 3):
+            result = results[name]
+            pct = [round(result.time_in_status(s) * 100, 1) for s in analytics.STATUSES]
+            yield ([name, result.updates, *pct,
+                    result.breaches[analytics.UNDER_MIN],
+                    round(result.longest_breach[analytics.UNDER_MIN] / 3600, 1),
+                    result.breaches[analytics.AT_MAX],
+                    round(result.longest_breach[analytics.AT_MAX] / 3600, 1),
+                    *(round(result.percentiles[q], 1) for q in (50, 90, 95))],
+                   self._row_styles(row_num, len(ANALYTICS_HEADERS)))
+    
+    def _history_rows(self, history: List[GlobalHistoryEntry],
+                      archived: Iterable[GlobalHistoryEntry] = ()) -> Iterator[TableRow]:
+        """History rows, read straight from the columns when possible."""
+        if isinstance(history, GlobalHistoryLog):
+            records = history.iter_rows()
+        else:
+            records = ((r.station, r.timestamp, r.count, r.min_lru, r.max_lru) for r in history)
+        records = chain(((r.station, r.timestamp, r.count, r.min_lru, r.max_lru)
+                         for r in archived), records)
+        
+        even_styles = self._row_styles(0, 5)
+        odd_styles = self._row_styles(1, 5)
+        for row_num, record in enumerate(records, 3):
+            yield list(record), even_styles if row_num % 2 == 0 else odd_styles
+    
+    def append_to_existing(self, filename: str, stations: Dict[str, Station],
+                           rollup: bool = ROLLUP_SNAPSHOTS) -> str:
+        """Append enhanced snapshot to existing Excel file.
+        
+        The new sheet is added straight into the .xlsx package, so the
+        existing sheets are never loaded. With rollup, the snapshot is added
+        as rows of a single long-format sheet instead. Returns the sheet name.
+        """
+        now = datetime.now()
+        timestamp = now.strftime(TIMESTAMP_FORMAT)
+        
+        if rollup:
+            rows = self._snapshot_rows(stations, timestamp)
+            try:
+                xlsx_append.append_rows(filename, SNAPSHOT_ROLLUP_SHEET, SNAPSHOT_HEADERS,
+                                        rows, SNAPSHOT_WIDTHS)
+            except xlsx_append.XlsxPackageError as e:
+                logger.warning(f"Falling back to openpyxl append: {e}")
+                self._append_rows_openpyxl(filename, SNAPSHOT_ROLLUP_SHEET, rows)
+            return SNAPSHOT_ROLLUP_SHEET
         
-        # Freeze panes
-        ws.freeze_panes = 'A3'
+        # Create new sheet with timestamp
+        sheet_name = f"Snapshot_{now.strftime(FILE_TIMESTAMP_FORMAT)}"
+        title = f"Snapshot - {now.strftime('%B %d, %Y at %I:%M %p')}"
+        headers = STATUS_HEADERS[:5] + ["Timestamp"]
+        rows = list(self._status_rows(stations, timestamp))
+        try:
+            return xlsx_append.append_sheet(filename, sheet_name, title, headers, rows,
+                                            STATUS_WIDTHS)
+        except xlsx_append.XlsxPackageError as e:
+            logger.warning(f"Falling back to openpyxl append: {e}")
         
+        wb = openpyxl.load_workbook(filename)
+        ws = wb.create_sheet(sheet_name)
+        self._write_table(ws, StyleRegistry(wb), title, headers, STATUS_WIDTHS, rows)
+        wb.save(filename)
+        return ws.title
+    
+    def _snapshot_rows(self, stations: Dict[str, Station], timestamp: str) -> List[TableRow]:
+        """Long-format snapshot rows: one per station, led by the timestamp."""
+        rows = []
+        for values, row_styles in self._status_rows(stations):
+            rows.append(([timestamp] + values[:5],
+                         [row_styles[1]] + row_styles[:5]))
+        return rows
+    
+    @staticmethod
+    def _append_rows_openpyxl(filename: str, sheet_name: str, rows: List[TableRow]) -> None:
+        """Slow path for rollup appends to workbooks xlsx_append can't edit."""
+        wb = openpyxl.load_workbook(filename)
+        styles = StyleRegistry(wb)
+        if sheet_name in wb.sheetnames:
+            ws = wb[sheet_name]
+        else:
+            ws = wb.create_sheet(sheet_name)
+            ws.append(SNAPSHOT_HEADERS)
+            styles.apply_row(ws, 1, ['lru_header'] * len(SNAPSHOT_HEADERS))
+            for col, width in enumerate(SNAPSHOT_WIDTHS, 1):
+                ws.column_dimensions[get_column_letter(col)].width = width
+            ws.freeze_panes = 'A2'
+        first_row = ws.max_row + 1
+        for row_num, (values, row_styles) in enumerate(rows, first_row):
+            ws.append(values)
+            styles.apply_row(ws, row_num, row_styles)
         wb.save(filename)
-        return sheet_name
     
     def create_trend_report(self, filename: str, station: Station) -> None:
         """Create professional trend report with enhanced chart and analysis for a station."""
         wb = openpyxl.Workbook()
         ws = wb.active
         assert ws is not None  # Type assertion: wb.active is never None for new workbooks
+        ws.title = self.trend_sheet_title(station.name)
+        self._write_trend_sheet(ws, StyleRegistry(wb), station)
+        wb.save(filename)
+    
+    def create_multi_trend_report(self, filename: str, stations: Iterable[Station],
+                                  progress: Optional[Callable[[int], None]] = None) -> None:
+        """Create one workbook with a trend sheet per station.
         
-        # Shorten title if too long (Excel sheet name limit is 31 chars)
-        sheet_title = station.name[:28] + "..." if len(station.name) > 31 else station.name
-        ws.title = sheet_title
-        
+        progress, if given, is called with the number of sheets written.
+        """
+        wb = openpyxl.Workbook()
+        wb.remove(wb.active)
+        styles = StyleRegistry(wb)
+        for done, station in enumerate(stations, 1):
+            ws = wb.create_sheet(self.trend_sheet_title(station.name))
+            self._write_trend_sheet(ws, styles, station)
+            if progress:
+                progress(done)
+        wb.save(filename)
+    
+    @staticmethod
+    def trend_sheet_title(name: str) -> str:
+        """Sheet title for a station (Excel limits titles to 31 chars)."""
+        title = INVALID_TITLE_CHARS.sub('_', name)
+        return title[:28] + "..." if len(title) > 31 else title
+    
+    def _write_trend_sheet(self, ws: Worksheet, styles: StyleRegistry, station: Station) -> None:
+        """Fill a worksheet with a station's trend statistics, table and chart."""
         # ===== TITLE SECTION =====
         ws.merge_cells('A1:F1')
         title_cell = ws['A1']
         title_cell.value = f"📈 LRU Trend Analysis: {station.name}"
-        title_cell.font = Font(size=16, bold=True, color=ExcelColors.HEADER_PRIMARY, name='Calibri')
-        title_cell.alignment = Alignment(horizontal='center', vertical='center')
-        title_cell.fill = PatternFill(start_color=ExcelColors.NEUTRAL, end_color=ExcelColors.NEUTRAL, fill_type="solid")
+        styles.apply(title_cell, 'lru_title_banner')
         ws.row_dimensions[1].height = 35
         
         # ===== SUMMARY SECTION =====
         ws.merge_cells('A2:F2')
         summary_cell = ws['A2']
         summary_cell.value = f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
-        summary_cell.font = Font(size=11, italic=True, color=ExcelColors.TEXT_DARK, name='Calibri')
-        summary_cell.alignment = Alignment(horizontal='center', vertical='center')
+        styles.apply(summary_cell, 'lru_subtitle')
         ws.row_dimensions[2].height = 20
         
         # ===== STATISTICS CARDS (Row 3) =====
         current_row = 3
         ws.row_dimensions[current_row].height = 25
         
-        # Calculate statistics
-        if station.history:
-            counts = [record.count for record in station.history]
-            avg_count = sum(counts) / len(counts)
-            min_count = min(counts)
-            max_count = max(counts)
-            total_records = len(counts)
-            current_status = station.get_status()
-        else:
-            avg_count = min_count = max_count = total_records = 0
-            current_status = "No Data"
+        # Statistics come from the station's running aggregates, which
+        # also cover rolled-up and archived history
+        points = trend_points(station)
+        stats = station.stats
+        avg_count = stats.mean
+        total_records = stats.count
+        current_status = station.get_status() if points else "No Data"
         
         # Create statistics cards
         stats_headers = ["Current LRU", "Min Threshold", "Max Threshold", "Average", "Status", "Data Points"]
@@ -306,127 +347,64 @@ class ExportManager:
             station.current,
             station.min_lru,
             station.max_lru,
-            f"{avg_count:.1f}" if station.history else "N/A",
+            f"{avg_count:.1f}" if points else "N/A",
             current_status,
             total_records
         ]
         
-        # Style statistics section
+        # Color code the Current LRU card by status; the Status card only
+        # when it holds one of the trend status labels
+        status_cards = {"Critical": 'lru_card_critical', "Warning": 'lru_card_warning',
+                        "Good": 'lru_card_success'}
+        value_styles = ['lru_card_value'] * len(stats_values)
+        value_styles[0] = 'lru_card_' + status_key(station.current, station.min_lru, station.max_lru)
+        value_styles[4] = status_cards.get(current_status, 'lru_card_plain')
+        
         for col_idx, (header, value) in enumerate(zip(stats_headers, stats_values), 1):
-            # Header cell
-            header_cell = ws.cell(current_row, col_idx)
-            header_cell.value = header
-            header_cell.font = Font(size=10, bold=True, color='FFFFFF', name='Calibri')
-            header_cell.fill = PatternFill(start_color=ExcelColors.HEADER_SECONDARY, 
-                                          end_color=ExcelColors.HEADER_SECONDARY, fill_type="solid")
-            header_cell.alignment = Alignment(horizontal='center', vertical='center')
-            header_cell.border = Border(
-                left=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                right=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                top=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                bottom=Side(style='thin', color=ExcelColors.BORDER_COLOR)
-            )
-            
-            # Value cell
-            value_cell = ws.cell(current_row + 1, col_idx)
-            value_cell.value = value
-            value_cell.font = Font(size=12, bold=True, name='Calibri')
-            value_cell.alignment = Alignment(horizontal='center', vertical='center')
-            value_cell.border = Border(
-                left=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                right=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                top=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                bottom=Side(style='medium', color=ExcelColors.BORDER_COLOR)
-            )
-            
-            # Color code based on status for Current LRU
-            if col_idx == 1:  # Current LRU
-                value_cell.fill = self.get_status_fill(station.current, station.min_lru, station.max_lru)
-                value_cell.font = Font(size=12, bold=True, color='FFFFFF', name='Calibri')
-            elif col_idx == 5:  # Status
-                if current_status == "Critical":
-                    value_cell.fill = PatternFill(start_color=ExcelColors.CRITICAL, 
-                                                 end_color=ExcelColors.CRITICAL, fill_type="solid")
-                    value_cell.font = Font(size=12, bold=True, color='FFFFFF', name='Calibri')
-                elif current_status == "Warning":
-                    value_cell.fill = PatternFill(start_color=ExcelColors.WARNING, 
-                                                 end_color=ExcelColors.WARNING, fill_type="solid")
-                    value_cell.font = Font(size=12, bold=True, color='FFFFFF', name='Calibri')
-                elif current_status == "Good":
-                    value_cell.fill = PatternFill(start_color=ExcelColors.SUCCESS, 
-                                                 end_color=ExcelColors.SUCCESS, fill_type="solid")
-                    value_cell.font = Font(size=12, bold=True, color='FFFFFF', name='Calibri')
-            else:
-                value_cell.fill = PatternFill(start_color='F8F9FA', end_color='F8F9FA', fill_type="solid")
+            ws.cell(current_row, col_idx).value = header
+            ws.cell(current_row + 1, col_idx).value = value
+        styles.apply_row(ws, current_row, ['lru_card_header'] * len(stats_headers))
+        styles.apply_row(ws, current_row + 1, value_styles)
         
         ws.row_dimensions[current_row + 1].height = 30
         
         # ===== DATA TABLE SECTION =====
-        current_row = 6
+        # Spacing row, then the table header on row 8
+        current_row = 8
         
-        # Add spacing row
-        current_row += 1
-        
-        # Data headers
         headers = ["#", "Timestamp", "LRU Count", "Min", "Max", "Status", "Variance"]
-        ws.append(headers)
-        current_row += 1
-        
-        # Style data headers
-        header_fill, header_font, header_align, header_border = self.create_header_style()
-        for col in range(1, len(headers) + 1):
-            cell = ws.cell(current_row, col)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_align
-            cell.border = header_border
+        for col_idx, header in enumerate(headers, 1):
+            ws.cell(current_row, col_idx).value = header
+        styles.apply_row(ws, current_row, ['lru_header'] * len(headers))
         ws.row_dimensions[current_row].height = 25
         
         # Add data rows with enhanced formatting
-        for idx, record in enumerate(station.history, 1):
-            variance = record.count - avg_count if station.history else 0
-            status = "Critical" if record.count < station.min_lru else \
-                    "Warning" if record.count >= station.max_lru else "Good"
+        # Older periods appear as hourly/daily averages, marked in the timestamp
+        for idx, point in enumerate(points, 1):
+            value = point.value if point.tier == RAW else round(point.value, 1)
+            variance = value - avg_count
+            status = "Critical" if value < station.min_lru else \
+                    "Warning" if value >= station.max_lru else "Good"
             
-            row_data = [idx, record.timestamp, record.count, station.min_lru, 
+            row_data = [idx, point.label, value, station.min_lru,
                        station.max_lru, status, f"{variance:+.1f}"]
             ws.append(row_data)
-            row_num = ws.max_row
-            
-            # Style data cells
-            for col in range(1, len(headers) + 1):
-                cell = ws.cell(row_num, col)
-                self.apply_cell_border(cell)
-                cell.alignment = Alignment(horizontal='center' if col > 1 else 'right', vertical='center')
-                cell.font = Font(name='Calibri', size=10)
-                
-                # Alternate row colors
-                if row_num % 2 == 0:
-                    cell.fill = PatternFill(start_color='F8F9FA', end_color='F8F9FA', fill_type="solid")
-                else:
-                    cell.fill = PatternFill(start_color='FFFFFF', end_color='FFFFFF', fill_type="solid")
+            row_num = current_row + idx
             
-            # Color code status column
-            status_cell = ws.cell(row_num, 6)
-            if status == "Critical":
-                status_cell.fill = PatternFill(start_color=ExcelColors.CRITICAL, 
-                                              end_color=ExcelColors.CRITICAL, fill_type="solid")
-                status_cell.font = Font(bold=True, color='FFFFFF', size=10, name='Calibri')
-            elif status == "Warning":
-                status_cell.fill = PatternFill(start_color=ExcelColors.WARNING, 
-                                              end_color=ExcelColors.WARNING, fill_type="solid")
-                status_cell.font = Font(bold=True, color='FFFFFF', size=10, name='Calibri')
-            else:
-                status_cell.fill = PatternFill(start_color=ExcelColors.SUCCESS, 
-                                              end_color=ExcelColors.SUCCESS, fill_type="solid")
-                status_cell.font = Font(bold=True, color='FFFFFF', size=10, name='Calibri')
-            
-            # Color code variance (positive = green, negative = red)
-            variance_cell = ws.cell(row_num, 7)
+            # Alternate row colors; status column color coded and variance
+            # colored by sign (positive = green, negative = red)
+            suffix = '_alt' if row_num % 2 == 0 else ''
             if variance > 0:
-                variance_cell.font = Font(bold=True, color=ExcelColors.SUCCESS, size=10, name='Calibri')
+                variance_style = f'trend_variance_up{suffix}'
             elif variance < 0:
-                variance_cell.font = Font(bold=True, color=ExcelColors.CRITICAL, size=10, name='Calibri')
+                variance_style = f'trend_variance_down{suffix}'
+            else:
+                variance_style = f'trend_cell{suffix}'
+            styles.apply_row(ws, row_num, [
+                f'trend_cell_index{suffix}', f'trend_cell{suffix}', f'trend_cell{suffix}',
+                f'trend_cell{suffix}', f'trend_cell{suffix}',
+                'trend_status_' + status_key(value, station.min_lru, station.max_lru),
+                variance_style])
         
         # Adjust column widths
         ws.column_dimensions['A'].width = 8   # #
@@ -441,7 +419,7 @@ class ExportManager:
         ws.freeze_panes = 'A9'
         
         # ===== CREATE PROFESSIONAL CHART =====
-        if station.history and len(station.history) > 1:
+        if len(points) > 1:
             chart = LineChart()
             chart.title = f"LRU Trend Analysis"
             chart.style = 12  # Professional style
@@ -451,19 +429,19 @@ class ExportManager:
             chart.width = 20   # Wider chart
             
             # Add LRU Count line (bold)
-            data_ref = Reference(ws, min_col=3, max_col=3, min_row=8, max_row=8 + len(station.history))
+            data_ref = Reference(ws, min_col=3, max_col=3, min_row=8, max_row=8 + len(points))
             chart.add_data(data_ref, titles_from_data=True)
             
             # Add Min threshold line
-            min_ref = Reference(ws, min_col=4, max_col=4, min_row=8, max_row=8 + len(station.history))
+            min_ref = Reference(ws, min_col=4, max_col=4, min_row=8, max_row=8 + len(points))
             chart.add_data(min_ref, titles_from_data=True)
             
             # Add Max threshold line
-            max_ref = Reference(ws, min_col=5, max_col=5, min_row=8, max_row=8 + len(station.history))
+            max_ref = Reference(ws, min_col=5, max_col=5, min_row=8, max_row=8 + len(points))
             chart.add_data(max_ref, titles_from_data=True)
             
             # Set categories (timestamps)
-            cats = Reference(ws, min_col=2, min_row=9, max_row=8 + len(station.history))
+            cats = Reference(ws, min_col=2, min_row=9, max_row=8 + len(points))
             chart.set_categories(cats)
             
             # Customize line colors
@@ -478,5 +456,3 @@ class ExportManager:
             
             # Place chart to the right of the data
             ws.add_chart(chart, "I3")
-        
-        wb.save(filename)
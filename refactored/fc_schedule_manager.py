@@ -2,38 +2,25 @@
 import csv
 import re
 import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
 from datetime import datetime
 from models import Station
-from config import ALL_TIME_SLOTS, TIME_SLOT_MAP, TIMESTAMP_FORMAT
+from config import ALL_TIME_SLOTS
+from time_slot_engine import TimeSlotBucketer
+from excel_styles import StyleRegistry
 from logger import get_logger
 
 logger = get_logger()
 
 
-class ExcelColors:
-    """Color scheme for FC Schedule exports."""
-    HEADER_BLUE = '1F4788'
-    SHIFT1_HEADER = '2E5C8A'
-    SHIFT2_HEADER = '34495E'
-    CRITICAL = 'E74C3C'
-    WARNING = 'F39C12'
-    SUCCESS = '27AE60'
-    INFO = '3498DB'
-    NEUTRAL = 'ECF0F1'
-    WHITE = 'FFFFFF'
-    TEXT_DARK = '2C3E50'
-    BORDER_COLOR = 'BDC3C7'
-    LIGHT_BLUE = 'D6EAF8'
-    LIGHT_GREEN = 'D5F4E6'
-
-
 class FCScheduleManager:
     """Handles FC Standard Work Spreadsheet format."""
     
+    def __init__(self):
+        self.bucketer = TimeSlotBucketer()
+    
     def import_from_csv(self, filename: str, existing_stations: Dict[str, Station]) -> Tuple[List[Station], List[str]]:
         """Import stations from FC schedule CSV. Returns (stations, errors)."""
         imported_stations = []
@@ -86,38 +73,43 @@ class FCScheduleManager:
         logger.info(f"Imported {len(imported_stations)} stations from FC schedule, {len(errors)} errors")
         return imported_stations, errors
     
-    def export_to_csv(self, filename: str, stations: Dict[str, Station]) -> None:
-        """Export stations in professional FC schedule Excel format with enhanced styling."""
+    def export_to_csv(self, filename: str, stations: Dict[str, Station],
+                      window: Optional[Tuple[int, int]] = None) -> None:
+        """Export stations in professional FC schedule Excel format with enhanced styling.
+        
+        window: optional (start, end) epoch range, e.g. from
+        time_slot_engine.shift_window(); defaults to all history.
+        """
         # Check if we should export as Excel (recommended) or CSV
         is_excel = filename.lower().endswith('.xlsx') or filename.lower().endswith('.xls')
         
         if is_excel:
-            self._export_to_excel(filename, stations)
+            self._export_to_excel(filename, stations, window)
         else:
-            self._export_to_csv_legacy(filename, stations)
+            self._export_to_csv_legacy(filename, stations, window)
     
-    def _export_to_excel(self, filename: str, stations: Dict[str, Station]) -> None:
+    def _export_to_excel(self, filename: str, stations: Dict[str, Station],
+                         window: Optional[Tuple[int, int]] = None) -> None:
         """Export stations in professional Excel format with styling and formulas."""
         wb = openpyxl.Workbook()
         ws = wb.active
         assert ws is not None  # Type assertion: wb.active is never None for new workbooks
         ws.title = "FC Schedule"
         
+        styles = StyleRegistry(wb)
+        
         # ===== TITLE SECTION =====
         ws.merge_cells('A1:O1')
         title_cell = ws['A1']
         title_cell.value = f"🏭 FC Standard Work Schedule - {datetime.now().strftime('%B %d, %Y')}"
-        title_cell.font = Font(size=16, bold=True, color=ExcelColors.HEADER_BLUE, name='Calibri')
-        title_cell.alignment = Alignment(horizontal='center', vertical='center')
-        title_cell.fill = PatternFill(start_color=ExcelColors.NEUTRAL, end_color=ExcelColors.NEUTRAL, fill_type="solid")
+        styles.apply(title_cell, 'lru_title_banner')
         ws.row_dimensions[1].height = 35
         
         # ===== INSTRUCTIONS ROW =====
         ws.merge_cells('A2:O2')
         instructions = ws['A2']
         instructions.value = "Record the number of batches scheduled for each time slot. Update counts throughout the shift."
-        instructions.font = Font(size=10, italic=True, color=ExcelColors.TEXT_DARK, name='Calibri')
-        instructions.alignment = Alignment(horizontal='center', vertical='center')
+        styles.apply(instructions, 'lru_note')
         ws.row_dimensions[2].height = 20
         
         current_row = 3
@@ -127,18 +119,12 @@ class FCScheduleManager:
         ws.merge_cells(f'D{current_row}:I{current_row}')
         shift1_cell = ws[f'D{current_row}']
         shift1_cell.value = "1st Shift - Record # of Batches to Schedule"
-        shift1_cell.font = Font(size=12, bold=True, color=ExcelColors.WHITE, name='Calibri')
-        shift1_cell.fill = PatternFill(start_color=ExcelColors.SHIFT1_HEADER, 
-                                       end_color=ExcelColors.SHIFT1_HEADER, fill_type="solid")
-        shift1_cell.alignment = Alignment(horizontal='center', vertical='center')
+        styles.apply(shift1_cell, 'fc_shift1_banner')
         
         ws.merge_cells(f'J{current_row}:L{current_row}')
         shift2_cell = ws[f'J{current_row}']
         shift2_cell.value = "2nd Shift - Record # of Batches to Schedule"
-        shift2_cell.font = Font(size=12, bold=True, color=ExcelColors.WHITE, name='Calibri')
-        shift2_cell.fill = PatternFill(start_color=ExcelColors.SHIFT2_HEADER, 
-                                       end_color=ExcelColors.SHIFT2_HEADER, fill_type="solid")
-        shift2_cell.alignment = Alignment(horizontal='center', vertical='center')
+        styles.apply(shift2_cell, 'fc_shift2_banner')
         
         ws.row_dimensions[current_row].height = 25
         current_row += 1
@@ -146,31 +132,20 @@ class FCScheduleManager:
         # ===== COLUMN HEADERS (Row 4) =====
         headers = ['LRU', 'Test to Schedule', 'Rack Location'] + ALL_TIME_SLOTS + ['Total', 'Status']
         for col_idx, header in enumerate(headers, 1):
-            cell = ws.cell(current_row, col_idx)
-            cell.value = header
-            cell.font = Font(size=11, bold=True, color=ExcelColors.WHITE, name='Calibri')
-            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-            
-            # Color code by shift
+            ws.cell(current_row, col_idx).value = header
+        
+        # Color code by shift
+        header_styles = []
+        for col_idx in range(1, len(headers) + 1):
             if col_idx <= 3:  # LRU, Test, Rack Location
-                cell.fill = PatternFill(start_color=ExcelColors.HEADER_BLUE, 
-                                       end_color=ExcelColors.HEADER_BLUE, fill_type="solid")
+                header_styles.append('fc_header_lru')
             elif col_idx <= 9:  # 1st Shift columns (6:00am - 6:00pm)
-                cell.fill = PatternFill(start_color=ExcelColors.SHIFT1_HEADER, 
-                                       end_color=ExcelColors.SHIFT1_HEADER, fill_type="solid")
+                header_styles.append('fc_header_shift1')
             elif col_idx <= 12:  # 2nd Shift columns (6:00pm - 6:00am)
-                cell.fill = PatternFill(start_color=ExcelColors.SHIFT2_HEADER, 
-                                       end_color=ExcelColors.SHIFT2_HEADER, fill_type="solid")
+                header_styles.append('fc_header_shift2')
             else:  # Total, Status
-                cell.fill = PatternFill(start_color=ExcelColors.INFO, 
-                                       end_color=ExcelColors.INFO, fill_type="solid")
-            
-            cell.border = Border(
-                left=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                right=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                top=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                bottom=Side(style='medium', color=ExcelColors.WHITE)
-            )
+                header_styles.append('fc_header_summary')
+        styles.apply_row(ws, current_row, header_styles)
         
         ws.row_dimensions[current_row].height = 30
         current_row += 1
@@ -193,12 +168,18 @@ class FCScheduleManager:
                 'data': station_data
             })
         
+        # Light background for 1st shift, slightly darker for 2nd shift
+        slot_styles = ['fc_slot_1st' if col_idx <= 9 else 'fc_slot_2nd'
+                       for col_idx in range(4, len(ALL_TIME_SLOTS) + 4)]
+        total_col = len(ALL_TIME_SLOTS) + 4
+        start_col = get_column_letter(4)
+        end_col = get_column_letter(total_col - 1)
+        
         # Add data rows
         for lru_name in sorted(lru_groups.keys()):
             stations_list = lru_groups[lru_name]
             
             for station_info in stations_list:
-                station_name = station_info['station_name']
                 location = station_info['location']
                 data = station_info['data']
                 
@@ -206,91 +187,22 @@ class FCScheduleManager:
                 test_desc = data.test_description or \
                            f"Current: {data.current} (Min: {data.min_lru}, Max: {data.max_lru})"
                 
-                # LRU Name
-                lru_cell = ws.cell(current_row, 1)
-                lru_cell.value = lru_name
-                lru_cell.font = Font(size=11, bold=True, name='Calibri')
-                lru_cell.alignment = Alignment(horizontal='left', vertical='center')
-                lru_cell.fill = PatternFill(start_color=ExcelColors.LIGHT_BLUE, 
-                                           end_color=ExcelColors.LIGHT_BLUE, fill_type="solid")
-                
-                # Test Description
-                test_cell = ws.cell(current_row, 2)
-                test_cell.value = test_desc
-                test_cell.font = Font(size=10, name='Calibri')
-                test_cell.alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
-                
-                # Rack Location
-                loc_cell = ws.cell(current_row, 3)
-                loc_cell.value = location
-                loc_cell.font = Font(size=10, name='Calibri')
-                loc_cell.alignment = Alignment(horizontal='center', vertical='center')
-                
                 # Get time slot data
-                time_slot_data = self._get_time_slot_data(data)
+                time_slot_data = self._get_time_slot_data(data, window)
+                slot_values = [time_slot_data.get(time_slot, '') for time_slot in ALL_TIME_SLOTS]
                 
-                # Add time slot columns with conditional formatting
-                total_batches = 0
-                for col_idx, time_slot in enumerate(ALL_TIME_SLOTS, 4):
-                    cell = ws.cell(current_row, col_idx)
-                    value = time_slot_data.get(time_slot, '')
-                    cell.value = value if value else ''
-                    cell.font = Font(size=11, name='Calibri')
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                    cell.number_format = '0'  # Whole numbers only
-                    
-                    # Light background for 1st shift, slightly darker for 2nd shift
-                    if col_idx <= 9:  # 1st Shift
-                        cell.fill = PatternFill(start_color='FFFFFF', end_color='FFFFFF', fill_type="solid")
-                    else:  # 2nd Shift
-                        cell.fill = PatternFill(start_color='F8F9FA', end_color='F8F9FA', fill_type="solid")
-                    
-                    # Add to total if numeric
-                    try:
-                        if value:
-                            total_batches += int(value)
-                    except:
-                        pass
-                
-                # Total column with formula
-                total_col = len(ALL_TIME_SLOTS) + 4
-                total_cell = ws.cell(current_row, total_col)
-                # Create SUM formula for the time slot columns
-                start_col = get_column_letter(4)
-                end_col = get_column_letter(total_col - 1)
-                total_cell.value = f"=SUM({start_col}{current_row}:{end_col}{current_row})"
-                total_cell.font = Font(size=11, bold=True, name='Calibri')
-                total_cell.alignment = Alignment(horizontal='center', vertical='center')
-                total_cell.fill = PatternFill(start_color=ExcelColors.LIGHT_GREEN, 
-                                             end_color=ExcelColors.LIGHT_GREEN, fill_type="solid")
-                
-                # Status column (based on current vs min/max)
-                status_cell = ws.cell(current_row, total_col + 1)
+                # Total column with a SUM formula over the time slot columns,
+                # then status (based on current vs min/max)
                 current_status = data.get_status()
-                status_cell.value = current_status
-                status_cell.font = Font(size=10, bold=True, color=ExcelColors.WHITE, name='Calibri')
-                status_cell.alignment = Alignment(horizontal='center', vertical='center')
-                
-                # Color code status
-                if current_status == "Critical":
-                    status_cell.fill = PatternFill(start_color=ExcelColors.CRITICAL, 
-                                                  end_color=ExcelColors.CRITICAL, fill_type="solid")
-                elif current_status == "Warning":
-                    status_cell.fill = PatternFill(start_color=ExcelColors.WARNING, 
-                                                  end_color=ExcelColors.WARNING, fill_type="solid")
-                else:  # Good
-                    status_cell.fill = PatternFill(start_color=ExcelColors.SUCCESS, 
-                                                  end_color=ExcelColors.SUCCESS, fill_type="solid")
+                status_style = {"Critical": 'fc_status_critical',
+                                "Warning": 'fc_status_warning'}.get(current_status, 'fc_status_success')
                 
-                # Apply borders to all cells in row
-                for col_idx in range(1, total_col + 2):
-                    cell = ws.cell(current_row, col_idx)
-                    cell.border = Border(
-                        left=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                        right=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                        top=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                        bottom=Side(style='thin', color=ExcelColors.BORDER_COLOR)
-                    )
+                row_values = [lru_name, test_desc, location] + slot_values + [
+                    f"=SUM({start_col}{current_row}:{end_col}{current_row})", current_status]
+                for col_idx, value in enumerate(row_values, 1):
+                    ws.cell(current_row, col_idx).value = value
+                styles.apply_row(ws, current_row, ['fc_lru', 'fc_test', 'fc_location'] +
+                                 slot_styles + ['fc_total', status_style])
                 
                 ws.row_dimensions[current_row].height = 25
                 current_row += 1
@@ -302,9 +214,7 @@ class FCScheduleManager:
         ws.merge_cells(f'A{current_row}:C{current_row}')
         summary_cell = ws[f'A{current_row}']
         summary_cell.value = "📊 Total Batches per Time Slot:"
-        summary_cell.font = Font(size=11, bold=True, color=ExcelColors.TEXT_DARK, name='Calibri')
-        summary_cell.alignment = Alignment(horizontal='right', vertical='center')
-        summary_cell.fill = PatternFill(start_color=ExcelColors.INFO, end_color=ExcelColors.INFO, fill_type="solid")
+        styles.apply(summary_cell, 'fc_summary_label')
         
         # Calculate column totals
         for col_idx in range(4, len(ALL_TIME_SLOTS) + 5):  # +4 for initial columns, +1 for Total column
@@ -312,15 +222,7 @@ class FCScheduleManager:
             col_letter = get_column_letter(col_idx)
             # Sum from row 5 (first data row) to current_row - 1
             cell.value = f"=SUM({col_letter}5:{col_letter}{current_row - 1})"
-            cell.font = Font(size=11, bold=True, color=ExcelColors.WHITE, name='Calibri')
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.fill = PatternFill(start_color=ExcelColors.INFO, end_color=ExcelColors.INFO, fill_type="solid")
-            cell.border = Border(
-                left=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                right=Side(style='thin', color=ExcelColors.BORDER_COLOR),
-                top=Side(style='medium', color=ExcelColors.TEXT_DARK),
-                bottom=Side(style='medium', color=ExcelColors.TEXT_DARK)
-            )
+            styles.apply(cell, 'fc_summary_total')
         
         ws.row_dimensions[current_row].height = 30
         
@@ -348,7 +250,8 @@ class FCScheduleManager:
         wb.save(filename)
         logger.info(f"Exported professional FC schedule to Excel: {filename}")
     
-    def _export_to_csv_legacy(self, filename: str, stations: Dict[str, Station]) -> None:
+    def _export_to_csv_legacy(self, filename: str, stations: Dict[str, Station],
+                              window: Optional[Tuple[int, int]] = None) -> None:
         """Export stations in legacy CSV format (kept for backward compatibility)."""
         # Group stations by LRU name
         lru_groups = defaultdict(list)
@@ -392,7 +295,7 @@ class FCScheduleManager:
                 row = [lru_name, test_desc, location]
                 
                 # Add time slot data
-                time_slot_data = self._get_time_slot_data(data)
+                time_slot_data = self._get_time_slot_data(data, window)
                 for time_slot in ALL_TIME_SLOTS:
                     row.append(time_slot_data.get(time_slot, ''))
                 
@@ -407,24 +310,8 @@ class FCScheduleManager:
         
         logger.info(f"Exported FC schedule to: {filename}")
     
-    def _get_time_slot_data(self, station: Station) -> Dict[str, str]:
-        """Extract time slot data from station history."""
-        result = {}
-        
-        for time_slot, (start_hour, end_hour) in TIME_SLOT_MAP.items():
-            latest_value = None
-            
-            for entry in station.history:
-                try:
-                    dt = datetime.strptime(entry.timestamp, TIMESTAMP_FORMAT)
-                    hour = dt.hour
-                    
-                    if start_hour <= hour < end_hour:
-                        latest_value = entry.count
-                except:
-                    continue
-            
-            if latest_value is not None:
-                result[time_slot] = str(latest_value)
-        
-        return result
+    def _get_time_slot_data(self, station: Station,
+                            window: Optional[Tuple[int, int]] = None) -> Dict[str, str]:
+        """Extract time slot data from station history in a single pass."""
+        start, end = window if window else (None, None)
+        return self.bucketer.bucket(station, start, end)
@@ -2,18 +2,133 @@
 
 Allows multiple users to share the same data file via GitHub repository.
 Use case: Computer A does morning walk, Computer B continues afternoon walk.
+
+By default data is stored sharded (see sync_shards.py) so a push or pull
+only transfers the files that changed since the other side last synced.
+
+All requests share one keep-alive connection. GETs are conditional
+(ETag / If-None-Match): an unchanged file answers 304 with no body,
+which GitHub doesn't count against the rate limit.
 """
+import os
 import json
 import base64
-import urllib.request
-import urllib.error
-from typing import Dict, Optional, Tuple
+import http.client
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
 from datetime import datetime
 from pathlib import Path
+from sync_shards import (MANIFEST_NAME, blob_sha, encode, split_data, join_shards,
+                         build_manifest, manifest_files, diff_manifests,
+                         keep_segments_before)
+from sync_merge import SINCE
+from history_archive import split_closed
 from logger import get_logger
 
 logger = get_logger(__name__)
 
+# Last-synced document, stored next to the shard cache
+BASE_NAME = "base.json"
+
+
+class GitHubHTTPError(Exception):
+    """Non-success HTTP status from the GitHub API."""
+    
+    def __init__(self, code: int, reason: str, body: str = "",
+                 headers: Optional[Dict[str, str]] = None):
+        super().__init__(f"{code} {reason}")
+        self.code = code
+        self.reason = reason
+        self.body = body
+        self.headers = headers or {}
+    
+    @property
+    def rate_limited(self) -> bool:
+        return self.code == 429 or (self.code == 403 and (
+            self.headers.get('x-ratelimit-remaining') == '0' or 'retry-after' in self.headers))
+    
+    def retry_after(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds GitHub asked us to wait (rate limits), or None."""
+        if not self.rate_limited:
+            return None
+        try:
+            if 'retry-after' in self.headers:
+                return max(0.0, float(self.headers['retry-after']))
+            if 'x-ratelimit-reset' in self.headers:
+                now = time.time() if now is None else now
+                return max(0.0, float(self.headers['x-ratelimit-reset']) - now)
+        except ValueError:
+            pass
+        return None
+
+
+class APIConnection:
+    """Persistent HTTP(S) connection to one API host.
+    
+    Requests are serialized with a lock, so the manager can be used from
+    a background thread as well as the UI thread.
+    """
+    
+    def __init__(self, base_url: str, timeout: int = 15):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.netloc
+        self.timeout = timeout
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+    
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            cls = (http.client.HTTPSConnection if self.scheme == 'https'
+                   else http.client.HTTPConnection)
+            self._conn = cls(self.host, timeout=self.timeout)
+            self.connections_opened += 1
+        return self._conn
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def request(self, method: str, url: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None
+                ) -> Tuple[int, str, Dict[str, str], bytes]:
+        """Send a request; returns (status, reason, headers, body)."""
+        parts = urlsplit(url)
+        target = parts.path + (f"?{parts.query}" if parts.query else "")
+        headers = dict(headers or {})
+        with self._lock:
+            # A kept-alive connection may have been closed by the server
+            # while idle; that shows up on first use, so retry once fresh
+            for attempt in (1, 2):
+                reused = self._conn is not None
+                conn = self._connect()
+                try:
+                    conn.request(method, target, body=body, headers=headers)
+                    response = conn.getresponse()
+                    data = response.read()
+                except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                        ConnectionResetError, BrokenPipeError):
+                    conn.close()
+                    self._conn = None
+                    if not reused or attempt == 2:
+                        raise
+                    continue
+                except Exception:
+                    conn.close()
+                    self._conn = None
+                    raise
+                if response.will_close:
+                    conn.close()
+                    self._conn = None
+                return (response.status, response.reason,
+                        {k.lower(): v for k, v in response.getheaders()}, data)
+        raise AssertionError("unreachable")
+
 
 class GitHubSyncManager:
     """Manages syncing LRU data with GitHub repository."""
@@ -22,24 +137,51 @@ class GitHubSyncManager:
                  repo_owner: str,
                  repo_name: str,
                  data_file_path: str = "shared_data/lru_data.json",
-                 branch: str = "main"):
+                 branch: str = "main",
+                 sharded: bool = False,
+                 cache_dir: Optional[str] = None,
+                 api_base: Optional[str] = None):
         """
         Initialize GitHub sync manager.
         
         Args:
             repo_owner: GitHub username/organization (e.g., "HaltTheGrey")
             repo_name: Repository name (e.g., "lru-shared-data")
-            data_file_path: Path to data file in repo (e.g., "shared_data/lru_data.json")
+            data_file_path: Path to data file in repo (e.g., "shared_data/lru_data.json");
+                sharded data goes in a directory of the same name without ".json"
             branch: Branch name (default "main")
+            sharded: Use the sharded layout (default False = one JSON
+                document). Every computer sharing the repo has to switch
+                together: a sharded client still reads the single document
+                when there is no manifest, but only pushes shards.
+            cache_dir: Directory for downloaded shards, so later pulls
+                only fetch what changed (default: memory only)
+            api_base: Repository API URL (default: api.github.com)
         """
-        self.repo_owner = repo_owner
-        self.repo_name = repo_name
-        self.data_file_path = data_file_path
-        self.branch = branch
+        self.sharded = sharded
+        self.cache_dir = cache_dir
+        self._custom_api_base = api_base
+        self._connection: Optional[APIConnection] = None
         
-        # GitHub API endpoints
-        self.api_base = f"https://api.github.com/repos/{repo_owner}/{repo_name}"
-        self.file_url = f"{self.api_base}/contents/{data_file_path}"
+        # url -> (ETag, decoded JSON) of the last successful GET
+        self._etag_cache: Dict[str, Tuple[str, Dict]] = {}
+        # url -> blob SHA last seen for a file, reused as the PUT base
+        self._known_sha: Dict[str, str] = {}
+        # Requests made / answered 304 (diagnostics)
+        self.request_count = 0
+        self.not_modified_count = 0
+        
+        self.set_location(repo_owner, repo_name, data_file_path, branch)
+        
+        # Shard contents by git blob SHA from the last sync
+        self._shard_cache: Dict[str, bytes] = {}
+        
+        # Document as of the last sync, the base for merging (see sync_merge);
+        # kept on disk when there is a cache dir
+        self._base: Optional[Dict] = None
+        
+        # Files sent/received by the last push/pull
+        self.last_transfer: Dict[str, int] = {}
         
         # Authentication token (optional but recommended for private repos)
         self.token: Optional[str] = None
@@ -48,6 +190,35 @@ class GitHubSyncManager:
         self.last_sha: Optional[str] = None
         self.last_sync_time: Optional[datetime] = None
     
+    def set_location(self, repo_owner: str, repo_name: str, data_file_path: str,
+                     branch: str) -> None:
+        """Point the manager at a repository/path and rebuild the API URLs."""
+        moved = self._connection is not None and (
+            (repo_owner, repo_name, data_file_path, branch) !=
+            (self.repo_owner, self.repo_name, self.data_file_path, self.branch))
+        self.repo_owner = repo_owner
+        self.repo_name = repo_name
+        self.data_file_path = data_file_path
+        self.branch = branch
+        
+        # GitHub API endpoints
+        self.api_base = (self._custom_api_base or
+                         f"https://api.github.com/repos/{repo_owner}/{repo_name}")
+        self.file_url = f"{self.api_base}/contents/{data_file_path}"
+        self.shard_root = os.path.splitext(data_file_path)[0]
+        self.manifest_url = self._contents_url(MANIFEST_NAME)
+        
+        # Cached state belongs to the old location
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = APIConnection(self.api_base)
+        self._etag_cache.clear()
+        self._known_sha.clear()
+        if moved:
+            # A base from another repository would make its data look
+            # deleted on the next merge
+            self.remember_base(None)
+    
     def set_token(self, token: str) -> None:
         """Set GitHub personal access token for authentication."""
         self.token = token
@@ -63,39 +234,37 @@ class GitHubSyncManager:
             remote_info: Dict with file metadata if available
         """
         try:
-            # Get file metadata from GitHub
-            request = urllib.request.Request(self.file_url)
-            request.add_header('Accept', 'application/vnd.github.v3+json')
-            if self.token:
-                request.add_header('Authorization', f'token {self.token}')
+            # Get file metadata from GitHub (the manifest when sharded,
+            # falling back to a not yet migrated single document). Usually
+            # a body-less 304, and it leaves the SHA for a following push.
+            remote_info = self._get_json(self.manifest_url if self.sharded else self.file_url)
+            if remote_info is None and self.sharded:
+                remote_info = self._get_json(self.file_url)
             
-            with urllib.request.urlopen(request, timeout=10) as response:
-                remote_info = json.loads(response.read().decode())
-                
-                remote_sha = remote_info.get('sha')
-                
-                # If we have no last_sha, this is first sync - consider it changed
-                if self.last_sha is None:
-                    logger.info("No previous sync - remote file exists")
-                    return True, remote_info
-                
-                # Check if SHA changed (file was modified)
-                has_changes = (remote_sha != self.last_sha)
-                
-                if has_changes:
-                    logger.info(f"Remote file changed (SHA: {remote_sha[:8]}...)")
-                else:
-                    logger.debug("Remote file unchanged")
-                
-                return has_changes, remote_info
-                
-        except urllib.error.HTTPError as e:
-            if e.code == 404:
+            if remote_info is None:
                 logger.warning("Remote file not found (first push needed)")
                 return False, None
+            
+            remote_sha = remote_info.get('sha')
+            
+            # If we have no last_sha, this is first sync - consider it changed
+            if self.last_sha is None:
+                logger.info("No previous sync - remote file exists")
+                return True, remote_info
+            
+            # Check if SHA changed (file was modified)
+            has_changes = (remote_sha != self.last_sha)
+            
+            if has_changes:
+                logger.info(f"Remote file changed (SHA: {remote_sha[:8]}...)")
             else:
-                logger.error(f"HTTP error checking remote: {e.code} - {e.reason}")
-                raise Exception(f"Failed to check remote: {e.code} {e.reason}")
+                logger.debug("Remote file unchanged")
+            
+            return has_changes, remote_info
+                
+        except GitHubHTTPError as e:
+            logger.error(f"HTTP error checking remote: {e.code} - {e.reason}")
+            raise Exception(f"Failed to check remote: {e.code} {e.reason}") from e
         except Exception as e:
             logger.error(f"Error checking remote changes: {e}")
             raise
@@ -107,43 +276,42 @@ class GitHubSyncManager:
         Returns:
             Dict with stations and history data, or None if file doesn't exist
         """
+        if self.sharded:
+            return self._pull_sharded()
+        return self._pull_document()
+    
+    def _pull_document(self) -> Optional[Dict]:
+        """Download the single-document layout."""
         try:
             logger.info(f"Pulling from GitHub: {self.repo_owner}/{self.repo_name}/{self.data_file_path}")
             
             # Get file from GitHub
-            request = urllib.request.Request(self.file_url)
-            request.add_header('Accept', 'application/vnd.github.v3+json')
-            if self.token:
-                request.add_header('Authorization', f'token {self.token}')
-            
-            with urllib.request.urlopen(request, timeout=10) as response:
-                file_info = json.loads(response.read().decode())
-                
-                # Decode base64 content
-                content_base64 = file_info['content']
-                content_bytes = base64.b64decode(content_base64)
-                content_text = content_bytes.decode('utf-8')
-                
-                # Parse JSON data
-                data = json.loads(content_text)
-                
-                # Update tracking
-                self.last_sha = file_info['sha']
-                self.last_sync_time = datetime.now()
-                
-                sha_display = self.last_sha[:8] + "..." if self.last_sha else "unknown"
-                logger.info(f"✅ Pulled successfully (SHA: {sha_display})")
-                logger.info(f"Stations: {len(data.get('stations', {}))}, History: {len(data.get('history', []))}")
-                
-                return data
-                
-        except urllib.error.HTTPError as e:
-            if e.code == 404:
+            file_info = self._get_json(self.file_url)
+            if file_info is None:
                 logger.warning("Remote file not found - needs initial push")
                 return None
-            else:
-                logger.error(f"HTTP error pulling from GitHub: {e.code} - {e.reason}")
-                raise Exception(f"Pull failed: {e.code} {e.reason}")
+            
+            # Decode base64 content
+            content_base64 = file_info['content']
+            content_bytes = base64.b64decode(content_base64)
+            content_text = content_bytes.decode('utf-8')
+            
+            # Parse JSON data
+            data = json.loads(content_text)
+            
+            # Update tracking
+            self.last_sha = file_info['sha']
+            self.last_sync_time = datetime.now()
+            
+            sha_display = self.last_sha[:8] + "..." if self.last_sha else "unknown"
+            logger.info(f"✅ Pulled successfully (SHA: {sha_display})")
+            logger.info(f"Stations: {len(data.get('stations', {}))}, History: {len(data.get('history', []))}")
+            
+            return data
+                
+        except GitHubHTTPError as e:
+            logger.error(f"HTTP error pulling from GitHub: {e.code} - {e.reason}")
+            raise Exception(f"Pull failed: {e.code} {e.reason}") from e
         except Exception as e:
             logger.error(f"Error pulling from GitHub: {e}")
             raise
@@ -153,82 +321,320 @@ class GitHubSyncManager:
         Upload data file to GitHub.
         
         Args:
-            data: Dict with stations and history data
+            data: Dict with stations and history data. With a SINCE
+                timestamp it only covers history from then on; older
+                history on the remote is kept as it is.
             commit_message: Optional custom commit message
             
         Returns:
             True if successful, False otherwise
         """
+        # Default commit message with timestamp and computer name
+        if commit_message is None:
+            import platform
+            computer = platform.node()
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            commit_message = f"Updated by {computer} at {timestamp}"
+        
+        if self.sharded:
+            return self._push_sharded(data, commit_message)
+        return self._push_document(data, commit_message)
+    
+    def _push_document(self, data: Dict, commit_message: str) -> bool:
+        """Upload everything as the single-document layout."""
         try:
-            # Default commit message with timestamp and computer name
-            if commit_message is None:
-                import platform
-                computer = platform.node()
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                commit_message = f"Updated by {computer} at {timestamp}"
-            
             logger.info(f"Pushing to GitHub: {self.repo_owner}/{self.repo_name}/{self.data_file_path}")
             
+            # SHA needed for updates: known from the last check/pull/push,
+            # otherwise a (usually 304) conditional GET. Data covering only
+            # recent history also needs the remote's older history.
+            since = data.get(SINCE)
+            document = data
+            file_sha = self._known_sha.get(self.file_url)
+            if file_sha is None or since:
+                existing_file = self._get_json(self.file_url)
+                file_sha = existing_file['sha'] if existing_file else None
+                if since:
+                    document = self._with_older_history(data, since, existing_file)
+            
             # Convert data to JSON
-            content_text = json.dumps(data, indent=2)
-            content_bytes = content_text.encode('utf-8')
-            content_base64 = base64.b64encode(content_bytes).decode('utf-8')
+            content_bytes = json.dumps(document, separators=(',', ':')).encode('utf-8')
             
-            # Check if file exists (need SHA for updates)
-            try:
-                request = urllib.request.Request(self.file_url)
-                request.add_header('Accept', 'application/vnd.github.v3+json')
-                if self.token:
-                    request.add_header('Authorization', f'token {self.token}')
+            # Update tracking
+            self.last_sha = self._put_file(self.file_url, content_bytes, file_sha, commit_message)
+            self.last_sync_time = datetime.now()
+            self.remember_base(data)
+            
+            sha_display = self.last_sha[:8] + "..." if self.last_sha else "unknown"
+            logger.info(f"✅ Pushed successfully (SHA: {sha_display})")
+            return True
                 
-                with urllib.request.urlopen(request, timeout=10) as response:
-                    existing_file = json.loads(response.read().decode())
-                    file_sha = existing_file['sha']
-                    logger.debug(f"File exists, SHA: {file_sha[:8]}...")
-            except urllib.error.HTTPError as e:
-                if e.code == 404:
-                    file_sha = None  # File doesn't exist yet
-                    logger.debug("File doesn't exist, will create new")
-                else:
-                    raise
+        except GitHubHTTPError as e:
+            error_body = e.body or "No details"
+            logger.error(f"HTTP error pushing to GitHub: {e.code} - {e.reason}")
+            logger.error(f"Error details: {error_body}")
+            raise Exception(f"Push failed: {e.code} {e.reason}\n{error_body}") from e
+        except Exception as e:
+            logger.error(f"Error pushing to GitHub: {e}")
+            raise
+    
+    @staticmethod
+    def _with_older_history(data: Dict, since: str, remote_info: Optional[Dict]) -> Dict:
+        """data without SINCE, plus the remote document's history before since."""
+        document = {key: value for key, value in data.items() if key != SINCE}
+        if remote_info is None:
+            return document
+        remote = json.loads(base64.b64decode(remote_info['content']))
+        _, station_history, closed = split_closed(remote, since)
+        document['stations'] = {
+            name: dict(station, history=station_history.get(name, []) + station.get('history', []))
+            for name, station in data.get('stations', {}).items()}
+        document['history'] = closed + data.get('history', [])
+        return document
+    
+    # ====================
+    # Sharded layout
+    # ====================
+    
+    def _contents_url(self, path: str) -> str:
+        return f"{self.api_base}/contents/{self.shard_root}/{path}"
+    
+    def _open(self, url: str, method: str = 'GET', body: Optional[Dict] = None,
+              headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], Dict]:
+        """Make an API request; returns (status, headers, decoded JSON).
+        
+        Raises GitHubHTTPError for 4xx/5xx responses.
+        """
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request_headers = {'Accept': 'application/vnd.github.v3+json',
+                           'User-Agent': 'lru-tracker'}
+        if data is not None:
+            request_headers['Content-Type'] = 'application/json'
+        if self.token:
+            request_headers['Authorization'] = f'token {self.token}'
+        request_headers.update(headers or {})
+        
+        self.request_count += 1
+        status, reason, response_headers, raw = self._connection.request(
+            method, url, data, request_headers)
+        if status >= 400:
+            raise GitHubHTTPError(status, reason, raw.decode('utf-8', 'replace'), response_headers)
+        return status, response_headers, json.loads(raw) if raw else {}
+    
+    def _get_json(self, url: str) -> Optional[Dict]:
+        """Conditional GET of a contents URL; None if it doesn't exist."""
+        cached = self._etag_cache.get(url)
+        headers = {'If-None-Match': cached[0]} if cached else None
+        try:
+            status, response_headers, info = self._open(f"{url}?ref={self.branch}",
+                                                        headers=headers)
+        except GitHubHTTPError as e:
+            if e.code == 404:
+                self._etag_cache.pop(url, None)
+                self._known_sha.pop(url, None)
+                return None
+            raise
+        
+        if status == 304 and cached:
+            self.not_modified_count += 1
+            info = cached[1]
+        elif response_headers.get('etag'):
+            self._etag_cache[url] = (response_headers['etag'], info)
+        if 'sha' in info:
+            self._known_sha[url] = info['sha']
+        return info
+    
+    def _get_file(self, url: str) -> Optional[Tuple[bytes, str]]:
+        """Download a file as (content, sha); None if it doesn't exist."""
+        info = self._get_json(url)
+        if info is None:
+            return None
+        return base64.b64decode(info['content']), info['sha']
+    
+    def _put_file(self, url: str, content: bytes, sha: Optional[str], message: str) -> str:
+        """Create or update a file; returns its new sha."""
+        body = {
+            "message": message,
+            "content": base64.b64encode(content).decode('ascii'),
+            "branch": self.branch
+        }
+        if sha:
+            body["sha"] = sha
+        try:
+            _, _, result = self._open(url, 'PUT', body)
+        except GitHubHTTPError as e:
+            # 409/422: the sha we had is stale (e.g. an interrupted push or
+            # a push from another computer). Learn the current one and retry once.
+            if e.code not in (409, 422):
+                raise
+            current = self._get_json(url)
+            if current is None or current.get('sha') == sha:
+                raise
+            body["sha"] = current['sha']
+            _, _, result = self._open(url, 'PUT', body)
+        
+        new_sha = result['content']['sha']
+        self._known_sha[url] = new_sha
+        self._etag_cache.pop(url, None)
+        return new_sha
+    
+    def _delete_file(self, url: str, sha: str, message: str) -> None:
+        self._open(url, 'DELETE', {"message": message, "sha": sha, "branch": self.branch})
+        self._known_sha.pop(url, None)
+        self._etag_cache.pop(url, None)
+    
+    def _cached_shard(self, sha: str) -> Optional[bytes]:
+        content = self._shard_cache.get(sha)
+        if content is None and self.cache_dir:
+            path = os.path.join(self.cache_dir, sha)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    content = f.read()
+        return content
+    
+    def _store_shards(self, shards: Dict[str, bytes], keep: Iterable[str] = ()) -> None:
+        """Remember shard contents by sha; only the current set (plus the
+        already cached shas in keep) is kept."""
+        kept = {sha: self._shard_cache[sha] for sha in keep if sha in self._shard_cache}
+        self._shard_cache = {blob_sha(content): content for content in shards.values()}
+        self._shard_cache.update(kept)
+        keep = set(keep)
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for sha, content in self._shard_cache.items():
+                path = os.path.join(self.cache_dir, sha)
+                if not os.path.exists(path):
+                    with open(path, 'wb') as f:
+                        f.write(content)
+            for name in os.listdir(self.cache_dir):
+                if name not in self._shard_cache and name not in keep and name != BASE_NAME:
+                    os.remove(os.path.join(self.cache_dir, name))
+        except OSError as e:
+            logger.warning(f"Could not update sync cache: {e}")
+    
+    def synced_base(self) -> Optional[Dict]:
+        """The data as of the last push or merged pull (None if never)."""
+        if self._base is None and self.cache_dir:
+            path = os.path.join(self.cache_dir, BASE_NAME)
+            try:
+                with open(path, 'rb') as f:
+                    self._base = json.loads(f.read())
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read sync base, merging without one: {e}")
+        return self._base
+    
+    def remember_base(self, data: Optional[Dict]) -> None:
+        """Record data as the base for the next merge.
+        
+        Pushes do this themselves. A pull doesn't: the caller does it
+        once the pulled data has been merged, since merging needs the
+        base from before the pull.
+        """
+        self._base = data
+        if not self.cache_dir:
+            return
+        path = os.path.join(self.cache_dir, BASE_NAME)
+        try:
+            if data is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + ".tmp", 'wb') as f:
+                f.write(encode(data))
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.warning(f"Could not save sync base: {e}")
+    
+    def _pull_sharded(self) -> Optional[Dict]:
+        """Download the manifest and the shards not already cached."""
+        try:
+            logger.info(f"Pulling from GitHub: {self.repo_owner}/{self.repo_name}/{self.shard_root}")
+            remote = self._get_file(self.manifest_url)
+            if remote is None:
+                logger.info("No sharded data on remote - trying single file")
+                return self._pull_document()
+            manifest_bytes, manifest_sha = remote
+            manifest = json.loads(manifest_bytes)
             
-            # Prepare request body
-            body = {
-                "message": commit_message,
-                "content": content_base64,
-                "branch": self.branch
-            }
+            shards: Dict[str, bytes] = {}
+            downloaded: List[str] = []
+            for path, sha in manifest_files(manifest).items():
+                content = self._cached_shard(sha)
+                if content is None:
+                    fetched = self._get_file(self._contents_url(path))
+                    if fetched is None or blob_sha(fetched[0]) != sha:
+                        raise Exception(f"Shard {path} does not match the manifest "
+                                        "(push in progress?) - try again")
+                    content = fetched[0]
+                    downloaded.append(path)
+                shards[path] = content
             
-            if file_sha:
-                body["sha"] = file_sha  # Required for updates
+            data = join_shards(shards)
+            self._store_shards(shards)
+            self.last_sha = manifest_sha
+            self.last_sync_time = datetime.now()
+            self.last_transfer = {'files': len(downloaded),
+                                  'bytes': sum(len(shards[p]) for p in downloaded)}
+            logger.info(f"✅ Pulled {len(downloaded)} of {len(shards)} files "
+                        f"(manifest {manifest_sha[:8]}...)")
+            return data
+        
+        except GitHubHTTPError as e:
+            logger.error(f"HTTP error pulling from GitHub: {e.code} - {e.reason}")
+            raise Exception(f"Pull failed: {e.code} {e.reason}") from e
+        except Exception as e:
+            logger.error(f"Error pulling from GitHub: {e}")
+            raise
+    
+    def _push_sharded(self, data: Dict, commit_message: str) -> bool:
+        """Upload the shards that differ from the remote manifest, then the manifest."""
+        try:
+            logger.info(f"Pushing to GitHub: {self.repo_owner}/{self.repo_name}/{self.shard_root}")
+            shards = split_data(data)
+            manifest = build_manifest(shards)
             
-            # Push to GitHub
-            request = urllib.request.Request(
-                self.file_url,
-                data=json.dumps(body).encode('utf-8'),
-                method='PUT'
-            )
-            request.add_header('Accept', 'application/vnd.github.v3+json')
-            request.add_header('Content-Type', 'application/json')
-            if self.token:
-                request.add_header('Authorization', f'token {self.token}')
+            remote = self._get_file(self.manifest_url)
+            remote_manifest = json.loads(remote[0]) if remote else None
+            remote_files = manifest_files(remote_manifest)
+            kept = []
+            if data.get(SINCE):
+                kept = keep_segments_before(manifest, remote_manifest, data[SINCE])
+            upload, delete = diff_manifests(manifest, remote_manifest)
             
-            with urllib.request.urlopen(request, timeout=15) as response:
-                result = json.loads(response.read().decode())
-                
-                # Update tracking
-                self.last_sha = result['content']['sha']
-                self.last_sync_time = datetime.now()
-                
-                sha_display = self.last_sha[:8] + "..." if self.last_sha else "unknown"
-                logger.info(f"✅ Pushed successfully (SHA: {sha_display})")
-                return True
-                
-        except urllib.error.HTTPError as e:
-            error_body = e.read().decode() if e.fp else "No details"
+            # Segments before the manifest: a reader never sees a manifest
+            # pointing at content that isn't there yet
+            for path in upload:
+                self._put_file(self._contents_url(path), shards[path],
+                               remote_files.get(path), commit_message)
+            for path in delete:
+                self._delete_file(self._contents_url(path), remote_files[path], commit_message)
+            
+            if remote is None or upload or delete:
+                manifest_sha = self._put_file(self.manifest_url, encode(manifest),
+                                              remote[1] if remote else None, commit_message)
+            else:
+                manifest_sha = remote[1]
+            
+            self._store_shards(shards, keep=[remote_files[path] for path in kept])
+            self.remember_base(data)
+            self.last_sha = manifest_sha
+            self.last_sync_time = datetime.now()
+            self.last_transfer = {'files': len(upload),
+                                  'bytes': sum(len(shards[p]) for p in upload)}
+            logger.info(f"✅ Pushed {len(upload)} of {len(shards)} files "
+                        f"(manifest {manifest_sha[:8]}...)")
+            return True
+        
+        except GitHubHTTPError as e:
+            error_body = e.body or "No details"
             logger.error(f"HTTP error pushing to GitHub: {e.code} - {e.reason}")
             logger.error(f"Error details: {error_body}")
-            raise Exception(f"Push failed: {e.code} {e.reason}\n{error_body}")
+            raise Exception(f"Push failed: {e.code} {e.reason}\n{error_body}") from e
         except Exception as e:
             logger.error(f"Error pushing to GitHub: {e}")
             raise
@@ -237,7 +643,7 @@ class GitHubSyncManager:
         """Get current sync status information."""
         return {
             "repo": f"{self.repo_owner}/{self.repo_name}",
-            "file_path": self.data_file_path,
+            "file_path": self.shard_root + "/" if self.sharded else self.data_file_path,
             "branch": self.branch,
             "last_sha": self.last_sha[:8] + "..." if self.last_sha else "Never synced",
             "last_sync": self.last_sync_time.strftime("%Y-%m-%d %H:%M:%S") if self.last_sync_time else "Never",
@@ -253,21 +659,15 @@ class GitHubSyncManager:
         """
         try:
             # Try to access repository
-            request = urllib.request.Request(self.api_base)
-            request.add_header('Accept', 'application/vnd.github.v3+json')
-            if self.token:
-                request.add_header('Authorization', f'token {self.token}')
+            _, _, repo_info = self._open(self.api_base)
+            repo_name = repo_info.get('name', 'Unknown')
+            is_private = repo_info.get('private', False)
             
-            with urllib.request.urlopen(request, timeout=10) as response:
-                repo_info = json.loads(response.read().decode())
-                repo_name = repo_info.get('name', 'Unknown')
-                is_private = repo_info.get('private', False)
-                
-                message = f"✅ Connected to '{repo_name}' ({'Private' if is_private else 'Public'})"
-                logger.info(message)
-                return True, message
+            message = f"✅ Connected to '{repo_name}' ({'Private' if is_private else 'Public'})"
+            logger.info(message)
+            return True, message
                 
-        except urllib.error.HTTPError as e:
+        except GitHubHTTPError as e:
             if e.code == 404:
                 message = f"❌ Repository not found: {self.repo_owner}/{self.repo_name}"
             elif e.code == 401:
@@ -0,0 +1,397 @@
+"""Monthly history archive files.
+
+DataManager keeps only the current month of history in the live data
+file. Closed months move to one gzipped JSON file each, with an index
+of what every file holds:
+
+    history/2026-09.json.gz   {'history': [...], 'stations': {name: [...]}}
+    history/index.json        month -> rows, first/last timestamp and
+                              per-station [first, last, count]
+
+Queries read the index first and open only the months that overlap the
+requested window (and, for one station, only months it appears in).
+Archives only ever grow: adding entries to a month unions them with
+what the file already holds. Sync exchanges only the live month; closed
+month entries arriving from another computer are added here.
+
+Retention (see retention.py) applies to whole archived months:
+apply_retention() rolls a month's raw entries into per-station hourly
+rollups once the month has ended before the raw window, and those into
+daily rollups once it has ended before the hourly window. The month
+file then holds 'hourly' or 'daily' {name: [rollups]} and its 'tier'.
+"""
+import gzip
+import heapq
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from models import (Station, HistoryEntry, GlobalHistoryEntry, LazyHistory,
+                    format_timestamp, parse_timestamp, rollups_from_list)
+from retention import (RAW, HOURLY, DAILY, RetentionPolicy, RetentionResult,
+                       daily_rollups, hourly_rollups, merge_rollups)
+from logger import get_logger
+
+logger = get_logger()
+
+INDEX_NAME = "index.json"
+MONTH_SUFFIX = ".json.gz"
+
+
+def month_key(timestamp: str) -> str:
+    """'YYYY-MM' partition of a timestamp string."""
+    return timestamp[:7]
+
+
+def month_start(epoch: int) -> str:
+    """Timestamp string of the first second of epoch's month."""
+    return month_key(format_timestamp(epoch)) + "-01 00:00:00"
+
+
+def month_end(month: str) -> int:
+    """Epoch of the first second after a 'YYYY-MM' month."""
+    year, number = int(month[:4]), int(month[5:7])
+    year, number = (year + 1, 1) if number == 12 else (year, number + 1)
+    return parse_timestamp(f"{year:04d}-{number:02d}-01 00:00:00")
+
+
+def _station_key(entry: Dict) -> tuple:
+    return (entry['timestamp'], entry['count'])
+
+
+def _global_key(entry: Dict) -> tuple:
+    return (entry['station'], entry['timestamp'], entry['count'])
+
+
+def _content_key(month: Dict[str, Any]) -> frozenset:
+    """Identity of a month's incoming entries, independent of their order."""
+    keys = {_global_key(e) for e in month['history']}
+    for name, entries in month['stations'].items():
+        keys.update((None, name) + _station_key(e) for e in entries)
+    return frozenset(keys)
+
+
+def _timestamp(entry: Dict) -> str:
+    return entry['timestamp']
+
+
+def _union(existing: List[Dict], new: List[Dict], key) -> List[Dict]:
+    """existing plus the new entries it lacks, in time order."""
+    seen = {key(e) for e in existing}
+    added = sorted((e for e in new if key(e) not in seen), key=_timestamp)
+    if not added:
+        return existing
+    return list(heapq.merge(existing, added, key=_timestamp))
+
+
+def split_closed(document: Dict[str, Any],
+                 cutoff: str) -> Tuple[Dict[str, Any], Dict[str, List[Dict]], List[Dict]]:
+    """Split a {'stations', 'history'} document at cutoff (a timestamp string).
+
+    Returns the document with only entries from cutoff on, plus the
+    per-station and global entries before it. document is not modified.
+    """
+    stations = {}
+    station_history = {}
+    for name, data in document.get('stations', {}).items():
+        entries = data.get('history', [])
+        if any(e['timestamp'] < cutoff for e in entries):
+            station_history[name] = [e for e in entries if e['timestamp'] < cutoff]
+            data = dict(data, history=[e for e in entries if e['timestamp'] >= cutoff])
+        stations[name] = data
+    history = document.get('history', [])
+    closed = [e for e in history if e['timestamp'] < cutoff]
+    if closed:
+        history = [e for e in history if e['timestamp'] >= cutoff]
+    return dict(document, stations=stations, history=history), station_history, closed
+
+
+def _window(start: Optional[int], end: Optional[int]) -> Tuple[Optional[str], Optional[str]]:
+    return (None if start is None else format_timestamp(start),
+            None if end is None else format_timestamp(end))
+
+
+def _in_window(timestamp: str, start: Optional[str], end: Optional[str]) -> bool:
+    return (start is None or timestamp >= start) and (end is None or timestamp < end)
+
+
+class HistoryArchive:
+    """Closed months of history, one file per month, with an index."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.RLock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        # Content keys last archived per month, so saves that still carry
+        # an unchanged closed month (e.g. after a sync merge) skip it
+        self._archived: Dict[str, frozenset] = {}
+
+    @property
+    def index_file(self) -> str:
+        return os.path.join(self.directory, INDEX_NAME)
+
+    def month_file(self, month: str) -> str:
+        return os.path.join(self.directory, month + MONTH_SUFFIX)
+
+    def index(self) -> Dict[str, Dict[str, Any]]:
+        """month -> {'rows', 'first', 'last', 'tier', 'stations': {name: [first, last, count]}}.
+
+        A station's count is its raw entries; rolled-up months list
+        stations by their rollups with a count of 0.
+        """
+        with self._lock:
+            if self._index is None:
+                self._index = self._read_index()
+            return self._index
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data.get('months', {}) if isinstance(data, dict) else {}
+        except (IOError, ValueError) as e:
+            logger.warning(f"History archive index unreadable, rebuilding: {e}")
+            return self._rebuild_index()
+
+    def _rebuild_index(self) -> Dict[str, Dict[str, Any]]:
+        index = {}
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(MONTH_SUFFIX):
+                month = name[:-len(MONTH_SUFFIX)]
+                index[month] = self._describe(self.read_month(month))
+        return index
+
+    @staticmethod
+    def _describe(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Index entry for one month's contents."""
+        rows = data['history']
+        timestamps = [e['timestamp'] for e in rows]
+        stations = {}
+        for name, entries in data['stations'].items():
+            if entries:
+                stations[name] = [entries[0]['timestamp'], entries[-1]['timestamp'], len(entries)]
+                timestamps += (entries[0]['timestamp'], entries[-1]['timestamp'])
+        for tier in (HOURLY, DAILY):
+            for name, rollups in data[tier].items():
+                if not rollups:
+                    continue
+                first, last = rollups[0]['timestamp'], rollups[-1]['timestamp']
+                known = stations.get(name)
+                if known:
+                    known[0], known[1] = min(first, known[0]), max(last, known[1])
+                else:
+                    stations[name] = [first, last, 0]
+                timestamps += (first, last)
+        return {'rows': len(rows), 'first': min(timestamps, default=None),
+                'last': max(timestamps, default=None), 'stations': stations,
+                'tier': data['tier']}
+
+    def months(self, start: Optional[int] = None, end: Optional[int] = None,
+               station: Optional[str] = None) -> List[str]:
+        """Archived months overlapping [start, end), optionally holding station."""
+        lo, hi = _window(start, end)
+        selected = []
+        for month, info in sorted(self.index().items()):
+            first, last = info['first'], info['last']
+            if station is not None:
+                if station not in info['stations']:
+                    continue
+                first, last = info['stations'][station][:2]
+            if first is None or (lo is not None and last < lo) or (hi is not None and first >= hi):
+                continue
+            selected.append(month)
+        return selected
+
+    def row_count(self, start: Optional[int] = None, end: Optional[int] = None) -> int:
+        """Global history rows in the months overlapping [start, end)."""
+        index = self.index()
+        return sum(index[month]['rows'] for month in self.months(start, end))
+
+    def read_month(self, month: str) -> Dict[str, Any]:
+        """One month's {'history', 'stations', 'hourly', 'daily', 'tier'} (empty if not archived)."""
+        path = self.month_file(month)
+        data = {}
+        if os.path.exists(path):
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        return {'history': data.get('history', []), 'stations': data.get('stations', {}),
+                HOURLY: data.get(HOURLY, {}), DAILY: data.get(DAILY, {}),
+                'tier': data.get('tier', RAW)}
+
+    def add(self, station_history: Dict[str, List[Dict]], history: List[Dict]) -> List[str]:
+        """Archive entries (as dicts), grouped into their months.
+
+        Returns the months whose files were rewritten.
+        """
+        by_month: Dict[str, Dict[str, Any]] = {}
+        for entry in history:
+            month = by_month.setdefault(month_key(entry['timestamp']), {'history': [], 'stations': {}})
+            month['history'].append(entry)
+        for name, entries in station_history.items():
+            for entry in entries:
+                month = by_month.setdefault(month_key(entry['timestamp']),
+                                            {'history': [], 'stations': {}})
+                month['stations'].setdefault(name, []).append(entry)
+
+        written = []
+        with self._lock:
+            index = self.index()
+            for month, new in sorted(by_month.items()):
+                if index.get(month, {}).get('tier', RAW) != RAW:
+                    continue  # Already rolled up; its raw entries were dropped on purpose
+                content = _content_key(new)
+                if self._archived.get(month) == content:
+                    continue
+                self._write_month(month, new)
+                self._archived[month] = content
+                written.append(month)
+            if written:
+                self._write_index()
+        if written:
+            logger.info(f"Archived history for {', '.join(written)}")
+        return written
+
+    def _write_month(self, month: str, new: Dict[str, Any]) -> None:
+        data = self.read_month(month)
+        data['history'] = _union(data['history'], new['history'], _global_key)
+        stations = data['stations']
+        for name, entries in new['stations'].items():
+            stations[name] = _union(stations.get(name, []), entries, _station_key)
+        self._store_month(month, data)
+
+    def _store_month(self, month: str, data: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.month_file(month)
+        temp = path + ".tmp"
+        with gzip.open(temp, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(temp, path)
+        self.index()[month] = self._describe(data)
+
+    def _write_index(self) -> None:
+        temp = self.index_file + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'months': self.index()}, f, separators=(',', ':'))
+        os.replace(temp, self.index_file)
+
+    def apply_retention(self, policy: RetentionPolicy, now: int) -> RetentionResult:
+        """Roll whole archived months that ended before policy's windows into rollups.
+
+        Global history rows of a month are dropped with its raw entries.
+        """
+        raw_cutoff = policy.raw_cutoff(now)
+        hourly_cutoff = policy.hourly_cutoff(now)
+        result = RetentionResult()
+        stations = set()
+        with self._lock:
+            for month, info in sorted(self.index().items()):
+                end = month_end(month)
+                tier = target = info.get('tier', RAW)
+                if target == RAW and raw_cutoff is not None and end <= raw_cutoff:
+                    target = HOURLY
+                if target == HOURLY and hourly_cutoff is not None and end <= hourly_cutoff:
+                    target = DAILY
+                if target == tier:
+                    continue
+                data = self.read_month(month)
+                self._roll_month(data, target, result, stations)
+                self._store_month(month, data)
+                self._archived.pop(month, None)
+            if stations:
+                self._write_index()
+        result.stations = sorted(stations)
+        if result:
+            logger.info(f"Archive retention: rolled {result.rolled_entries} entries and "
+                        f"{result.rolled_hours} hourly rollups for {len(result.stations)} "
+                        f"stations, dropped {result.dropped_rows} history rows")
+        return result
+
+    @staticmethod
+    def _roll_month(data: Dict[str, Any], target: str, result: RetentionResult,
+                    stations: set) -> None:
+        """Move one month's data down to the target tier, in place."""
+        for name, entries in data['stations'].items():
+            if not entries:
+                continue
+            rollups = hourly_rollups((parse_timestamp(e['timestamp']) for e in entries),
+                                     (e['count'] for e in entries))
+            hourly = merge_rollups(rollups_from_list(data[HOURLY].get(name)), rollups)
+            data[HOURLY][name] = [r.to_dict() for r in hourly]
+            result.rolled_entries += len(entries)
+            stations.add(name)
+        result.dropped_rows += len(data['history'])
+        data['history'] = []
+        data['stations'] = {}
+        if target == DAILY:
+            for name, items in data[HOURLY].items():
+                hourly = rollups_from_list(items)
+                daily = merge_rollups(rollups_from_list(data[DAILY].get(name)),
+                                      daily_rollups(hourly))
+                data[DAILY][name] = [r.to_dict() for r in daily]
+                result.rolled_hours += len(hourly)
+                stations.add(name)
+            data[HOURLY] = {}
+        data['tier'] = target
+
+    def station_history(self, name: str, start: Optional[int] = None,
+                        end: Optional[int] = None) -> List[HistoryEntry]:
+        """A station's archived history in [start, end)."""
+        lo, hi = _window(start, end)
+        entries = []
+        for month in self.months(start, end, station=name):
+            for item in self.read_month(month)['stations'].get(name, []):
+                if _in_window(item['timestamp'], lo, hi):
+                    entries.append(HistoryEntry(parse_timestamp(item['timestamp']), item['count']))
+        return entries
+
+    def iter_history(self, start: Optional[int] = None,
+                     end: Optional[int] = None) -> Iterator[GlobalHistoryEntry]:
+        """Archived global history rows in [start, end), in time order."""
+        lo, hi = _window(start, end)
+        for month in self.months(start, end):
+            for item in self.read_month(month)['history']:
+                if _in_window(item['timestamp'], lo, hi):
+                    yield GlobalHistoryEntry.from_dict(item)
+
+    def attach(self, stations: Iterable[Station], start: Optional[int] = None,
+               end: Optional[int] = None) -> List[Station]:
+        """Copies of stations whose history and rollups also have their archived ones.
+
+        Each month overlapping the window and holding any of the stations
+        is read once.
+        """
+        stations = list(stations)
+        names = {station.name for station in stations}
+        lo, hi = _window(start, end)
+        archived: Dict[str, Dict[str, List[Dict]]] = {
+            tier: {name: [] for name in names} for tier in (RAW, HOURLY, DAILY)}
+        index = self.index()
+        for month in self.months(start, end):
+            if names.isdisjoint(index[month]['stations']):
+                continue
+            data = self.read_month(month)
+            for tier, key in ((RAW, 'stations'), (HOURLY, HOURLY), (DAILY, DAILY)):
+                for name, entries in data[key].items():
+                    if name in names:
+                        archived[tier][name].extend(
+                            e for e in entries if _in_window(e['timestamp'], lo, hi))
+
+        attached = []
+        for station in stations:
+            old = archived[RAW][station.name]
+            old_hourly = archived[HOURLY][station.name]
+            old_daily = archived[DAILY][station.name]
+            if not (old or old_hourly or old_daily):
+                attached.append(station)
+                continue
+            copy = station.copy()
+            if old:
+                live = [e for e in station.history.to_list()
+                        if _in_window(e['timestamp'], lo, hi)]
+                copy.history = LazyHistory(raw=_union(old, live, _station_key))
+            copy.hourly = merge_rollups(rollups_from_list(old_hourly), copy.hourly)
+            copy.daily = merge_rollups(rollups_from_list(old_daily), copy.daily)
+            attached.append(copy)
+        return attached
@@ -0,0 +1,141 @@
+"""Incremental reader for large JSON documents.
+
+json.load() needs the whole text and the whole parsed tree in memory
+before anything can be converted to model objects. JSONStreamReader
+walks objects and arrays itself and decodes only one member at a time
+(with JSONDecoder.raw_decode on a sliding buffer), so callers can build
+their own structures as they go and drop each parsed piece right away.
+
+    reader = JSONStreamReader(stream)
+    for key in reader.items():
+        if key == 'history':
+            for _ in reader.array():
+                use(reader.value())
+        else:
+            reader.value()
+
+Every key from items() and every step of array() must be followed by
+consuming exactly one value (value(), items() or array()).
+"""
+import json
+import re
+from typing import Any, Iterator, TextIO
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER_CHARS = re.compile(r'[0-9.eE+-]*')
+
+
+class JSONStreamReader:
+    """Pull parser over a text stream."""
+
+    def __init__(self, stream: TextIO, chunk_size: int = 1 << 16):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _more(self, size: int) -> bool:
+        """Append the next chunk, dropping what's been consumed."""
+        data = self._stream.read(size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Next non-whitespace character ('' at end of input)."""
+        # Fast path for compact JSON, which has no whitespace to skip
+        buf, pos = self._buf, self._pos
+        if pos < len(buf) and buf[pos] not in ' \t\n\r':
+            return buf[pos]
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._more(self._chunk_size):
+                return ''
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of input'!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self._peek()
+        size = self._chunk_size
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # Most likely the value continues past the buffer. Grow the
+                # read size so a huge value is re-scanned only O(log n) times.
+                if self._eof:
+                    raise
+                self._more(size)
+                size *= 2
+                continue
+            # A number cut off by the end of the buffer ("12" of "1234",
+            # "2" of "2.5") decodes fine; make sure it really ended
+            if (isinstance(obj, (int, float)) and not self._eof and
+                    _NUMBER_CHARS.match(self._buf, end).end() == len(self._buf)):
+                self._more(size)
+                continue
+            self._pos = end
+            return obj
+
+    def items(self) -> Iterator[str]:
+        """Walk an object, yielding each key; consume its value before resuming."""
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError("Expected an object key")
+            self._expect(':')
+            yield key
+            found = self._peek()
+            self._pos += 1
+            if found == '}':
+                return
+            if found != ',':
+                raise ValueError(f"Expected ',' or '}}' but found {found or 'end of input'!r}")
+
+    def array(self) -> Iterator[int]:
+        """Walk an array, yielding each index; consume the element before resuming."""
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            found = self._peek()
+            self._pos += 1
+            if found == ']':
+                return
+            if found != ',':
+                raise ValueError(f"Expected ',' or ']' but found {found or 'end of input'!r}")
+
+    def peek_type(self) -> str:
+        """'object', 'array' or 'scalar' for the next value."""
+        found = self._peek()
+        if found == '{':
+            return 'object'
+        if found == '[':
+            return 'array'
+        return 'scalar'
+
+    def end(self) -> None:
+        """Check that nothing but whitespace follows."""
+        found = self._peek()
+        if found:
+            raise ValueError(f"Extra data after JSON document: {found!r}")
@@ -8,6 +8,7 @@ v1.2.6 - Fixed Incremental Update System
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
+import multiprocessing
 import webbrowser
 import urllib.request
 import urllib.error
@@ -15,19 +16,28 @@ import os
 import subprocess
 import json
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, Optional
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
 
 from config import *
-from models import Station, GlobalHistoryEntry
-from data_manager import DataManager, DataLoadError, DataSaveError
+from models import Station, GlobalHistoryEntry, GlobalHistoryLog, now_epoch
+from data_manager import create_data_manager, DataLoadError
+from history_archive import month_start, split_closed
 from validators import validate_station_name, validate_number
 from export_manager import ExportManager
+from batch_trends import BatchTrendJob, filter_stations
+from station_tree import StationTree
 from update_checker import UpdateChecker, NetworkError, SecurityError
 from template_manager import TemplateManager
 from fc_schedule_manager import FCScheduleManager
 from autosave_manager import AutoSaveManager
+from persistence_worker import PersistenceWorker, APPEND
+from state_store import StationStore, merge_pulled
 from github_sync_manager import GitHubSyncManager
+from sync_merge import MergeConflict, MergeResult, SINCE
+from sync_worker import SyncWorker
+from retention import RetentionPolicy
+from time_slot_engine import SHIFT_LABELS, current_shift, shift_window
 from logger import setup_logger, get_logger
 from error_handler import safe_execute
 
@@ -43,25 +53,37 @@ class LRUTrackerApp:
         self.root.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}")
         self.root.configure(bg='#f0f0f0')
         
-        self.stations: Dict[str, Station] = {}
-        self.history = []
+        # Stations and history live in the store; see the properties below
+        self.store = StationStore()
         
-        self.data_manager = DataManager()
+        self.data_manager = create_data_manager()
         self.export_manager = ExportManager()
         self.update_checker = UpdateChecker()
         self.template_manager = TemplateManager()
         self.fc_schedule_manager = FCScheduleManager()
+        self.retention = RetentionPolicy()
         
-        # Initialize auto-save manager (3 min interval, 30 sec idle threshold)
+        # All writes happen on one background thread; results come back via after()
+        self.persistence = PersistenceWorker(
+            self.data_manager,
+            on_error=lambda kind, e: self.root.after(0, self._on_save_failed, kind, e),
+            on_checkpoint=lambda: self.root.after(0, self._checkpoint)
+        )
+        
+        # Initialize auto-save manager (3 min interval, 30 sec idle threshold,
+        # never more than 10 min unsaved)
         self.autosave_manager = AutoSaveManager(
-            save_callback=self._save_data,
+            save_callback=self._schedule_save,
             auto_save_interval=180,  # 3 minutes
-            idle_threshold=30        # 30 seconds
+            idle_threshold=30,       # 30 seconds
+            max_latency=600          # 10 minutes
         )
         
         # Initialize GitHub sync manager
         self.github_sync = None
         self.github_sync_enabled = False
+        self.sync_worker: Optional[SyncWorker] = None
+        self.auto_sync = False
         self._load_github_sync_config()
         
         logger.info("Application initialized")
@@ -72,35 +94,123 @@ class LRUTrackerApp:
         # Start auto-save after UI is created
         self.autosave_manager.start()
         
-        # Auto-pull on startup if enabled
-        if self.github_sync_enabled and self.github_sync:
-            self._auto_pull_on_start()
+        # Background sync; its first check pulls anything pushed while closed
+        if self.sync_worker:
+            self.sync_worker.start()
+        
+        # Roll up aged history shortly after startup, then daily
+        self.root.after(RETENTION_START_DELAY_MS, self._apply_retention)
         
         # Register window close handler
         self.root.protocol("WM_DELETE_WINDOW", self._on_closing)
     
+    @property
+    def stations(self) -> Dict[str, Station]:
+        """Live stations (Tk thread only; change them through self.store)."""
+        return self.store.stations
+    
+    @property
+    def history(self) -> GlobalHistoryLog:
+        """Live global history (Tk thread only; change it through self.store)."""
+        return self.store.history
+    
     def _load_data(self) -> None:
         """Load data from file."""
         try:
-            self.stations, self.history = self.data_manager.load_data()
+            self.store.replace(*self.data_manager.load_data(), persisted=True)
             logger.info(f"Loaded {len(self.stations)} stations, {len(self.history)} history entries")
         except DataLoadError as e:
             logger.error(f"Data load failed: {e}")
             messagebox.showerror("Error", 
                 f"Failed to load data. Starting fresh.\n"
                 f"Check {DATA_FILE}{BACKUP_SUFFIX} if data was lost.")
-            self.stations = {}
-            self.history = []
+            self.store.replace({}, GlobalHistoryLog())
+    
+    def _save_data(self, full: bool = False) -> None:
+        """Queue a save of the current data on the persistence worker.
+        
+        With a journaling backend only the changes recorded by the store
+        since the last save are written. Otherwise (or with full=True) a
+        store snapshot is saved; it is taken here, so edits made while the
+        worker writes don't end up half-serialized.
+        """
+        changes = self.store.take_changes()
+        if full or changes.full or not self.data_manager.journaled:
+            self.persistence.save_snapshot(self.store.snapshot())
+        elif changes:
+            self.persistence.append_records(changes.records)
+        # Everything so far is queued; a failed write marks it changed again
+        self.autosave_manager.mark_saved()
+        
+        if self.sync_worker and self.auto_sync:
+            self.sync_worker.request_push()
     
-    def _save_data(self) -> None:
-        """Save data to file."""
+    def _apply_retention(self) -> None:
+        """Move history past the retention windows into rollups and save.
+        
+        With an archive the live data is only the current month, so the
+        policy applies to archived months instead; that is file work, so
+        it runs on the persistence worker.
+        """
         try:
-            self.data_manager.save_data(self.stations, self.history)
-            self.autosave_manager.mark_saved()  # Mark as saved
-            logger.info("Data saved successfully")
-        except DataSaveError as e:
-            logger.error(f"Data save failed: {e}")
-            messagebox.showerror("Error", f"Failed to save data:\n{str(e)}")
+            archive = self.data_manager.archive
+            if archive is not None:
+                policy, now = self.retention, now_epoch()
+                self.persistence.run_task(
+                    lambda: archive.apply_retention(policy, now),
+                    on_done=lambda result: self.root.after(0, self._on_archive_retention, result),
+                    on_error=lambda e: self.root.after(
+                        0, logger.error, f"Archive retention failed: {e}"))
+            elif self.store.apply_retention(self.retention, now_epoch()):
+                self._save_data()
+        except Exception as e:
+            logger.error(f"History retention failed: {e}")
+        self.root.after(RETENTION_INTERVAL_MS, self._apply_retention)
+    
+    def _on_archive_retention(self, result) -> None:
+        """Report archived months rolled up on the persistence worker (Tk thread)."""
+        if result:
+            logger.info(f"Archive retention: {result.rolled_entries} entries and "
+                        f"{result.rolled_hours} hourly rollups rolled up for "
+                        f"{len(result.stations)} station(s)")
+    
+    def _with_archived_history(self, stations: Iterable[Station], start: Optional[int] = None,
+                               end: Optional[int] = None) -> List[Station]:
+        """Stations with their archived months added to history and rollups (for reports).
+        
+        start/end limit the archived part to [start, end).
+        """
+        if self.data_manager.archive is None:
+            return list(stations)
+        return self.data_manager.archive.attach(stations, start, end)
+    
+    def _schedule_save(self) -> None:
+        """Save requested from another thread (auto-save timer)."""
+        self.root.after(0, self._save_data)
+    
+    def _checkpoint(self) -> None:
+        """Compact the journal into a snapshot when it asks for one."""
+        logger.info("Journal checkpoint")
+        self._save_data(full=True)
+    
+    def _on_save_failed(self, kind: str, error: Exception) -> None:
+        """Report a failed background write (runs on the Tk thread)."""
+        if kind == APPEND:
+            logger.error(f"Journal write failed, saving snapshot: {error}")
+            self._save_data(full=True)
+            return
+        
+        logger.error(f"Data save failed: {error}")
+        self.store.require_full_save()
+        self.autosave_manager.mark_changed()
+        messagebox.showerror("Error", f"Failed to save data:\n{str(error)}")
+    
+    def _record_update(self) -> None:
+        """Persist a count update, journaling it when enabled."""
+        if not self.data_manager.journaled:
+            self.autosave_manager.mark_changed()  # Mark data as changed
+        # Journaled: the store recorded the update, so this only appends it
+        self._save_data()
     
     def _create_ui(self) -> None:
         """Create the user interface."""
@@ -304,6 +414,9 @@ class LRUTrackerApp:
         self.tree.tag_configure('under_min', background=Colors.UNDER_MIN_BG)
         self.tree.tag_configure('at_max', background=Colors.AT_MAX_BG)
         self.tree.tag_configure('normal', background=Colors.NORMAL_BG)
+        
+        self.station_tree = StationTree(self.tree)
+        self._shown_stats: Optional[tuple] = None
     
     def _create_right_panel(self, parent: tk.Frame) -> None:
         """Create right panel with controls."""
@@ -362,6 +475,11 @@ class LRUTrackerApp:
         self.stats_label = tk.Label(stats_frame, text="", bg='white', 
                                    font=('Arial', 9), justify='left', anchor='w')
         self.stats_label.pack(fill='x')
+        
+        # Selected station's running stats (O(1) to show, any history length)
+        self.station_stats_label = tk.Label(stats_frame, text="", bg='white', fg='#555555',
+                                           font=('Arial', 9), justify='left', anchor='w')
+        self.station_stats_label.pack(fill='x', pady=(6, 0))
     
     def _create_export_section(self, parent: tk.Frame) -> None:
         """Create export section."""
@@ -373,6 +491,7 @@ class LRUTrackerApp:
             ("📊 New Excel Report", self.export_new_report, Colors.SUCCESS),
             ("📈 Append to Existing", self.append_to_existing, '#16a085'),
             ("📉 View Trends", self.view_trends, '#2980b9'),
+            ("📐 Station Analytics", self.export_analytics, '#2c3e50'),
             ("📅 Export FC Schedule", self.export_fc_schedule, Colors.WARNING)
         ]
         
@@ -512,10 +631,10 @@ class LRUTrackerApp:
                 messagebox.showerror("Error", "Minimum cannot be greater than Maximum!")
                 return
             
-            self.stations[name] = Station(name=name, current=0, min_lru=min_val, max_lru=max_val)
+            self.store.add_station(Station(name=name, current=0, min_lru=min_val, max_lru=max_val))
             self.autosave_manager.mark_changed()  # Mark data as changed
             self._save_data()
-            self.refresh_display()
+            self.refresh_display([name])
             dialog.destroy()
             messagebox.showinfo("Success", f"Station '{name}' added successfully!")
         
@@ -573,12 +692,11 @@ class LRUTrackerApp:
                 messagebox.showerror("Error", "Min cannot be greater than Max!")
                 return
             
-            station.min_lru = min_val
-            station.max_lru = max_val
+            self.store.set_limits(station_name, min_val, max_val)
             
             self.autosave_manager.mark_changed()  # Mark data as changed
             self._save_data()
-            self.refresh_display()
+            self.refresh_display([station_name])
             dialog.destroy()
             messagebox.showinfo("Success", "Station updated successfully!")
         
@@ -604,10 +722,10 @@ class LRUTrackerApp:
         
         if messagebox.askyesno("Confirm Delete", 
                               f"Are you sure you want to delete '{station_name}'?\nAll history will be lost."):
-            del self.stations[station_name]
+            self.store.remove_station(station_name)
             self.autosave_manager.mark_changed()  # Mark data as changed
             self._save_data()
-            self.refresh_display()
+            self.refresh_display([station_name])
             messagebox.showinfo("Success", f"Station '{station_name}' deleted!")
     
     @safe_execute
@@ -623,22 +741,11 @@ class LRUTrackerApp:
             messagebox.showerror("Error", "Please enter a valid number!")
             return
         
-        station = self.stations[station_name]
-        timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
-        station.add_history(new_count, timestamp)
-        
-        # Add to global history
-        self.history.append(GlobalHistoryEntry(
-            station=station_name,
-            timestamp=timestamp,
-            count=new_count,
-            min_lru=station.min_lru,
-            max_lru=station.max_lru
-        ))
-        
-        self.autosave_manager.mark_changed()  # Mark data as changed
-        self._save_data()
-        self.refresh_display()
+        # Station and global history are updated together
+        self.store.record_count(station_name, new_count, now_epoch())
+        
+        self._record_update()
+        self.refresh_display([station_name])
         self.update_count_var.set("")
         
         messagebox.showinfo("Success", f"Updated '{station_name}' to {new_count} LRUs!")
@@ -649,36 +756,47 @@ class LRUTrackerApp:
         if selected:
             station_name = self.tree.item(selected[0])['text']
             self.update_station_var.set(station_name)
+            self._show_station_stats()
+    
+    def _show_station_stats(self) -> None:
+        """Show the selected station's stats summary."""
+        station = self.stations.get(self.update_station_var.get())
+        if station is None or not station.stats.count:
+            self.station_stats_label.config(text="")
+            return
+        stats = station.stats
+        seconds = stats.time_in_status(now_epoch())
+        tracked = sum(seconds.values())
+        lines = [f"{station.name}:",
+                 f"Avg {stats.mean:.1f} (σ {stats.stddev:.1f}), range {stats.min_count}-{stats.max_count}",
+                 f"Last {len(stats.recent)} avg: {stats.recent_mean:.1f} over {stats.count} updates"]
+        if tracked:
+            lines.append(f"Under min {seconds.get('under_min', 0) / tracked:.0%} of the time, "
+                         f"at/over max {seconds.get('at_max', 0) / tracked:.0%}")
+        self.station_stats_label.config(text="\n".join(lines))
     
-    def refresh_display(self) -> None:
-        """Refresh the display with current data."""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    def refresh_display(self, changed: Optional[Iterable[str]] = None) -> None:
+        """Refresh the display with current data.
         
-        under_min_count = at_max_count = normal_count = 0
+        changed names the stations that were added, edited or deleted;
+        only their rows are touched. Without it every row is compared and
+        only rows that differ are updated.
+        """
+        if self.station_tree.sync(self.stations, changed):
+            station_names = list(self.stations.keys())
+            self.update_station_combo['values'] = station_names
+            if station_names and not self.update_station_var.get():
+                self.update_station_var.set(station_names[0])
         
-        for name in sorted(self.stations.keys()):
-            station = self.stations[name]
-            status = station.get_status()
-            tag = station.get_status_tag()
-            
-            if tag == 'under_min':
-                under_min_count += 1
-            elif tag == 'at_max':
-                at_max_count += 1
-            else:
-                normal_count += 1
-            
-            self.tree.insert('', 'end', text=name, 
-                           values=(station.current, station.min_lru, station.max_lru, status),
-                           tags=(tag,))
+        self._show_station_stats()
         
-        station_names = list(self.stations.keys())
-        self.update_station_combo['values'] = station_names
-        if station_names and not self.update_station_var.get():
-            self.update_station_var.set(station_names[0])
+        counts = self.station_tree.status_counts
+        stats = (len(self.stations), counts['normal'], counts['under_min'], counts['at_max'])
+        if stats == self._shown_stats:
+            return
+        self._shown_stats = stats
         
-        total_stations = len(self.stations)
+        total_stations, normal_count, under_min_count, at_max_count = stats
         stats_text = f"""
 Total Stations: {total_stations}
 
@@ -705,11 +823,38 @@ Total Stations: {total_stations}
             return
         
         try:
-            self.export_manager.export_new_report(filename, self.stations, self.history)
+            # Usually the snapshot cached by the last save, so no extra copy
+            snap = self.store.snapshot()
+            self.export_manager.export_new_report(filename, snap.stations, snap.history,
+                                                  archive=self.data_manager.archive)
             messagebox.showinfo("Success", f"Report exported successfully to:\n{filename}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export report:\n{str(e)}")
     
+    @safe_execute
+    def export_analytics(self) -> None:
+        """Export per-station analytics over all history, archived months included."""
+        snap = self.store.snapshot()
+        archive = self.data_manager.archive
+        if not snap.history and (archive is None or not archive.row_count()):
+            messagebox.showwarning("Warning", "No history to analyze!")
+            return
+        
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+            initialfile=f"LRU_Analytics_{datetime.now().strftime(FILE_TIMESTAMP_FORMAT)}.xlsx"
+        )
+        
+        if not filename:
+            return
+        
+        try:
+            self.export_manager.create_analytics_report(filename, snap.history, archive=archive)
+            messagebox.showinfo("Success", f"Analytics exported successfully to:\n{filename}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export analytics:\n{str(e)}")
+    
     def append_to_existing(self) -> None:
         """Append to existing Excel file."""
         if not self.stations:
@@ -724,7 +869,7 @@ Total Stations: {total_stations}
             return
         
         try:
-            sheet_name = self.export_manager.append_to_existing(filename, self.stations)
+            sheet_name = self.export_manager.append_to_existing(filename, self.store.snapshot().stations)
             messagebox.showinfo("Success", f"Data appended to existing report!\nNew sheet: {sheet_name}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to append to report:\n{str(e)}")
@@ -737,7 +882,7 @@ Total Stations: {total_stations}
         
         dialog = tk.Toplevel(self.root)
         dialog.title("View Trends")
-        dialog.geometry("400x200")
+        dialog.geometry("400x440")
         dialog.configure(bg='white')
         dialog.transient(self.root)
         dialog.grab_set()
@@ -758,7 +903,7 @@ Total Stations: {total_stations}
                 messagebox.showwarning("Warning", "Please select a station!")
                 return
             
-            station = self.stations[station_name]
+            station = self._with_archived_history([self.stations[station_name]])[0]
             if not station.history:
                 messagebox.showinfo("Info", f"No history data available for '{station_name}'")
                 return
@@ -782,6 +927,83 @@ Total Stations: {total_stations}
         tk.Button(dialog, text="Generate Trend Report", command=generate_trend,
                  bg='#2980b9', fg='white', font=('Arial', 11, 'bold'),
                  padx=20, pady=10).pack(pady=20)
+        
+        # ===== BATCH SECTION =====
+        batch_frame = tk.LabelFrame(dialog, text="Batch Trend Reports",
+                                    font=('Arial', 11, 'bold'), bg='white', padx=10, pady=8)
+        batch_frame.pack(fill='x', padx=20, pady=5)
+        
+        tk.Label(batch_frame, text="Station filter (blank = all, * and ? allowed):",
+                bg='white', font=('Arial', 9)).pack(anchor='w')
+        filter_var = tk.StringVar()
+        tk.Entry(batch_frame, textvariable=filter_var, font=('Arial', 10)).pack(fill='x', pady=3)
+        
+        single_var = tk.BooleanVar(value=False)
+        tk.Radiobutton(batch_frame, text="One file per station (choose folder)",
+                      variable=single_var, value=False, bg='white').pack(anchor='w')
+        tk.Radiobutton(batch_frame, text="Single workbook, one sheet per station",
+                      variable=single_var, value=True, bg='white').pack(anchor='w')
+        
+        def generate_batch():
+            stations = filter_stations(self.stations, filter_var.get(), require_history=False)
+            stations = [s for s in self._with_archived_history(stations) if s.history]
+            if not stations:
+                messagebox.showinfo("Info", "No stations with history match that filter.")
+                return
+            
+            if single_var.get():
+                output = filedialog.asksaveasfilename(
+                    defaultextension=".xlsx",
+                    filetypes=[("Excel files", "*.xlsx")],
+                    initialfile=f"Trends_{datetime.now().strftime('%Y%m%d')}.xlsx"
+                )
+            else:
+                output = filedialog.askdirectory(title="Choose folder for trend reports")
+            
+            if not output:
+                return
+            
+            dialog.destroy()
+            self._run_batch_trends(BatchTrendJob(stations, output, single_workbook=single_var.get()))
+        
+        tk.Button(batch_frame, text="Generate Batch Reports", command=generate_batch,
+                 bg='#16a085', fg='white', font=('Arial', 10, 'bold'),
+                 padx=15, pady=6).pack(pady=8)
+    
+    def _run_batch_trends(self, job: BatchTrendJob) -> None:
+        """Start a batch trend job and show its progress until it finishes."""
+        progress_window = tk.Toplevel(self.root)
+        progress_window.title("Generating Trend Reports")
+        progress_window.geometry("380x150")
+        progress_window.transient(self.root)
+        
+        status_label = tk.Label(progress_window, text=f"0 / {job.total} stations",
+                                font=('Arial', 11))
+        status_label.pack(pady=(20, 8))
+        progress_bar = ttk.Progressbar(progress_window, length=300, maximum=max(job.total, 1))
+        progress_bar.pack(pady=5)
+        tk.Button(progress_window, text="Cancel", command=job.cancel).pack(pady=8)
+        progress_window.protocol("WM_DELETE_WINDOW", job.cancel)
+        
+        def poll():
+            done, total, finished = job.poll()
+            progress_bar['value'] = done
+            status_label.config(text=f"{done} / {total} stations")
+            if not finished:
+                self.root.after(200, poll)
+                return
+            
+            progress_window.destroy()
+            if job.errors:
+                messagebox.showwarning("Batch Trend Reports",
+                                       f"Created {len(job.files)} report(s) in:\n{job.output}\n\n"
+                                       f"{len(job.errors)} failed:\n" + "\n".join(job.errors[:10]))
+            else:
+                messagebox.showinfo("Success",
+                                    f"Created {len(job.files)} trend report(s) in:\n{job.output}")
+        
+        job.start()
+        self.root.after(200, poll)
     
     def check_for_updates(self) -> None:
         """Check for application updates."""
@@ -1117,17 +1339,18 @@ Total Stations: {total_stations}
         imported_stations, errors = self.template_manager.import_from_template(filename, self.stations)
         
         # Add imported stations
-        for station in imported_stations:
-            self.stations[station.name] = station
-            if station.current > 0:
-                timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
-                self.history.append(GlobalHistoryEntry(
-                    station=station.name,
-                    timestamp=timestamp,
-                    count=station.current,
-                    min_lru=station.min_lru,
-                    max_lru=station.max_lru
-                ))
+        with self.store.write(changed=[s.name for s in imported_stations]):
+            for station in imported_stations:
+                self.stations[station.name] = station
+                if station.current > 0:
+                    timestamp = now_epoch()
+                    self.history.append(GlobalHistoryEntry(
+                        station=station.name,
+                        timestamp=timestamp,
+                        count=station.current,
+                        min_lru=station.min_lru,
+                        max_lru=station.max_lru
+                    ))
         
         if imported_stations:
             self._save_data()
@@ -1158,8 +1381,9 @@ Total Stations: {total_stations}
         imported_stations, errors = self.fc_schedule_manager.import_from_csv(filename, self.stations)
         
         # Add imported stations
-        for station in imported_stations:
-            self.stations[station.name] = station
+        with self.store.write(changed=[s.name for s in imported_stations]):
+            for station in imported_stations:
+                self.stations[station.name] = station
         
         if imported_stations:
             self._save_data()
@@ -1184,22 +1408,69 @@ Total Stations: {total_stations}
     
     @safe_execute
     def export_fc_schedule(self) -> None:
-        """Export in FC Standard Work Spreadsheet format."""
+        """Export in FC Standard Work Spreadsheet format for a chosen date/shift."""
         if not self.stations:
             messagebox.showwarning("Warning", "No stations to export!")
             return
         
-        filename = filedialog.asksaveasfilename(
-            defaultextension=".xlsx",
-            filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("All files", "*.*")],
-            initialfile=f"FC_Schedule_Report_{datetime.now().strftime(FILE_TIMESTAMP_FORMAT)}.xlsx"
-        )
+        all_history = "All history"
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Export FC Schedule")
+        dialog.geometry("360x280")
+        dialog.configure(bg='white')
+        dialog.transient(self.root)
+        dialog.grab_set()
         
-        if not filename:
-            return
+        tk.Label(dialog, text="Select Shift to Export",
+                font=('Arial', 14, 'bold'), bg='white').pack(pady=15)
+        
+        # Default to the shift running now
+        day, shift = current_shift(datetime.now())
+        tk.Label(dialog, text="Shift start date (YYYY-MM-DD):",
+                bg='white', font=('Arial', 10)).pack(anchor='w', padx=20)
+        date_var = tk.StringVar(value=day.isoformat())
+        tk.Entry(dialog, textvariable=date_var, font=('Arial', 11)).pack(fill='x', padx=20, pady=3)
+        
+        tk.Label(dialog, text="Shift:", bg='white', font=('Arial', 10)).pack(anchor='w', padx=20)
+        shift_var = tk.StringVar(value=SHIFT_LABELS[shift])
+        ttk.Combobox(dialog, textvariable=shift_var,
+                    values=list(SHIFT_LABELS.values()) + [all_history],
+                    state='readonly', font=('Arial', 11)).pack(fill='x', padx=20, pady=3)
+        
+        def export():
+            window = None
+            if shift_var.get() != all_history:
+                shift = next(key for key, label in SHIFT_LABELS.items()
+                             if label == shift_var.get())
+                try:
+                    window = shift_window(date.fromisoformat(date_var.get().strip()), shift)
+                except ValueError:
+                    messagebox.showwarning("Warning", "Please enter the date as YYYY-MM-DD!")
+                    return
+            
+            filename = filedialog.asksaveasfilename(
+                defaultextension=".xlsx",
+                filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("All files", "*.*")],
+                initialfile=f"FC_Schedule_Report_{datetime.now().strftime(FILE_TIMESTAMP_FORMAT)}.xlsx"
+            )
+            
+            if not filename:
+                return
+            
+            dialog.destroy()
+            stations = self.store.snapshot().stations
+            if self.data_manager.archive is not None:
+                stations = {s.name: s for s in self._with_archived_history(
+                    stations.values(), *(window or (None, None)))}
+            try:
+                self.fc_schedule_manager.export_to_csv(filename, stations, window)
+                messagebox.showinfo("Success", f"FC Schedule exported to:\n{filename}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to export FC schedule:\n{str(e)}")
         
-        self.fc_schedule_manager.export_to_csv(filename, self.stations)
-        messagebox.showinfo("Success", f"FC Schedule exported to:\n{filename}")
+        tk.Button(dialog, text="Export", command=export,
+                 bg='#2980b9', fg='white', font=('Arial', 11, 'bold'),
+                 padx=20, pady=10).pack(pady=20)
     
     # ====================
     # GitHub Sync Methods
@@ -1235,13 +1506,32 @@ Total Stations: {total_stations}
                     repo_owner=sync_config.get('repo_owner', ''),
                     repo_name=sync_config.get('repo_name', ''),
                     data_file_path=sync_config.get('data_file_path', 'shared_data/lru_data.json'),
-                    branch=sync_config.get('branch', 'main')
+                    branch=sync_config.get('branch', 'main'),
+                    sharded=sync_config.get('sharded', False),
+                    cache_dir=SYNC_CACHE_DIR
                 )
                 
                 token = sync_config.get('token', '')
                 if token:
                     self.github_sync.set_token(token)
                 
+                # All network traffic runs on the sync thread; results come back via after()
+                self.auto_sync = sync_config.get('auto_sync', True)
+                self.sync_worker = SyncWorker(
+                    self.github_sync,
+                    self._sync_document,
+                    interval=sync_config.get('sync_interval', SYNC_INTERVAL),
+                    push_delay=SYNC_PUSH_DELAY,
+                    auto_pull=self.auto_sync,
+                    on_remote_data=lambda data, manual: self.root.after(
+                        0, self._on_sync_data, data, manual),
+                    on_checked=lambda changed, info, manual: self.root.after(
+                        0, self._on_sync_checked, changed, info, manual),
+                    on_pushed=lambda manual: self.root.after(0, self._on_sync_pushed, manual),
+                    on_error=lambda kind, e, manual: self.root.after(
+                        0, self._on_sync_error, kind, e, manual)
+                )
+                
                 logger.info(f"GitHub sync enabled: {sync_config.get('repo_owner')}/{sync_config.get('repo_name')}")
             else:
                 logger.info("GitHub sync is disabled in config")
@@ -1250,32 +1540,6 @@ Total Stations: {total_stations}
             logger.error(f"Error loading GitHub sync config: {e}")
             self.github_sync_enabled = False
     
-    def _auto_pull_on_start(self) -> None:
-        """Auto-pull from GitHub on app start if configured."""
-        if not self.github_sync:
-            return
-            
-        try:
-            has_changes, remote_info = self.github_sync.check_remote_changes()
-            
-            if has_changes and remote_info:
-                response = messagebox.askyesno(
-                    "GitHub Sync",
-                    "Remote data detected on GitHub.\n\n"
-                    "Would you like to load it?\n\n"
-                    "This will replace your local data.",
-                    icon='question'
-                )
-                
-                if response:
-                    self.pull_from_github()
-            elif not remote_info:
-                logger.info("No remote data found - this may be first computer")
-                
-        except Exception as e:
-            logger.error(f"Error during auto-pull check: {e}")
-            # Don't show error on startup - just log it
-    
     def _update_sync_status(self) -> None:
         """Update the sync status label."""
         if not self.github_sync or not hasattr(self, 'sync_status_label'):
@@ -1289,109 +1553,131 @@ Total Stations: {total_stations}
         except Exception as e:
             self.sync_status_label.config(text=f"Status: Error - {str(e)[:30]}")
     
-    @safe_execute
-    def pull_from_github(self) -> None:
-        """Pull latest data from GitHub."""
-        if not self.github_sync:
-            messagebox.showerror("Error", "GitHub sync not configured!")
-            return
+    def _sync_document(self) -> Dict:
+        """Current data as a sync document, from a snapshot so edits can't race it."""
+        snap = self.store.snapshot()
+        document = {
+            'stations': {name: station.to_dict() for name, station in snap.stations.items()},
+            'history': snap.history.to_list()
+        }
+        # With an archive only the live month is synced; closed months not
+        # archived yet are at the next save. SINCE tells the push to leave
+        # older months on the remote alone and the merge to compare only
+        # the live month.
+        if self.data_manager.archive is not None:
+            cutoff = month_start(now_epoch())
+            document = split_closed(document, cutoff)[0]
+            document[SINCE] = cutoff
+        return document
+    
+    def _merge_remote(self, remote: Dict) -> MergeResult:
+        """Three-way merge remote data into the local stations and history.
         
+        With an archive the merge covers the live month only. Closed-month
+        entries from remote are handed to the persistence worker for the
+        archive, which unions them.
+        """
+        archive = self.data_manager.archive
+        if archive is not None:
+            remote, station_history, closed = split_closed(remote, month_start(now_epoch()))
+            if station_history or closed:
+                self.persistence.run_task(
+                    lambda: archive.add(station_history, closed),
+                    on_done=lambda months: self.root.after(0, self._on_archived_remote, months),
+                    on_error=lambda e: self.root.after(
+                        0, logger.error, f"Archiving pulled history failed: {e}"))
+        result = merge_pulled(self.store, self.github_sync, remote, self._sync_document())
+        
+        for conflict in result.conflicts:
+            logger.warning(f"Sync conflict - {conflict.describe()}")
+        return result
+    
+    def _on_archived_remote(self, months: List[str]) -> None:
+        """Report closed months from a pull written to the archive (Tk thread)."""
+        if months:
+            logger.info(f"Archived pulled history for {', '.join(months)}")
+    
+    @staticmethod
+    def _conflict_summary(conflicts: List[MergeConflict], limit: int = 5) -> str:
+        """Text listing merge conflicts for a message box ('' if none)."""
+        if not conflicts:
+            return ""
+        lines = [f"⚠️ {len(conflicts)} conflicting change(s), kept this computer's version:"]
+        lines.extend(f"  • {conflict.describe()}" for conflict in conflicts[:limit])
+        if len(conflicts) > limit:
+            lines.append(f"  ... and {len(conflicts) - limit} more (see log)")
+        return "\n".join(lines) + "\n\n"
+    
+    def _on_sync_data(self, data: Optional[Dict], manual: bool) -> None:
+        """Merge data pulled by the sync worker (Tk thread)."""
         try:
-            # Check if there are unsaved local changes
-            if self.autosave_manager.has_unsaved_changes:
-                response = messagebox.askyesnocancel(
-                    "Unsaved Changes",
-                    "You have unsaved local changes.\n\n"
-                    "Do you want to save them first before pulling?\n\n"
-                    "Yes = Save then pull\n"
-                    "No = Discard and pull\n"
-                    "Cancel = Don't pull",
-                    icon='warning'
-                )
-                
-                if response is None:  # Cancel
-                    return
-                elif response:  # Yes - save first
-                    self._save_data()
-            
-            # Pull from GitHub
-            data = self.github_sync.pull_from_github()
-            
             if data is None:
-                messagebox.showinfo(
-                    "No Remote Data",
-                    "No data found on GitHub.\n\n"
-                    "This computer may need to push first."
-                )
+                if manual:
+                    messagebox.showinfo(
+                        "No Remote Data",
+                        "No data found on GitHub.\n\n"
+                        "This computer may need to push first."
+                    )
                 return
             
-            # Load the data
-            self.stations = {}
-            for name, station_data in data.get('stations', {}).items():
-                station = Station.from_dict(name, station_data)
-                self.stations[name] = station
-            
-            self.history = [
-                GlobalHistoryEntry.from_dict(entry)
-                for entry in data.get('history', [])
-            ]
+            # Merge rather than replace, so unsynced local edits survive
+            result = self._merge_remote(data)
             
             # Save locally
             self._save_data()
             self.refresh_display()
             self._update_sync_status()
             
-            messagebox.showinfo(
-                "Pull Successful",
-                f"✅ Data pulled from GitHub!\n\n"
-                f"Stations: {len(self.stations)}\n"
-                f"History entries: {len(self.history)}\n\n"
-                f"Last sync: {self.github_sync.get_sync_status()['last_sync']}"
-            )
-            
+            if manual:
+                messagebox.showinfo(
+                    "Pull Successful",
+                    f"✅ Data pulled from GitHub!\n\n"
+                    f"Stations: {len(self.stations)}\n"
+                    f"History entries: {len(self.history)} ({result.added_history} new)\n\n"
+                    f"{self._conflict_summary(result.conflicts)}"
+                    f"Last sync: {self.github_sync.get_sync_status()['last_sync']}"
+                )
+            elif result.conflicts:
+                messagebox.showwarning("Sync Conflicts", self._conflict_summary(result.conflicts))
         except Exception as e:
-            logger.error(f"Pull failed: {e}")
-            messagebox.showerror("Pull Failed", f"Failed to pull from GitHub:\n\n{str(e)}")
+            logger.error(f"Merging pulled data failed: {e}")
+            if manual:
+                messagebox.showerror("Pull Failed", f"Failed to merge GitHub data:\n\n{str(e)}")
+        finally:
+            self.sync_worker.merged()
     
-    @safe_execute
-    def push_to_github(self) -> None:
-        """Push current data to GitHub."""
-        if not self.github_sync:
-            messagebox.showerror("Error", "GitHub sync not configured!")
+    def _on_sync_checked(self, has_changes: bool, remote_info: Optional[Dict],
+                         manual: bool) -> None:
+        """Report a remote check that didn't pull (Tk thread)."""
+        if not manual:
+            if has_changes and remote_info:
+                self.sync_status_label.config(text="🔔 Remote data has been updated - pull to merge")
             return
         
-        try:
-            # Check if remote has changes first
-            has_changes, remote_info = self.github_sync.check_remote_changes()
-            
-            if has_changes and remote_info:
-                response = messagebox.askyesno(
-                    "Remote Changed",
-                    "⚠️ Remote data on GitHub has been updated since your last sync.\n\n"
-                    "Someone else may have pushed changes.\n\n"
-                    "Recommended: Pull first, then push.\n\n"
-                    "Push anyway? (This will overwrite remote changes)",
-                    icon='warning'
-                )
-                
-                if not response:
-                    return
-            
-            # Prepare data
-            data = {
-                'stations': {name: station.to_dict() for name, station in self.stations.items()},
-                'history': [entry.to_dict() for entry in self.history]
-            }
-            
-            # Push to GitHub
-            import platform
-            computer = platform.node()
-            commit_msg = f"Updated by {computer} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            
-            self.github_sync.push_to_github(data, commit_msg)
-            
-            self._update_sync_status()
-            
+        if remote_info is None:
+            messagebox.showinfo(
+                "No Remote File",
+                "No data file found on GitHub.\n\n"
+                "Use 'Push to GitHub' to create it."
+            )
+        elif has_changes:
+            messagebox.showinfo(
+                "Remote Changed",
+                "🔔 Remote data has been updated!\n\n"
+                "Someone else has pushed changes.\n\n"
+                "Use 'Pull from GitHub' to get the latest data."
+            )
+        else:
+            messagebox.showinfo(
+                "Up to Date",
+                "✅ You have the latest data!\n\n"
+                "No remote changes detected."
+            )
+    
+    def _on_sync_pushed(self, manual: bool) -> None:
+        """Report a finished push (Tk thread)."""
+        self._update_sync_status()
+        if manual:
             messagebox.showinfo(
                 "Push Successful",
                 f"✅ Data pushed to GitHub!\n\n"
@@ -1399,44 +1685,40 @@ Total Stations: {total_stations}
                 f"History entries: {len(self.history)}\n\n"
                 f"Other computers can now pull your changes."
             )
-            
-        except Exception as e:
-            logger.error(f"Push failed: {e}")
-            messagebox.showerror("Push Failed", f"Failed to push to GitHub:\n\n{str(e)}")
+    
+    def _on_sync_error(self, kind: str, error: Exception, manual: bool) -> None:
+        """Report a failed sync operation (Tk thread); the worker retries on its own."""
+        logger.error(f"Sync {kind} failed: {error}")
+        self.sync_status_label.config(text=f"Sync error - retrying: {str(error)[:40]}")
+        if manual:
+            messagebox.showerror(f"{kind.title()} Failed",
+                                 f"Failed to {kind} GitHub data:\n\n{str(error)}")
+    
+    @safe_execute
+    def pull_from_github(self) -> None:
+        """Pull latest data from GitHub and merge it into the local data."""
+        if not self.sync_worker:
+            messagebox.showerror("Error", "GitHub sync not configured!")
+            return
+        self.sync_status_label.config(text="Pulling from GitHub...")
+        self.sync_worker.request_pull(manual=True)
+    
+    @safe_execute
+    def push_to_github(self) -> None:
+        """Push current data to GitHub, merging in remote changes first."""
+        if not self.sync_worker:
+            messagebox.showerror("Error", "GitHub sync not configured!")
+            return
+        self.sync_status_label.config(text="Pushing to GitHub...")
+        self.sync_worker.request_push(delay=0, manual=True)
     
     @safe_execute
     def check_remote_changes(self) -> None:
         """Check if remote has changes without pulling."""
-        if not self.github_sync:
+        if not self.sync_worker:
             messagebox.showerror("Error", "GitHub sync not configured!")
             return
-        
-        try:
-            has_changes, remote_info = self.github_sync.check_remote_changes()
-            
-            if remote_info is None:
-                messagebox.showinfo(
-                    "No Remote File",
-                    "No data file found on GitHub.\n\n"
-                    "Use 'Push to GitHub' to create it."
-                )
-            elif has_changes:
-                messagebox.showinfo(
-                    "Remote Changed",
-                    "🔔 Remote data has been updated!\n\n"
-                    "Someone else has pushed changes.\n\n"
-                    "Use 'Pull from GitHub' to get the latest data."
-                )
-            else:
-                messagebox.showinfo(
-                    "Up to Date",
-                    "✅ You have the latest data!\n\n"
-                    "No remote changes detected."
-                )
-                
-        except Exception as e:
-            logger.error(f"Check remote failed: {e}")
-            messagebox.showerror("Check Failed", f"Failed to check remote:\n\n{str(e)}")
+        self.sync_worker.request_check(manual=True)
     
     @safe_execute
     def show_sync_settings(self) -> None:
@@ -1538,10 +1820,10 @@ Total Stations: {total_stations}
                 
                 # Update the manager
                 if self.github_sync:
-                    self.github_sync.repo_owner = sync_config['repo_owner']
-                    self.github_sync.repo_name = sync_config['repo_name']
-                    self.github_sync.branch = sync_config['branch']
-                    self.github_sync.data_file_path = sync_config['data_file_path']
+                    self.github_sync.set_location(sync_config['repo_owner'],
+                                                  sync_config['repo_name'],
+                                                  sync_config['data_file_path'],
+                                                  sync_config['branch'])
                     if sync_config['token']:
                         self.github_sync.set_token(sync_config['token'])
                 
@@ -1611,11 +1893,21 @@ Total Stations: {total_stations}
             # Stop auto-save timer
             self.autosave_manager.stop()
             
-            # Force save if there are unsaved changes
-            if self.autosave_manager.has_unsaved_changes:
-                logger.info("Saving unsaved changes before exit...")
-                self._save_data()
-                self.autosave_manager.mark_saved()
+            # Don't wait out a slow network; an unfinished push is retried next start
+            if self.sync_worker:
+                self.sync_worker.stop(timeout=5)
+            
+            # Let queued writes land first; journal_pending is updated by the worker
+            self.persistence.flush()
+            
+            # Force save if there are unsaved changes. Also compact the
+            # journal so the next start loads a single snapshot
+            if self.autosave_manager.has_unsaved_changes or self.data_manager.journal_pending:
+                logger.info("Saving before exit...")
+                self._save_data(full=True)
+            
+            # Block until the last save is on disk
+            self.persistence.stop()
             
             # Close the window
             self.root.destroy()
@@ -1632,6 +1924,7 @@ Total Stations: {total_stations}
 
 def main():
     """Application entry point."""
+    multiprocessing.freeze_support()  # Batch trend workers in the frozen build
     root = tk.Tk()
     app = LRUTrackerApp(root)
     root.mainloop()
@@ -1,16 +1,86 @@
 """Data models for LRU Tracker."""
-from dataclasses import dataclass, field
-from typing import List, Dict, Any
-from datetime import datetime
-from config import TIMESTAMP_FORMAT
+import math
+import operator
+from array import array
+from collections import deque
+from collections.abc import MutableSequence
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Any, Callable, Deque, Iterable, Iterator, Optional, Tuple, Union
+from datetime import datetime, timedelta
+from config import TIMESTAMP_FORMAT, STATS_RECENT_WINDOW
 
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_DEFAULT_FORMAT = TIMESTAMP_FORMAT == "%Y-%m-%d %H:%M:%S"
 
-@dataclass
+
+def parse_timestamp(timestamp: str) -> int:
+    """Convert a TIMESTAMP_FORMAT string to epoch seconds.
+    
+    Timestamps are local wall-clock times without a zone, so the result
+    counts seconds from 1970-01-01 00:00 on that same wall clock.
+    """
+    if _DEFAULT_FORMAT and len(timestamp) == 19:
+        try:
+            dt = datetime(int(timestamp[0:4]), int(timestamp[5:7]), int(timestamp[8:10]),
+                          int(timestamp[11:13]), int(timestamp[14:16]), int(timestamp[17:19]))
+        except ValueError:
+            dt = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    else:
+        dt = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    return datetime_to_epoch(dt)
+
+
+def datetime_to_epoch(dt: datetime) -> int:
+    """Convert a naive datetime to epoch seconds (whole seconds)."""
+    return ((dt.toordinal() - _EPOCH_ORDINAL) * 86400
+            + dt.hour * 3600 + dt.minute * 60 + dt.second)
+
+
+def format_timestamp(epoch: int) -> str:
+    """Convert epoch seconds from parse_timestamp back to TIMESTAMP_FORMAT."""
+    return (_EPOCH + timedelta(seconds=epoch)).strftime(TIMESTAMP_FORMAT)
+
+
+def to_epoch(timestamp: Union[str, int]) -> int:
+    """Accept either epoch seconds or a TIMESTAMP_FORMAT string."""
+    if isinstance(timestamp, int):
+        return timestamp
+    return parse_timestamp(timestamp)
+
+
+def now_epoch() -> int:
+    """Current local wall-clock time as epoch seconds."""
+    return datetime_to_epoch(datetime.now())
+
+
+def epoch_hour(epoch: int) -> int:
+    """Hour of day (0-23) for epoch seconds."""
+    return (epoch // 3600) % 24
+
+
+@dataclass(init=False)
 class HistoryEntry:
-    """Represents a single history entry for LRU count."""
-    timestamp: str
+    """Represents a single history entry for LRU count.
+    
+    The time is kept as epoch seconds; ``timestamp`` formats it on demand
+    for the UI and for JSON.
+    """
+    epoch: int
     count: int
     
+    def __init__(self, timestamp: Union[str, int], count: int):
+        self.epoch = to_epoch(timestamp)
+        self.count = count
+    
+    @property
+    def timestamp(self) -> str:
+        return format_timestamp(self.epoch)
+    
+    @property
+    def hour(self) -> int:
+        return epoch_hour(self.epoch)
+    
     def to_dict(self) -> Dict[str, Any]:
         return {'timestamp': self.timestamp, 'count': self.count}
     
@@ -19,16 +89,435 @@ class HistoryEntry:
         return cls(timestamp=data['timestamp'], count=data['count'])
 
 
+class HistoryColumns(MutableSequence):
+    """Columnar storage for one station's history.
+    
+    Keeps epoch seconds and counts in typed arrays (12 bytes per entry)
+    and hands out HistoryEntry objects on access. Aggregates can scan
+    the epochs/counts arrays directly.
+    """
+    
+    def __init__(self, entries: Iterable[HistoryEntry] = ()):
+        self.epochs = array('q')
+        self.counts = array('i')
+        for entry in entries:
+            self.append(entry)
+    
+    def __len__(self) -> int:
+        return len(self.counts)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [HistoryEntry(e, c) for e, c in zip(self.epochs[index], self.counts[index])]
+        return HistoryEntry(self.epochs[index], self.counts[index])
+    
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        for epoch, count in zip(self.epochs, self.counts):
+            yield HistoryEntry(epoch, count)
+    
+    def __setitem__(self, index, value: HistoryEntry) -> None:
+        if isinstance(index, slice):
+            raise TypeError("slice assignment is not supported")
+        self.epochs[index] = value.epoch
+        self.counts[index] = value.count
+    
+    def __delitem__(self, index) -> None:
+        del self.epochs[index]
+        del self.counts[index]
+    
+    def insert(self, index: int, value: HistoryEntry) -> None:
+        self.epochs.insert(index, value.epoch)
+        self.counts.insert(index, value.count)
+    
+    def append(self, value: HistoryEntry) -> None:
+        self.append_values(value.epoch, value.count)
+    
+    def append_values(self, epoch: int, count: int) -> None:
+        """Append without building a HistoryEntry."""
+        self.epochs.append(epoch)
+        self.counts.append(count)
+    
+    def copy(self) -> 'HistoryColumns':
+        """Independent copy; the column arrays are copied in bulk."""
+        clone = HistoryColumns()
+        clone.epochs = array('q', self.epochs)
+        clone.counts = array('i', self.counts)
+        return clone
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, HistoryColumns):
+            return self.epochs == other.epochs and self.counts == other.counts
+        if isinstance(other, (MutableSequence, list)):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Serialize entries as dicts for JSON."""
+        return [{'timestamp': format_timestamp(e), 'count': c}
+                for e, c in zip(self.epochs, self.counts)]
+
+
+def _first_raw_timestamp(items: Iterable[Dict[str, Any]]) -> Optional[str]:
+    """Timestamp of the first well-formed raw history entry in items."""
+    for item in items:
+        try:
+            return format_timestamp(parse_timestamp(item['timestamp']))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+class LazyHistory(MutableSequence):
+    """Station history that is only materialized when first accessed.
+
+    Backed either by the raw list of dicts read from JSON or by a loader
+    callable (e.g. a database query). len() and to_list() are answered
+    from the raw data without building HistoryEntry objects.
+    """
+
+    def __init__(self, entries: Optional[Iterable[HistoryEntry]] = None,
+                 raw: Optional[List[Dict[str, Any]]] = None,
+                 loader: Optional[Callable[[], List[HistoryEntry]]] = None,
+                 length: Optional[int] = None,
+                 source: Any = None,
+                 last: Optional[str] = None):
+        self._entries = HistoryColumns(entries) if entries is not None else None
+        self._raw = raw
+        self._loader = loader
+        self._length = length
+        self._last = last  # Last timestamp, if the loader's backend knows it
+        self.source = source  # Backend the loader reads from, if any
+        if entries is None and raw is None and loader is None:
+            self._entries = HistoryColumns()
+
+    @property
+    def is_loaded(self) -> bool:
+        """True once HistoryEntry objects have been built."""
+        return self._entries is not None
+
+    def _load(self) -> HistoryColumns:
+        if self._entries is None:
+            if self._raw is not None:
+                entries = HistoryColumns()
+                for item in self._raw:
+                    try:
+                        entries.append_values(parse_timestamp(item['timestamp']),
+                                              item['count'])
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                self._entries = entries
+            else:
+                self._entries = HistoryColumns(self._loader())
+            self._raw = None
+            self._loader = None
+        return self._entries
+
+    def __len__(self) -> int:
+        if self._entries is not None:
+            return len(self._entries)
+        if self._raw is not None:
+            return len(self._raw)
+        if self._length is not None:
+            return self._length
+        return len(self._load())
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        return iter(self._load())
+
+    def __getitem__(self, index):
+        return self._load()[index]
+
+    def __setitem__(self, index, value) -> None:
+        self._load()[index] = value
+
+    def __delitem__(self, index) -> None:
+        del self._load()[index]
+
+    def insert(self, index: int, value: HistoryEntry) -> None:
+        self._load().insert(index, value)
+
+    def append(self, value: HistoryEntry) -> None:
+        self._load().append(value)
+
+    @property
+    def epochs(self) -> array:
+        """Epoch seconds column (loads history)."""
+        return self._load().epochs
+
+    @property
+    def counts(self) -> array:
+        """Counts column (loads history)."""
+        return self._load().counts
+
+    def copy(self) -> 'LazyHistory':
+        """Copy that later appends to either side don't affect.
+
+        Unloaded history shares the raw list or loader, which are never
+        mutated, so copying it stays cheap.
+        """
+        clone = LazyHistory(raw=self._raw, loader=self._loader,
+                            length=self._length, source=self.source, last=self._last)
+        if self._entries is not None:
+            clone._entries = self._entries.copy()
+        return clone
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (MutableSequence, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        if self._entries is None:
+            return f"LazyHistory(<{len(self)} entries not loaded>)"
+        return f"LazyHistory({list(self._entries)!r})"
+
+    def first_timestamp(self) -> Optional[str]:
+        """Timestamp of the first entry (None if empty), without loading if possible."""
+        if self._entries is None:
+            if self._raw is not None:
+                return _first_raw_timestamp(self._raw)
+            if self._length == 0:
+                return None
+        entries = self._load()
+        return format_timestamp(entries.epochs[0]) if len(entries) else None
+
+    def last_timestamp(self) -> Optional[str]:
+        """Timestamp of the last entry (None if empty), without loading if possible."""
+        if self._entries is None:
+            if self._raw is not None:
+                return _first_raw_timestamp(reversed(self._raw))
+            if self._last is not None or self._length == 0:
+                return self._last
+        entries = self._load()
+        return format_timestamp(entries.epochs[-1]) if len(entries) else None
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Serialize for JSON without materializing raw-backed history."""
+        if self._entries is None and self._raw is not None:
+            return list(self._raw)
+        return self._load().to_list()
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """Aggregate of a station's counts over one hour or one day.
+    
+    Written by the retention policy (see retention.py) when raw history
+    ages out. The sum is kept rather than the average so buckets can be
+    combined exactly.
+    """
+    start: int          # Epoch seconds at the start of the bucket
+    min_count: int
+    max_count: int
+    total: int
+    last: int           # Latest count in the bucket
+    samples: int
+    
+    @property
+    def avg(self) -> float:
+        return self.total / self.samples if self.samples else 0.0
+    
+    @property
+    def timestamp(self) -> str:
+        return format_timestamp(self.start)
+    
+    def combine(self, later: 'Rollup', start: Optional[int] = None) -> 'Rollup':
+        """Aggregate of this bucket followed by a later one."""
+        return Rollup(
+            start=self.start if start is None else start,
+            min_count=min(self.min_count, later.min_count),
+            max_count=max(self.max_count, later.max_count),
+            total=self.total + later.total,
+            last=later.last,
+            samples=self.samples + later.samples
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {'timestamp': self.timestamp, 'min': self.min_count, 'max': self.max_count,
+                'sum': self.total, 'last': self.last, 'samples': self.samples}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Rollup':
+        return cls(start=to_epoch(data['timestamp']), min_count=data['min'],
+                   max_count=data['max'], total=data['sum'], last=data['last'],
+                   samples=data['samples'])
+
+
+def rollups_from_list(data: Any) -> List[Rollup]:
+    """Parse serialized rollups, skipping malformed items."""
+    rollups = []
+    for item in data if isinstance(data, list) else []:
+        try:
+            rollups.append(Rollup.from_dict(item))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return rollups
+
+
+def status_tag(count: int, min_lru: int, max_lru: int) -> str:
+    """'under_min', 'at_max' or 'normal' for a count against limits."""
+    if count < min_lru:
+        return 'under_min'
+    elif count >= max_lru:
+        return 'at_max'
+    return 'normal'
+
+
+@dataclass
+class StationStats:
+    """Running aggregates of every count a station has recorded.
+    
+    Updated in O(1) per count, so averages, spread and time in status
+    never need a pass over history. Counts later rolled up by retention
+    or moved to the history archive stay included.
+    """
+    count: int = 0
+    total: int = 0
+    total_sq: int = 0
+    min_count: Optional[int] = None
+    max_count: Optional[int] = None
+    recent: Deque[int] = field(default_factory=lambda: deque(maxlen=STATS_RECENT_WINDOW))
+    # Seconds spent in each status tag, up to last_epoch
+    status_seconds: Dict[str, int] = field(default_factory=dict)
+    last_epoch: Optional[int] = None
+    last_status: Optional[str] = None
+    
+    def add(self, count: int, epoch: int, status: str) -> None:
+        """Fold in one count recorded at epoch with the given status tag."""
+        self.count += 1
+        self.total += count
+        self.total_sq += count * count
+        self.min_count = count if self.min_count is None else min(self.min_count, count)
+        self.max_count = count if self.max_count is None else max(self.max_count, count)
+        self.recent.append(count)
+        if self.last_epoch is not None and epoch < self.last_epoch:
+            return  # Late arrival: counted, but the status timeline stays put
+        if self.last_status is not None:
+            self.status_seconds[self.last_status] = \
+                self.status_seconds.get(self.last_status, 0) + epoch - self.last_epoch
+        self.last_epoch = epoch
+        self.last_status = status
+    
+    def add_rollup(self, rollup: 'Rollup') -> None:
+        """Fold in a rollup (when rebuilding from rolled-up history).
+        
+        Rollups don't keep squares, so their counts are taken to sit at
+        the bucket average for the variance.
+        """
+        self.count += rollup.samples
+        self.total += rollup.total
+        self.total_sq += round(rollup.total * rollup.avg)
+        self.min_count = rollup.min_count if self.min_count is None else \
+            min(self.min_count, rollup.min_count)
+        self.max_count = rollup.max_count if self.max_count is None else \
+            max(self.max_count, rollup.max_count)
+    
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+    
+    @property
+    def variance(self) -> float:
+        """Population variance of all counts."""
+        if not self.count:
+            return 0.0
+        return max(0.0, self.total_sq / self.count - self.mean ** 2)
+    
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+    
+    @property
+    def recent_mean(self) -> float:
+        """Average of the last STATS_RECENT_WINDOW counts."""
+        return sum(self.recent) / len(self.recent) if self.recent else 0.0
+    
+    def time_in_status(self, now: Optional[int] = None) -> Dict[str, int]:
+        """Seconds per status tag, counting the current status up to now."""
+        seconds = dict(self.status_seconds)
+        if now is not None and self.last_status is not None and now > self.last_epoch:
+            seconds[self.last_status] = seconds.get(self.last_status, 0) + now - self.last_epoch
+        return seconds
+    
+    def copy(self) -> 'StationStats':
+        return replace(self, recent=deque(self.recent, maxlen=self.recent.maxlen),
+                       status_seconds=dict(self.status_seconds))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {'count': self.count, 'sum': self.total, 'sumsq': self.total_sq,
+                'min': self.min_count, 'max': self.max_count, 'recent': list(self.recent),
+                'status_seconds': self.status_seconds,
+                'last': None if self.last_epoch is None else format_timestamp(self.last_epoch),
+                'last_status': self.last_status}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StationStats':
+        last = data.get('last')
+        return cls(count=data['count'], total=data['sum'], total_sq=data['sumsq'],
+                   min_count=data.get('min'), max_count=data.get('max'),
+                   recent=deque(data.get('recent', []), maxlen=STATS_RECENT_WINDOW),
+                   status_seconds=dict(data.get('status_seconds', {})),
+                   last_epoch=None if last is None else to_epoch(last),
+                   last_status=data.get('last_status'))
+    
+    @classmethod
+    def for_station(cls, station: 'Station') -> 'StationStats':
+        """Rebuild from a station's rollups and raw history."""
+        stats = cls()
+        for rollup in station.daily + station.hourly:
+            stats.add_rollup(rollup)
+        history = station.history
+        if history.is_loaded:
+            entries = zip(history.epochs, history.counts)
+        else:
+            # Straight from the raw dicts, leaving lazy history unloaded
+            entries = _raw_entries(history.to_list())
+        for epoch, count in sorted(entries):
+            stats.add(count, epoch, status_tag(count, station.min_lru, station.max_lru))
+        return stats
+
+
+def _raw_entries(items: Iterable[Dict]) -> Iterator[Tuple[int, int]]:
+    """(epoch, count) of raw history dicts, skipping malformed ones like LazyHistory."""
+    for item in items:
+        try:
+            yield to_epoch(item['timestamp']), operator.index(item['count'])
+        except (KeyError, TypeError, ValueError):
+            continue
+
+
+def stats_from_dict(data: Any) -> Optional[StationStats]:
+    """Parse serialized stats (None if missing or malformed)."""
+    if not isinstance(data, dict):
+        return None
+    try:
+        return StationStats.from_dict(data)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
 @dataclass
 class Station:
-    """Represents an LRU station."""
+    """Represents an LRU station.
+    
+    history holds raw count updates; hourly and daily hold rollups of
+    history that has aged out of the raw retention window.
+    """
     name: str
     current: int
     min_lru: int
     max_lru: int
-    history: List[HistoryEntry] = field(default_factory=list)
+    history: LazyHistory = field(default_factory=LazyHistory)
     test_description: str = ""
     rack_location: str = ""
+    hourly: List[Rollup] = field(default_factory=list)
+    daily: List[Rollup] = field(default_factory=list)
+    # Built from history on first use when not loaded; see stats
+    _stats: Optional[StationStats] = field(default=None, repr=False, compare=False)
+    
+    def __post_init__(self):
+        if not isinstance(self.history, LazyHistory):
+            self.history = LazyHistory(entries=list(self.history))
     
     def get_status(self) -> str:
         """Get status string based on current count."""
@@ -40,54 +529,115 @@ class Station:
     
     def get_status_tag(self) -> str:
         """Get status tag for UI coloring."""
-        if self.current < self.min_lru:
-            return 'under_min'
-        elif self.current >= self.max_lru:
-            return 'at_max'
-        return 'normal'
+        return status_tag(self.current, self.min_lru, self.max_lru)
     
-    def add_history(self, count: int, timestamp: str = None) -> None:
+    @property
+    def stats(self) -> StationStats:
+        """Running aggregates over everything recorded for the station."""
+        if self._stats is None:
+            self._stats = StationStats.for_station(self)
+        return self._stats
+    
+    @property
+    def has_stats(self) -> bool:
+        """True when stats are known without building them from history."""
+        return self._stats is not None
+    
+    def restore_stats(self, data: Any) -> None:
+        """Adopt serialized stats; missing or malformed ones are rebuilt on use."""
+        self._stats = stats_from_dict(data)
+    
+    def add_history(self, count: int, timestamp: Union[str, int, None] = None) -> None:
         """Add a history entry."""
         if timestamp is None:
-            timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
-        self.history.append(HistoryEntry(timestamp, count))
+            timestamp = now_epoch()
+        entry = HistoryEntry(timestamp, count)
+        self.history.append(entry)
         self.current = count
+        if self._stats is not None:
+            self._stats.add(count, entry.epoch, status_tag(count, self.min_lru, self.max_lru))
+    
+    def copy(self) -> 'Station':
+        """Copy with its own history, safe to serialize on another thread."""
+        return replace(self, history=self.history.copy(),
+                       hourly=list(self.hourly), daily=list(self.daily),
+                       _stats=None if self._stats is None else self._stats.copy())
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
-        return {
+        data = self.settings_dict()
+        data['history'] = self.history.to_list()
+        data['stats'] = self.stats.to_dict()
+        return data
+    
+    def settings_dict(self) -> Dict[str, Any]:
+        """to_dict without history and stats; never loads history."""
+        data = {
             'current': self.current,
             'min': self.min_lru,
             'max': self.max_lru,
-            'history': [h.to_dict() for h in self.history],
             'test_description': self.test_description,
             'rack_location': self.rack_location
         }
+        # Rollup tiers only once retention has produced any
+        if self.hourly:
+            data['hourly'] = [rollup.to_dict() for rollup in self.hourly]
+        if self.daily:
+            data['daily'] = [rollup.to_dict() for rollup in self.daily]
+        return data
     
     @classmethod
     def from_dict(cls, name: str, data: Dict[str, Any]) -> 'Station':
-        """Create Station from dictionary."""
-        history = [HistoryEntry.from_dict(h) for h in data.get('history', [])]
-        return cls(
+        """Create Station from dictionary.
+        
+        History is kept as raw dicts until first accessed, so loading only
+        pays for the current-state fields.
+        """
+        raw_history = data.get('history', [])
+        history = LazyHistory(raw=raw_history if isinstance(raw_history, list) else [])
+        station = cls(
             name=name,
             current=data.get('current', 0),
             min_lru=data.get('min', 5),
             max_lru=data.get('max', 20),
             history=history,
             test_description=data.get('test_description', ''),
-            rack_location=data.get('rack_location', '')
+            rack_location=data.get('rack_location', ''),
+            hourly=rollups_from_list(data.get('hourly')),
+            daily=rollups_from_list(data.get('daily'))
         )
+        station.restore_stats(data.get('stats'))
+        return station
 
 
-@dataclass
+@dataclass(init=False)
 class GlobalHistoryEntry:
-    """Represents a global history entry across all stations."""
+    """Represents a global history entry across all stations.
+    
+    Like HistoryEntry, the time is stored as epoch seconds.
+    """
     station: str
-    timestamp: str
+    epoch: int
     count: int
     min_lru: int
     max_lru: int
     
+    def __init__(self, station: str, timestamp: Union[str, int], count: int,
+                 min_lru: int, max_lru: int):
+        self.station = station
+        self.epoch = to_epoch(timestamp)
+        self.count = count
+        self.min_lru = min_lru
+        self.max_lru = max_lru
+    
+    @property
+    def timestamp(self) -> str:
+        return format_timestamp(self.epoch)
+    
+    @property
+    def hour(self) -> int:
+        return epoch_hour(self.epoch)
+    
     def to_dict(self) -> Dict[str, Any]:
         return {
             'station': self.station,
@@ -106,3 +656,134 @@ class GlobalHistoryEntry:
             min_lru=data['min'],
             max_lru=data['max']
         )
+
+
+class GlobalHistoryLog(MutableSequence):
+    """Columnar global history across all stations.
+    
+    Station names are interned to small integer ids, and each row is
+    stored as five typed-array columns instead of a dataclass instance.
+    Reading yields GlobalHistoryEntry objects, so callers can keep using
+    list-style iteration, indexing and append.
+    """
+    
+    def __init__(self, entries: Iterable[GlobalHistoryEntry] = ()):
+        self.station_names: List[str] = []
+        self._station_ids: Dict[str, int] = {}
+        self.station_ids = array('i')
+        self.epochs = array('q')
+        self.counts = array('i')
+        self.mins = array('i')
+        self.maxes = array('i')
+        for entry in entries:
+            self.append(entry)
+    
+    def intern_station(self, name: str) -> int:
+        """Return the id for a station name, assigning one if new."""
+        station_id = self._station_ids.get(name)
+        if station_id is None:
+            station_id = len(self.station_names)
+            self.station_names.append(name)
+            self._station_ids[name] = station_id
+        return station_id
+    
+    def _entry(self, index: int) -> GlobalHistoryEntry:
+        return GlobalHistoryEntry(
+            station=self.station_names[self.station_ids[index]],
+            timestamp=self.epochs[index],
+            count=self.counts[index],
+            min_lru=self.mins[index],
+            max_lru=self.maxes[index]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.counts)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._entry(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+        return self._entry(index)
+    
+    def __iter__(self) -> Iterator[GlobalHistoryEntry]:
+        names = self.station_names
+        for sid, epoch, count, min_lru, max_lru in zip(
+                self.station_ids, self.epochs, self.counts, self.mins, self.maxes):
+            yield GlobalHistoryEntry(station=names[sid], timestamp=epoch,
+                                     count=count, min_lru=min_lru, max_lru=max_lru)
+    
+    def __setitem__(self, index, value: GlobalHistoryEntry) -> None:
+        if isinstance(index, slice):
+            raise TypeError("slice assignment is not supported")
+        self.station_ids[index] = self.intern_station(value.station)
+        self.epochs[index] = value.epoch
+        self.counts[index] = value.count
+        self.mins[index] = value.min_lru
+        self.maxes[index] = value.max_lru
+    
+    def __delitem__(self, index) -> None:
+        for column in (self.station_ids, self.epochs, self.counts, self.mins, self.maxes):
+            del column[index]
+    
+    def insert(self, index: int, value: GlobalHistoryEntry) -> None:
+        self.station_ids.insert(index, self.intern_station(value.station))
+        self.epochs.insert(index, value.epoch)
+        self.counts.insert(index, value.count)
+        self.mins.insert(index, value.min_lru)
+        self.maxes.insert(index, value.max_lru)
+    
+    def append(self, value: GlobalHistoryEntry) -> None:
+        self.append_values(value.station, value.epoch,
+                           value.count, value.min_lru, value.max_lru)
+    
+    def append_values(self, station: str, epoch: int, count: int,
+                      min_lru: int, max_lru: int) -> None:
+        """Append a row without building a GlobalHistoryEntry."""
+        self.station_ids.append(self.intern_station(station))
+        self.epochs.append(epoch)
+        self.counts.append(count)
+        self.mins.append(min_lru)
+        self.maxes.append(max_lru)
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (MutableSequence, list)):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    def copy(self) -> 'GlobalHistoryLog':
+        """Independent copy; the column arrays are copied in bulk."""
+        clone = GlobalHistoryLog()
+        clone.station_names = list(self.station_names)
+        clone._station_ids = dict(self._station_ids)
+        for column in ('station_ids', 'epochs', 'counts', 'mins', 'maxes'):
+            source = getattr(self, column)
+            setattr(clone, column, array(source.typecode, source))
+        return clone
+    
+    def drop_before(self, epoch: int) -> int:
+        """Remove rows older than epoch; returns how many were removed."""
+        keep = [i for i, e in enumerate(self.epochs) if e >= epoch]
+        removed = len(self) - len(keep)
+        if removed:
+            for column in ('station_ids', 'epochs', 'counts', 'mins', 'maxes'):
+                source = getattr(self, column)
+                setattr(self, column, array(source.typecode, (source[i] for i in keep)))
+        return removed
+    
+    def iter_rows(self) -> Iterator[tuple]:
+        """Yield (station, timestamp, count, min, max) tuples for exports."""
+        names = self.station_names
+        for sid, epoch, count, min_lru, max_lru in zip(
+                self.station_ids, self.epochs, self.counts, self.mins, self.maxes):
+            yield names[sid], format_timestamp(epoch), count, min_lru, max_lru
+    
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Serialize rows as dicts for JSON."""
+        names = self.station_names
+        return [{'station': names[sid], 'timestamp': format_timestamp(epoch),
+                 'count': count, 'min': min_lru, 'max': max_lru}
+                for sid, epoch, count, min_lru, max_lru in zip(
+                    self.station_ids, self.epochs, self.counts, self.mins, self.maxes)]
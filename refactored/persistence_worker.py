@@ -0,0 +1,186 @@
+"""Background writer for all data persistence.
+
+Every save and journal append goes through one worker thread, in the
+order requested, so the Tk event loop never waits on disk and the
+storage backend is only ever used from a single thread. Other disk work
+on the same data (e.g. history archive maintenance) is queued with
+run_task() so it stays in order with the saves.
+"""
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from models import Station, GlobalHistoryEntry
+from state_store import StoreSnapshot, copy_state
+from data_manager import update_record
+from logger import get_logger
+
+logger = get_logger()
+
+SAVE = 'save'
+APPEND = 'append'
+TASK = 'task'
+
+# (kind, payload) - payload is a (stations, history) snapshot, a list
+# of journal records or a (func, on_done, on_error) task
+Job = Tuple[str, object]
+
+
+class PersistenceWorker:
+    """Single background thread that performs saves and journal appends.
+
+    request_save() snapshots the data on the calling thread and queues it.
+    A save still waiting in the queue is replaced by a newer one instead
+    of being written twice, unless journal appends were queued after it
+    (the snapshot's journal position must match what has been written).
+
+    Callbacks run on the worker thread; UI code should hand them to the
+    Tk loop with root.after().
+    """
+
+    def __init__(self, data_manager,
+                 on_error: Optional[Callable[[str, Exception], None]] = None,
+                 on_checkpoint: Optional[Callable[[], None]] = None,
+                 on_saved: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            data_manager: Storage backend (DataManager or SQLiteDataManager)
+            on_error: Called with (job kind, exception) when a write fails
+            on_checkpoint: Called when the journal asks for a full save
+            on_saved: Called after each successful save
+        """
+        self.data_manager = data_manager
+        self.on_error = on_error
+        self.on_checkpoint = on_checkpoint
+        self.on_saved = on_saved
+
+        self._jobs: Deque[Job] = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stopping = False
+        self.saves_written = 0
+        self.saves_coalesced = 0
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Jobs queued or in progress."""
+        with self._cond:
+            return len(self._jobs) + (1 if self._busy else 0)
+
+    def request_save(self, stations: Dict[str, Station],
+                     history: List[GlobalHistoryEntry]) -> None:
+        """Queue a full save of a copy taken now."""
+        self._queue_save(copy_state(stations, history))
+
+    def save_snapshot(self, snapshot: StoreSnapshot) -> None:
+        """Queue a full save of a store snapshot (already a copy)."""
+        self._queue_save((snapshot.stations, snapshot.history))
+
+    def _queue_save(self, data: Tuple[Dict[str, Station], List]) -> None:
+        with self._cond:
+            self._check_running()
+            if self._jobs and self._jobs[-1][0] == SAVE:
+                self._jobs[-1] = (SAVE, data)
+                self.saves_coalesced += 1
+            else:
+                self._jobs.append((SAVE, data))
+            self._cond.notify_all()
+
+    def append_update(self, entry: GlobalHistoryEntry) -> None:
+        """Queue a journal append for a single count update."""
+        self.append_records([update_record(entry)])
+
+    def append_records(self, records: List[dict]) -> None:
+        """Queue change records (a store's take_changes()) for the journal."""
+        with self._cond:
+            self._check_running()
+            self._jobs.append((APPEND, records))
+            self._cond.notify_all()
+
+    def run_task(self, func: Callable[[], object],
+                 on_done: Optional[Callable[[object], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None) -> None:
+        """Queue func to run on the worker thread after the jobs before it.
+
+        on_done gets its return value and on_error the exception it
+        raised; both are called on the worker thread. A failed task is
+        not a failed save, so the worker's own on_error isn't called.
+        """
+        with self._cond:
+            self._check_running()
+            self._jobs.append((TASK, (func, on_done, on_error)))
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued job is written; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._jobs and not self._busy, timeout)
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """Write everything still queued, then stop the thread.
+
+        Returns False if the queue did not drain within timeout.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _check_running(self) -> None:
+        if self._stopping:
+            raise RuntimeError("Persistence worker is stopped")
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._jobs or self._stopping)
+                if not self._jobs:
+                    return  # Stopping and drained
+                job = self._jobs.popleft()
+                self._busy = True
+            try:
+                self._perform(job)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _perform(self, job: Job) -> None:
+        kind, payload = job
+        if kind == TASK:
+            self._perform_task(*payload)
+            return
+        try:
+            if kind == SAVE:
+                stations, history = payload
+                self.data_manager.save_data(stations, history)
+                self.saves_written += 1
+                self._notify(self.on_saved)
+            elif self.data_manager.append_records(payload):
+                self._notify(self.on_checkpoint)
+        except Exception as e:
+            logger.error(f"Background {kind} failed: {e}")
+            self._notify(self.on_error, kind, e)
+
+    def _perform_task(self, func: Callable[[], object], on_done: Optional[Callable],
+                      on_error: Optional[Callable]) -> None:
+        try:
+            result = func()
+        except Exception as e:
+            logger.error(f"Background task failed: {e}")
+            self._notify(on_error, e)
+            return
+        self._notify(on_done, result)
+
+    @staticmethod
+    def _notify(callback: Optional[Callable], *args) -> None:
+        # A failing callback (e.g. the window is already gone) must not
+        # take the worker thread down with it
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.warning(f"Persistence callback failed: {e}")
@@ -0,0 +1,196 @@
+"""Tiered history retention.
+
+History is kept in three tiers per station:
+
+    raw     every count update, for RETENTION_RAW_DAYS
+    hourly  one Rollup per hour, for RETENTION_HOURLY_DAYS
+    daily   one Rollup per day, kept indefinitely
+
+RetentionPolicy.apply() moves raw entries past the raw window into
+hourly rollups and hourly rollups past the hourly window into daily
+ones, and drops the matching global history rows. Rollups keep min,
+max, sum, last and sample count, so the trend report and FC schedule
+can still read old periods (see trend_points() and TimeSlotBucketer).
+With a history archive, HistoryArchive.apply_retention() does the same
+for whole archived months instead.
+"""
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, List, Optional, Union
+from models import (Station, HistoryEntry, GlobalHistoryLog, LazyHistory, Rollup,
+                    format_timestamp)
+from config import RETENTION_RAW_DAYS, RETENTION_HOURLY_DAYS
+from logger import get_logger
+
+logger = get_logger()
+
+HOUR = 3600
+DAY = 86400
+
+RAW = 'raw'
+HOURLY = 'hourly'
+DAILY = 'daily'
+
+
+@dataclass
+class RetentionResult:
+    """What one apply() run changed."""
+    stations: List[str] = field(default_factory=list)
+    rolled_entries: int = 0     # Raw entries folded into hourly rollups
+    rolled_hours: int = 0       # Hourly rollups folded into daily ones
+    dropped_rows: int = 0       # Global history rows removed
+
+    def __bool__(self) -> bool:
+        return bool(self.stations or self.dropped_rows)
+
+
+def merge_rollups(existing: List[Rollup], new: Iterable[Rollup]) -> List[Rollup]:
+    """Add rollups to a tier, combining buckets that share a start."""
+    by_start = {rollup.start: rollup for rollup in existing}
+    for rollup in new:
+        earlier = by_start.get(rollup.start)
+        by_start[rollup.start] = earlier.combine(rollup) if earlier else rollup
+    return [by_start[start] for start in sorted(by_start)]
+
+
+def hourly_rollups(epochs: Iterable[int], counts: Iterable[int]) -> List[Rollup]:
+    """Roll (epoch, count) pairs in time order into hourly rollups."""
+    return _bucket(epochs, counts, HOUR)
+
+
+def _bucket(epochs: Iterable[int], counts: Iterable[int], size: int) -> List[Rollup]:
+    """Roll (epoch, count) pairs in time order into buckets of size seconds."""
+    buckets: Dict[int, Rollup] = {}
+    for epoch, count in zip(epochs, counts):
+        start = epoch - epoch % size
+        single = Rollup(start, count, count, count, count, 1)
+        earlier = buckets.get(start)
+        buckets[start] = earlier.combine(single) if earlier else single
+    return list(buckets.values())
+
+
+def daily_rollups(hourly: Iterable[Rollup]) -> List[Rollup]:
+    """Combine hourly rollups into daily ones."""
+    days: Dict[int, Rollup] = {}
+    for rollup in hourly:
+        start = rollup.start - rollup.start % DAY
+        earlier = days.get(start)
+        days[start] = earlier.combine(rollup, start) if earlier else replace(rollup, start=start)
+    return list(days.values())
+
+
+class RetentionPolicy:
+    """Ages station history out of the raw and hourly tiers.
+
+    A window of None keeps that tier forever.
+    """
+
+    def __init__(self, raw_days: Optional[float] = RETENTION_RAW_DAYS,
+                 hourly_days: Optional[float] = RETENTION_HOURLY_DAYS):
+        self.raw_days = raw_days
+        self.hourly_days = hourly_days
+
+    def raw_cutoff(self, now: int) -> Optional[int]:
+        """Oldest epoch kept raw (aligned to an hour, so no hour is split)."""
+        if self.raw_days is None:
+            return None
+        cutoff = now - int(self.raw_days * DAY)
+        return cutoff - cutoff % HOUR
+
+    def hourly_cutoff(self, now: int) -> Optional[int]:
+        """Oldest hour kept hourly (aligned to a day)."""
+        if self.hourly_days is None:
+            return None
+        cutoff = now - int(self.hourly_days * DAY)
+        return cutoff - cutoff % DAY
+
+    def apply(self, stations: Dict[str, Station], history: GlobalHistoryLog,
+              now: int) -> RetentionResult:
+        """Roll up aged history in place."""
+        result = RetentionResult()
+        raw_cutoff = self.raw_cutoff(now)
+        hourly_cutoff = self.hourly_cutoff(now)
+
+        for name, station in stations.items():
+            rolled = 0
+            hours = 0
+            if raw_cutoff is not None and station.history:
+                rolled = self._roll_raw(station, raw_cutoff)
+            if hourly_cutoff is not None and station.hourly and \
+                    station.hourly[0].start < hourly_cutoff:
+                hours = self._roll_hourly(station, hourly_cutoff)
+            if rolled or hours:
+                result.stations.append(name)
+                result.rolled_entries += rolled
+                result.rolled_hours += hours
+
+        if raw_cutoff is not None and isinstance(history, GlobalHistoryLog):
+            result.dropped_rows = history.drop_before(raw_cutoff)
+
+        if result:
+            logger.info(f"Retention: rolled {result.rolled_entries} entries and "
+                        f"{result.rolled_hours} hourly rollups for {len(result.stations)} "
+                        f"stations, dropped {result.dropped_rows} history rows")
+        return result
+
+    @staticmethod
+    def _roll_raw(station: Station, cutoff: int) -> int:
+        epochs, counts = station.history.epochs, station.history.counts
+        old = [i for i, epoch in enumerate(epochs) if epoch < cutoff]
+        if not old:
+            return 0
+        station.stats  # Build stats while every raw count is still here
+        station.hourly = merge_rollups(
+            station.hourly, hourly_rollups((epochs[i] for i in old), (counts[i] for i in old)))
+        station.history = LazyHistory(entries=[
+            HistoryEntry(epoch, count) for epoch, count in zip(epochs, counts)
+            if epoch >= cutoff])
+        return len(old)
+
+    @staticmethod
+    def _roll_hourly(station: Station, cutoff: int) -> int:
+        old = [r for r in station.hourly if r.start < cutoff]
+        station.daily = merge_rollups(station.daily, daily_rollups(old))
+        station.hourly = [r for r in station.hourly if r.start >= cutoff]
+        return len(old)
+
+
+@dataclass(frozen=True)
+class TrendPoint:
+    """One point of a station's timeline, from whichever tier covers it."""
+    epoch: int
+    value: Union[int, float]    # The count, or the bucket average
+    low: int
+    high: int
+    samples: int
+    tier: str
+
+    @property
+    def label(self) -> str:
+        """Timestamp text, marking averaged points."""
+        if self.tier == HOURLY:
+            return format_timestamp(self.epoch)[:16] + " (hourly avg)"
+        if self.tier == DAILY:
+            return format_timestamp(self.epoch)[:10] + " (daily avg)"
+        return format_timestamp(self.epoch)
+
+
+def trend_points(station: Station) -> List[TrendPoint]:
+    """The station's full timeline: daily, then hourly, then raw points."""
+    points = [TrendPoint(r.start, r.avg, r.min_count, r.max_count, r.samples, tier)
+              for tier, rollups in ((DAILY, station.daily), (HOURLY, station.hourly))
+              for r in rollups]
+    history = station.history
+    if history:
+        points.extend(TrendPoint(epoch, count, count, count, 1, RAW)
+                      for epoch, count in zip(history.epochs, history.counts))
+    return points
+
+
+def summarize(points: List[TrendPoint]):
+    """(average, min, max, samples) over points, weighting rollups by samples."""
+    samples = sum(p.samples for p in points)
+    if not samples:
+        return 0.0, 0, 0, 0
+    total = sum(p.value * p.samples for p in points)
+    return (total / samples, min(p.low for p in points),
+            max(p.high for p in points), samples)
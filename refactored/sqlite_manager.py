@@ -0,0 +1,373 @@
+"""SQLite storage backend for stations and history.
+
+Drop-in alternative to the JSON DataManager (see STORAGE_BACKEND in
+config.py). Count updates are single-row inserts and history can be
+queried per station and time window without loading everything.
+"""
+import json
+import os
+import sqlite3
+from contextlib import closing
+from itertools import chain
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple
+from models import (Station, StationStats, HistoryEntry, GlobalHistoryEntry, GlobalHistoryLog,
+                    LazyHistory, Rollup, parse_timestamp, status_tag)
+from config import DATA_FILE, SQLITE_DATA_FILE, HISTORY_ARCHIVE_DIR
+from data_manager import DataManager, DataLoadError, DataSaveError, update_record
+from logger import get_logger
+
+logger = get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stations (
+    name TEXT PRIMARY KEY,
+    current INTEGER NOT NULL,
+    min_lru INTEGER NOT NULL,
+    max_lru INTEGER NOT NULL,
+    test_description TEXT NOT NULL DEFAULT '',
+    rack_location TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS station_history (
+    id INTEGER PRIMARY KEY,
+    station TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_station_history_station_ts
+    ON station_history (station, timestamp);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    station TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    min_lru INTEGER NOT NULL,
+    max_lru INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_station_ts ON history (station, timestamp);
+CREATE INDEX IF NOT EXISTS idx_history_ts ON history (timestamp);
+CREATE TABLE IF NOT EXISTS station_rollups (
+    station TEXT NOT NULL,
+    tier TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    min_count INTEGER NOT NULL,
+    max_count INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    last INTEGER NOT NULL,
+    samples INTEGER NOT NULL,
+    PRIMARY KEY (station, tier, timestamp)
+);
+CREATE TABLE IF NOT EXISTS station_stats (
+    station TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+ROLLUP_TIERS = ('hourly', 'daily')
+
+
+class SQLiteDataManager:
+    """Persists stations and history in a SQLite database."""
+
+    # Every update is its own durable insert, so callers can use
+    # append_update exactly like the JSON journal.
+    journaled = True
+    journal_pending = False
+    # History windows are queried from the database; nothing is archived
+    archive = None
+
+    def __init__(self, db_file: str = SQLITE_DATA_FILE):
+        self.db_file = db_file
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file)
+        if not self._schema_ready:
+            conn.executescript(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def load_data(self) -> Tuple[Dict[str, Station], GlobalHistoryLog]:
+        """Load all stations and global history.
+
+        Per-station history is not read here; each station gets a lazy
+        history that queries its own rows on first access.
+        """
+        if not os.path.exists(self.db_file):
+            return {}, GlobalHistoryLog()
+
+        try:
+            with closing(self._connect()) as conn:
+                counts = {}
+                last = {}
+                for name, count, latest in conn.execute(
+                        "SELECT station, COUNT(*), MAX(timestamp) FROM station_history "
+                        "GROUP BY station"):
+                    counts[name] = count
+                    last[name] = latest
+
+                stations = {}
+                for row in conn.execute(
+                        "SELECT name, current, min_lru, max_lru, test_description, "
+                        "rack_location FROM stations"):
+                    name = row[0]
+                    history = LazyHistory(loader=partial(self.get_station_history, name),
+                                          length=counts.get(name, 0), source=self,
+                                          last=last.get(name))
+                    stations[name] = Station(
+                        name=name, current=row[1], min_lru=row[2], max_lru=row[3],
+                        history=history, test_description=row[4], rack_location=row[5])
+
+                for row in conn.execute(
+                        "SELECT station, tier, timestamp, min_count, max_count, total, last, "
+                        "samples FROM station_rollups ORDER BY station, tier, timestamp"):
+                    station = stations.get(row[0])
+                    if station is not None and row[1] in ROLLUP_TIERS:
+                        getattr(station, row[1]).append(Rollup(
+                            parse_timestamp(row[2]), row[3], row[4], row[5], row[6], row[7]))
+
+                for name, data in conn.execute("SELECT station, data FROM station_stats"):
+                    if name in stations:
+                        stations[name].restore_stats(json.loads(data))
+
+                history = GlobalHistoryLog()
+                for row in conn.execute(
+                        "SELECT station, timestamp, count, min_lru, max_lru "
+                        "FROM history ORDER BY id"):
+                    try:
+                        history.append_values(row[0], parse_timestamp(row[1]),
+                                              row[2], row[3], row[4])
+                    except ValueError:
+                        continue
+            return stations, history
+
+        except (sqlite3.Error, ValueError) as e:
+            raise DataLoadError(f"Failed to load data: {str(e)}")
+
+    def save_data(self, stations: Dict[str, Station],
+                  history: List[GlobalHistoryEntry]) -> None:
+        """Replace the database contents in a single transaction.
+
+        Stations whose lazy history was never loaded from this database
+        still match their stored rows, so those rows are left in place,
+        and so are their stored stats unless newer ones are known
+        (building them would load the history).
+        """
+        untouched = [name for name, s in stations.items()
+                     if not s.history.is_loaded and s.history.source is self]
+        skip = set(untouched)
+        try:
+            with closing(self._connect()) as conn:
+                with conn:
+                    conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep_stations "
+                                 "(name TEXT PRIMARY KEY)")
+                    conn.execute("DELETE FROM keep_stations")
+                    conn.executemany("INSERT INTO keep_stations VALUES (?)",
+                                     [(name,) for name in untouched])
+                    conn.execute("DELETE FROM station_history WHERE station NOT IN "
+                                 "(SELECT name FROM keep_stations)")
+                    conn.execute("DELETE FROM stations")
+                    conn.execute("DELETE FROM station_rollups")
+                    conn.execute("DELETE FROM station_stats WHERE station NOT IN "
+                                 "(SELECT name FROM keep_stations)")
+                    conn.execute("DELETE FROM history")
+                    conn.executemany(
+                        "INSERT INTO stations VALUES (?, ?, ?, ?, ?, ?)",
+                        [(s.name, s.current, s.min_lru, s.max_lru,
+                          s.test_description, s.rack_location)
+                         for s in stations.values()])
+                    conn.executemany(
+                        "INSERT INTO station_rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [row for s in stations.values() for row in _rollup_rows(s.name, s)])
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO station_stats VALUES (?, ?)",
+                        [(name, json.dumps(s.stats.to_dict())) for name, s in stations.items()
+                         if s.has_stats or name not in skip])
+                    conn.executemany(
+                        "INSERT INTO station_history (station, timestamp, count) "
+                        "VALUES (?, ?, ?)",
+                        [(name, h.timestamp, h.count)
+                         for name, s in stations.items() if name not in skip
+                         for h in s.history])
+                    conn.executemany(
+                        "INSERT INTO history (station, timestamp, count, min_lru, max_lru) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        [(e.station, e.timestamp, e.count, e.min_lru, e.max_lru)
+                         for e in history])
+        except sqlite3.Error as e:
+            raise DataSaveError(f"Failed to save data: {str(e)}")
+
+    def append_update(self, entry: GlobalHistoryEntry) -> bool:
+        """Record a single count update. Never requires a checkpoint."""
+        return self.append_records([update_record(entry)])
+
+    def append_records(self, records: List[dict]) -> bool:
+        """Apply journal-style change records in one transaction.
+
+        Only the rows the records touch are written. Never requires a
+        checkpoint.
+        """
+        try:
+            with closing(self._connect()) as conn:
+                with conn:
+                    for record in records:
+                        self._apply_record(conn, record)
+        except (sqlite3.Error, KeyError, ValueError) as e:
+            raise DataSaveError(f"Failed to record changes: {str(e)}")
+        return False
+
+    @staticmethod
+    def _apply_record(conn: sqlite3.Connection, record: dict) -> None:
+        op = record.get('op', 'update')
+        name = record['station']
+        if op in ('update', 'append'):
+            entry = GlobalHistoryEntry.from_dict(record)
+            if op == 'update':
+                conn.execute("UPDATE stations SET current = ? WHERE name = ?",
+                             (entry.count, name))
+                conn.execute(
+                    "INSERT INTO station_history (station, timestamp, count) "
+                    "VALUES (?, ?, ?)",
+                    (name, entry.timestamp, entry.count))
+                SQLiteDataManager._add_to_stats(conn, name, entry)
+            conn.execute(
+                "INSERT INTO history (station, timestamp, count, min_lru, max_lru) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (name, entry.timestamp, entry.count, entry.min_lru, entry.max_lru))
+        elif op == 'upsert':
+            conn.execute(
+                "INSERT INTO stations VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(name) DO UPDATE SET "
+                "current = excluded.current, min_lru = excluded.min_lru, "
+                "max_lru = excluded.max_lru, test_description = excluded.test_description, "
+                "rack_location = excluded.rack_location",
+                (name, record['current'], record['min'], record['max'],
+                 record.get('test_description', ''), record.get('rack_location', '')))
+            conn.execute("DELETE FROM station_rollups WHERE station = ?", (name,))
+            if 'stats' in record:
+                conn.execute("INSERT OR REPLACE INTO station_stats VALUES (?, ?)",
+                             (name, json.dumps(record['stats'])))
+            conn.executemany(
+                "INSERT INTO station_rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(name, tier, r['timestamp'], r['min'], r['max'], r['sum'], r['last'],
+                  r['samples'])
+                 for tier in ROLLUP_TIERS for r in record.get(tier, [])])
+            if 'history' in record:
+                conn.execute("DELETE FROM station_history WHERE station = ?", (name,))
+                conn.executemany(
+                    "INSERT INTO station_history (station, timestamp, count) "
+                    "VALUES (?, ?, ?)",
+                    [(name, h['timestamp'], h['count']) for h in record['history']])
+        elif op == 'delete':
+            conn.execute("DELETE FROM stations WHERE name = ?", (name,))
+            conn.execute("DELETE FROM station_history WHERE station = ?", (name,))
+            conn.execute("DELETE FROM station_rollups WHERE station = ?", (name,))
+            conn.execute("DELETE FROM station_stats WHERE station = ?", (name,))
+        else:
+            raise ValueError(f"Unknown change op {op!r}")
+
+    @staticmethod
+    def _add_to_stats(conn: sqlite3.Connection, name: str, entry: GlobalHistoryEntry) -> None:
+        """Fold a count update into the station's stored stats, if it has any."""
+        row = conn.execute(
+            "SELECT data, min_lru, max_lru FROM station_stats JOIN stations "
+            "ON stations.name = station_stats.station WHERE station = ?", (name,)).fetchone()
+        if row is None:
+            return  # Rebuilt from history when next loaded
+        stats = StationStats.from_dict(json.loads(row[0]))
+        stats.add(entry.count, entry.epoch, status_tag(entry.count, row[1], row[2]))
+        conn.execute("UPDATE station_stats SET data = ? WHERE station = ?",
+                     (json.dumps(stats.to_dict()), name))
+
+    def get_station_history(self, name: str, start: Optional[str] = None,
+                            end: Optional[str] = None) -> List[HistoryEntry]:
+        """Fetch one station's history, optionally limited to [start, end)."""
+        query = "SELECT timestamp, count FROM station_history WHERE station = ?"
+        params: list = [name]
+        if start is not None:
+            query += " AND timestamp >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND timestamp < ?"
+            params.append(end)
+        query += " ORDER BY timestamp, id"
+
+        with closing(self._connect()) as conn:
+            return [HistoryEntry(ts, count) for ts, count in conn.execute(query, params)]
+
+    def count_station_history(self, name: str) -> int:
+        """Number of history entries recorded for a station."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM station_history WHERE station = ?", (name,)).fetchone()
+        return row[0]
+
+    def iter_history(self, start: Optional[str] = None,
+                     end: Optional[str] = None) -> Iterator[GlobalHistoryEntry]:
+        """Stream global history rows in insertion order, optionally by window."""
+        with closing(self._connect()) as conn:
+            yield from self._iter_history(conn, start, end)
+
+    @staticmethod
+    def _iter_history(conn: sqlite3.Connection, start: Optional[str] = None,
+                      end: Optional[str] = None) -> Iterator[GlobalHistoryEntry]:
+        query = "SELECT station, timestamp, count, min_lru, max_lru FROM history"
+        clauses = []
+        params = []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id"
+
+        for station, timestamp, count, min_lru, max_lru in conn.execute(query, params):
+            yield GlobalHistoryEntry(station=station, timestamp=timestamp, count=count,
+                                     min_lru=min_lru, max_lru=max_lru)
+
+
+def _rollup_rows(name: str, station: Station) -> Iterator[tuple]:
+    for tier in ROLLUP_TIERS:
+        for r in getattr(station, tier):
+            yield (name, tier, r.timestamp, r.min_count, r.max_count, r.total, r.last, r.samples)
+
+
+def migrate_json_to_sqlite(json_file: str = DATA_FILE, db_file: str = SQLITE_DATA_FILE,
+                           overwrite: bool = False,
+                           archive_dir: Optional[str] = HISTORY_ARCHIVE_DIR) -> Tuple[int, int]:
+    """One-shot migration of an lru_data.json file into a SQLite database.
+
+    History archived by the JSON backend (see history_archive) is read
+    from archive_dir, if it exists, and migrated along with the live
+    data: archived rows, station history and rollups.
+
+    Returns (station_count, history_count).
+    """
+    target = SQLiteDataManager(db_file)
+    if not overwrite:
+        existing, _ = target.load_data()
+        if existing:
+            raise DataSaveError(f"{db_file} already contains data (use overwrite=True)")
+
+    if archive_dir is not None and not os.path.isdir(archive_dir):
+        archive_dir = None
+    source = DataManager(json_file, archive_dir=archive_dir)
+    stations, history = source.load_data()
+    if source.archive is not None:
+        stations = {station.name: station for station in source.archive.attach(stations.values())}
+        history = GlobalHistoryLog(chain(source.archive.iter_history(), history))
+    target.save_data(stations, history)
+    logger.info(f"Migrated {len(stations)} stations, {len(history)} history entries "
+                f"from {json_file} to {db_file}")
+    return len(stations), len(history)
+
+
+if __name__ == "__main__":
+    import sys
+    src = sys.argv[1] if len(sys.argv) > 1 else DATA_FILE
+    dst = sys.argv[2] if len(sys.argv) > 2 else SQLITE_DATA_FILE
+    archive = sys.argv[3] if len(sys.argv) > 3 else HISTORY_ARCHIVE_DIR
+    station_count, history_count = migrate_json_to_sqlite(src, dst, archive_dir=archive)
+    print(f"Migrated {station_count} stations and {history_count} history entries to {dst}")
@@ -0,0 +1,258 @@
+"""Shared station/history state with locked writes and cached snapshots.
+
+The Tk thread owns the live objects and mutates them inside write().
+Anything that runs on another thread (saving, exports, sync) works from
+snapshot(): an independent copy taken under the read lock and reused
+until the next write, so background work never sees a half-applied
+change and never holds a lock while it does I/O.
+
+Every write is also recorded as a journal-style change record, so a
+save can persist just what changed since the previous one.
+"""
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from models import Station, GlobalHistoryEntry, GlobalHistoryLog
+from data_manager import update_record, append_record, upsert_record, delete_record
+from sync_merge import merge_documents, MergeResult
+
+History = Union[GlobalHistoryLog, List[GlobalHistoryEntry]]
+
+
+def copy_state(stations: Dict[str, Station], history: History) -> Tuple[Dict[str, Station], History]:
+    """Copy stations and history so the originals can keep changing."""
+    copied = {name: station.copy() for name, station in stations.items()}
+    if isinstance(history, GlobalHistoryLog):
+        return copied, history.copy()
+    return copied, list(history)
+
+
+class ReadWriteLock:
+    """Many readers or one writer; waiting writers block new readers."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            self._cond.wait_for(lambda: not self._writer and not self._writers_waiting)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            self._cond.wait_for(lambda: not self._writer and not self._readers)
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class ChangeSet:
+    """Changes since the last save, as ordered journal records.
+
+    full is set when the changes aren't known in detail (a wholesale
+    replace, an untracked write, a failed save); only a full save of a
+    snapshot is then correct.
+    """
+
+    def __init__(self, full: bool = False):
+        self.records: List[dict] = []
+        self.full = full
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __bool__(self) -> bool:
+        return self.full or bool(self.records)
+
+
+@dataclass(frozen=True)
+class StoreSnapshot:
+    """Point-in-time copy of the store; treat as read-only."""
+    stations: Dict[str, Station]
+    history: History
+    version: int
+
+
+class StationStore:
+    """Owns the stations dict and the global history log.
+
+    Reads on the owning (Tk) thread may use stations/history directly.
+    Every change goes through write() or one of the helpers below, which
+    bumps version, invalidates the cached snapshot and records the change
+    for take_changes().
+    """
+
+    def __init__(self, stations: Optional[Dict[str, Station]] = None,
+                 history: Optional[History] = None):
+        self._stations: Dict[str, Station] = stations if stations is not None else {}
+        self._history: History = history if history is not None else GlobalHistoryLog()
+        self._lock = ReadWriteLock()
+        self._snapshot: Optional[StoreSnapshot] = None
+        self._changes = ChangeSet()
+        self.version = 0
+
+    @property
+    def stations(self) -> Dict[str, Station]:
+        return self._stations
+
+    @property
+    def history(self) -> History:
+        return self._history
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock.write():
+            try:
+                yield
+            finally:
+                self.version += 1
+                self._snapshot = None
+
+    @contextmanager
+    def write(self, changed: Optional[Iterable[str]] = None) -> Iterator['StationStore']:
+        """Hold the write lock while mutating stations/history.
+
+        changed names the stations added, replaced or deleted in the block;
+        global history rows appended in the block are picked up on their
+        own. Without changed the next save has to be a full one.
+        """
+        with self._locked():
+            before = len(self._history)
+            try:
+                yield self
+            except BaseException:
+                self._changes.full = True
+                raise
+            if changed is None:
+                self._changes.full = True
+                return
+            records = self._changes.records
+            for name in changed:
+                station = self._stations.get(name)
+                records.append(delete_record(name) if station is None
+                               else upsert_record(station, include_history=True))
+            records.extend(append_record(entry) for entry in self._history[before:])
+
+    def take_changes(self) -> ChangeSet:
+        """Return the changes recorded since the last call and start afresh."""
+        with self._lock.write():
+            changes, self._changes = self._changes, ChangeSet()
+        return changes
+
+    def require_full_save(self) -> None:
+        """Make the next save a full one (e.g. after a failed write)."""
+        with self._lock.write():
+            self._changes.full = True
+
+    @contextmanager
+    def read(self) -> Iterator['StationStore']:
+        """Hold the read lock while reading live objects from another thread."""
+        with self._lock.read():
+            yield self
+
+    def snapshot(self) -> StoreSnapshot:
+        """Copy of the current state, shared until the next write."""
+        snap = self._snapshot
+        if snap is not None and snap.version == self.version:
+            return snap
+        with self._lock.read():
+            stations, history = copy_state(self._stations, self._history)
+            snap = StoreSnapshot(stations, history, self.version)
+            self._snapshot = snap
+        return snap
+
+    def replace(self, stations: Dict[str, Station], history: History,
+                persisted: bool = False) -> None:
+        """Swap in a whole new data set (load, pull).
+
+        persisted=True means the data was just read from storage, so
+        nothing needs saving.
+        """
+        with self._locked():
+            self._stations = stations
+            self._history = history
+            self._changes = ChangeSet(full=not persisted)
+
+    def add_station(self, station: Station) -> None:
+        with self._locked():
+            self._stations[station.name] = station
+            self._changes.records.append(upsert_record(station, include_history=True))
+
+    def remove_station(self, name: str) -> None:
+        with self._locked():
+            del self._stations[name]
+            self._changes.records.append(delete_record(name))
+
+    def set_limits(self, name: str, min_lru: int, max_lru: int) -> None:
+        with self._locked():
+            station = self._stations[name]
+            station.min_lru = min_lru
+            station.max_lru = max_lru
+            self._changes.records.append(upsert_record(station))
+
+    def record_count(self, name: str, count: int, timestamp: int) -> GlobalHistoryEntry:
+        """Apply a count update to the station and the global log."""
+        with self._locked():
+            station = self._stations[name]
+            station.add_history(count, timestamp)
+            entry = GlobalHistoryEntry(
+                station=name,
+                timestamp=timestamp,
+                count=count,
+                min_lru=station.min_lru,
+                max_lru=station.max_lru
+            )
+            self._history.append(entry)
+            self._changes.records.append(update_record(entry))
+        return entry
+
+    def apply_retention(self, policy, now: int):
+        """Roll aged history up with a RetentionPolicy (see retention.py)."""
+        with self._locked():
+            result = policy.apply(self._stations, self._history, now)
+            if result.dropped_rows:
+                # Dropped global rows have no journal record
+                self._changes.full = True
+            else:
+                self._changes.records.extend(
+                    upsert_record(self._stations[name], include_history=True)
+                    for name in result.stations)
+        return result
+
+
+def merge_pulled(store: StationStore, sync_manager, remote: Dict, local: Dict) -> MergeResult:
+    """Three-way merge data pulled by sync_manager into the store.
+
+    local is the store's data as a sync document. The base is read
+    before anything changes; only once the store holds the result does
+    remote become the new base, so a failed merge is retried against the
+    old one. (Remote, not the merged result: local edits not pushed yet
+    must still look added, not deleted, to the next merge.)
+    """
+    result = merge_documents(sync_manager.synced_base(), local, remote)
+    stations = {name: Station.from_dict(name, data)
+                for name, data in result.data['stations'].items()}
+    history = GlobalHistoryLog(GlobalHistoryEntry.from_dict(entry)
+                               for entry in result.data['history'])
+    store.replace(stations, history)
+    sync_manager.remember_base(remote)
+    return result
@@ -0,0 +1,83 @@
+"""Incremental synchronisation of the station Treeview with station data."""
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+from models import Station
+
+# (values, tag) as shown in one tree row
+Row = Tuple[tuple, str]
+
+
+def station_row(station: Station) -> Row:
+    """Values and status tag displayed for a station."""
+    return ((station.current, station.min_lru, station.max_lru, station.get_status()),
+            station.get_status_tag())
+
+
+class StationTree:
+    """Keeps a ttk.Treeview in step with the stations by diffing rows.
+
+    Holds a name -> item id index and the last row shown for each station,
+    so only rows whose values changed touch the widget. Status counts are
+    adjusted as rows change instead of being recounted.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.items: Dict[str, str] = {}
+        self.rows: Dict[str, Row] = {}
+        self.names: List[str] = []            # Sorted, mirrors tree order
+        self.status_counts: Counter = Counter()
+
+    def sync(self, stations: Dict[str, Station],
+             changed: Optional[Iterable[str]] = None) -> bool:
+        """Bring the tree up to date with stations.
+
+        changed limits the work to the named stations (added, edited or
+        deleted); without it every station is compared. Returns True when
+        stations were added or removed.
+        """
+        if changed is None:
+            removed = [name for name in self.items if name not in stations]
+            names = list(stations)
+        else:
+            names = [name for name in changed if name in stations]
+            removed = [name for name in changed if name not in stations and name in self.items]
+
+        membership_changed = False
+        for name in removed:
+            self._remove(name)
+            membership_changed = True
+        for name in names:
+            if self._update(name, stations[name]):
+                membership_changed = True
+        return membership_changed
+
+    def clear(self) -> None:
+        """Remove every row."""
+        for name in list(self.items):
+            self._remove(name)
+
+    def _update(self, name: str, station: Station) -> bool:
+        """Insert or update one row; returns True if it was inserted."""
+        row = station_row(station)
+        old = self.rows.get(name)
+        if old == row:
+            return False
+
+        values, tag = row
+        if old is None:
+            index = bisect_left(self.names, name)
+            self.names.insert(index, name)
+            self.items[name] = self.tree.insert('', index, text=name, values=values, tags=(tag,))
+        else:
+            self.tree.item(self.items[name], values=values, tags=(tag,))
+            self.status_counts[old[1]] -= 1
+        self.rows[name] = row
+        self.status_counts[tag] += 1
+        return old is None
+
+    def _remove(self, name: str) -> None:
+        self.tree.delete(self.items.pop(name))
+        self.status_counts[self.rows.pop(name)[1]] -= 1
+        del self.names[bisect_left(self.names, name)]
@@ -0,0 +1,202 @@
+"""Three-way merge of synced data documents.
+
+Each computer keeps the document as it was at the last sync (the base).
+On pull, local and remote are both compared against it:
+
+- Station settings merge field by field; a field changed on one side
+  takes that side's value. Only a field changed differently on both
+  sides is a conflict, resolved in favour of local and reported.
+- History is append-mostly, so entries are unioned, keyed by
+  (station, timestamp, count). An entry from the base that one side
+  dropped (trimmed or deleted) stays dropped.
+- Hourly and daily rollups (see retention.py) are unioned by bucket.
+- A station added on one side is kept; one deleted on one side is
+  deleted, unless the other side changed it (a conflict; it is kept).
+
+Everything works on the plain {'stations', 'history'} dicts used for
+sync, with set lookups, so a merge is linear in the number of entries.
+
+A document with a SINCE timestamp only covers history from then on (a
+computer with a history archive syncs just the live month). The merge
+then compares all three documents over that range only, so older
+history missing from one of them never reads as deleted.
+"""
+import heapq
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from history_archive import split_closed
+
+# Station fields users edit; 'current' follows history instead
+CONFIG_FIELDS = ('min', 'max', 'test_description', 'rack_location')
+
+# Retention rollup lists (see retention.py)
+ROLLUP_TIERS = ('hourly', 'daily')
+
+EMPTY = {'stations': {}, 'history': []}
+
+# Document key: history before this timestamp is not part of the document
+SINCE = 'since'
+
+
+@dataclass
+class MergeConflict:
+    """A station changed on both sides; local was kept.
+
+    field is None when one side deleted the station the other changed.
+    """
+    station: str
+    field: Optional[str]
+    local: Any
+    remote: Any
+
+    def describe(self) -> str:
+        if self.field is None:
+            side = "remote" if self.local is not None else "local"
+            return f"{self.station}: deleted on {side} side but changed on the other (kept)"
+        return (f"{self.station}: {self.field} changed to {self.local!r} here "
+                f"and {self.remote!r} remotely (kept {self.local!r})")
+
+
+@dataclass
+class MergeResult:
+    data: Dict
+    conflicts: List[MergeConflict] = field(default_factory=list)
+    # History entries taken from remote that local didn't have
+    added_history: int = 0
+
+
+def _station_key(entry: Dict) -> tuple:
+    return (entry['timestamp'], entry['count'])
+
+
+def _global_key(entry: Dict) -> tuple:
+    return (entry['station'], entry['timestamp'], entry['count'])
+
+
+def _timestamp(entry: Dict) -> str:
+    return entry['timestamp']
+
+
+def merge_entries(base: List[Dict], local: List[Dict], remote: List[Dict],
+                  key: Callable[[Dict], Hashable]) -> List[Dict]:
+    """Union of local and remote history, minus entries either side dropped.
+
+    Inputs are in time order, and so is the result.
+    """
+    base_keys = {key(e) for e in base}
+    local_keys = {key(e) for e in local}
+    remote_keys = {key(e) for e in remote}
+    dropped = (base_keys - local_keys) | (base_keys - remote_keys)
+
+    ours = [e for e in local if key(e) not in dropped] if dropped else local
+    theirs = [e for e in remote if key(e) not in local_keys and key(e) not in dropped]
+    if not theirs:
+        return list(ours)
+    return list(heapq.merge(ours, theirs, key=_timestamp))
+
+
+def merge_rollups(local: List[Dict], remote: List[Dict]) -> List[Dict]:
+    """Union of rollup lists by bucket, keeping the one with more samples.
+
+    Rollups are only ever built from history both sides already share,
+    so a bucket present on both sides differs only if one side rolled up
+    more of it; the fuller one wins.
+    """
+    if not remote:
+        return list(local)
+    buckets = {r['timestamp']: r for r in local}
+    for rollup in remote:
+        ours = buckets.get(rollup['timestamp'])
+        if ours is None or rollup['samples'] > ours['samples']:
+            buckets[rollup['timestamp']] = rollup
+    return [buckets[ts] for ts in sorted(buckets)]
+
+
+def _pick(base, local, remote):
+    """Three-way value choice; returns (value, conflicted)."""
+    if local == remote or remote == base:
+        return local, False
+    if local == base:
+        return remote, False
+    return local, True
+
+
+def merge_station(name: str, base: Optional[Dict], local: Dict, remote: Dict,
+                  conflicts: List[MergeConflict]) -> Dict:
+    """Merge one station present on both sides."""
+    base = base or {}
+    merged = dict(local)
+    for key in CONFIG_FIELDS:
+        value, conflicted = _pick(base.get(key), local.get(key), remote.get(key))
+        merged[key] = value
+        if conflicted:
+            conflicts.append(MergeConflict(name, key, local.get(key), remote.get(key)))
+
+    history = merge_entries(base.get('history', []), local.get('history', []),
+                            remote.get('history', []), _station_key)
+    merged['history'] = history
+
+    for tier in ROLLUP_TIERS:
+        rollups = merge_rollups(local.get(tier, []), remote.get(tier, []))
+        if rollups:
+            merged[tier] = rollups
+        else:
+            merged.pop(tier, None)
+
+    # Local running stats don't cover entries taken from remote; without
+    # them the station rebuilds its stats from the merged history
+    if history != local.get('history', []) or any(
+            merged.get(tier, []) != local.get(tier, []) for tier in ROLLUP_TIERS):
+        merged.pop('stats', None)
+
+    current, conflicted = _pick(base.get('current'), local.get('current'), remote.get('current'))
+    if conflicted and history:
+        # Both recorded counts; the newest reading is the current one
+        current = history[-1]['count']
+    merged['current'] = current
+    return merged
+
+
+def merge_documents(base: Optional[Dict], local: Dict, remote: Dict) -> MergeResult:
+    """Merge local and remote sync documents against their common base.
+
+    base is None before the first sync; then every differing station
+    field counts as a conflict.
+    """
+    base = base or EMPTY
+    since = max(filter(None, (local.get(SINCE), remote.get(SINCE))), default=None)
+    if since is not None:
+        base, local, remote = (split_closed(d, since)[0] for d in (base, local, remote))
+    base_stations = base.get('stations', {})
+    local_stations = local.get('stations', {})
+    remote_stations = remote.get('stations', {})
+    conflicts: List[MergeConflict] = []
+
+    stations: Dict[str, Dict] = {}
+    names = list(local_stations) + [n for n in remote_stations if n not in local_stations]
+    for name in names:
+        ours = local_stations.get(name)
+        theirs = remote_stations.get(name)
+        ancestor = base_stations.get(name)
+        if ours is not None and theirs is not None:
+            stations[name] = merge_station(name, ancestor, ours, theirs, conflicts)
+        elif ancestor is None:
+            # Added on one side only
+            stations[name] = ours if ours is not None else theirs
+        else:
+            # Deleted on the other side; keep it only if this side changed it
+            kept = ours if ours is not None else theirs
+            if kept != ancestor:
+                stations[name] = kept
+                conflicts.append(MergeConflict(name, None, ours, theirs))
+
+    local_history = local.get('history', [])
+    history = merge_entries(base.get('history', []), local_history,
+                            remote.get('history', []), _global_key)
+
+    local_keys = {_global_key(e) for e in local_history}
+    added = sum(1 for e in history if _global_key(e) not in local_keys)
+    data = {'stations': stations, 'history': history}
+    if since is not None:
+        data[SINCE] = since
+    return MergeResult(data, conflicts, added)
@@ -0,0 +1,140 @@
+"""Sharded layout for synced data.
+
+Instead of one document, synced data is split into files under a root
+directory in the repository:
+
+    <root>/manifest.json          path -> git blob SHA of every file
+    <root>/stations.json          station settings, without history
+    <root>/history/YYYY-MM.json   one month of global and station history
+
+History only grows, so between syncs usually just the current month's
+segment (plus stations.json) changes. Comparing manifests tells both
+sides which files to transfer; the git blob SHA is also what the
+contents API wants when a file is updated.
+"""
+import hashlib
+import json
+from typing import Dict, Iterable, List, Tuple
+
+MANIFEST_NAME = "manifest.json"
+STATIONS_NAME = "stations.json"
+SEGMENT_DIR = "history"
+FORMAT_VERSION = 1
+
+
+def blob_sha(content: bytes) -> str:
+    """Git blob SHA-1 of content, as reported by the contents API."""
+    digest = hashlib.sha1(b"blob %d\0" % len(content))
+    digest.update(content)
+    return digest.hexdigest()
+
+
+def encode(obj) -> bytes:
+    """Deterministic compact JSON, so unchanged data hashes the same."""
+    return json.dumps(obj, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+def segment_key(timestamp: str) -> str:
+    """Month partition of a 'YYYY-MM-DD HH:MM:SS' timestamp."""
+    return timestamp[:7]
+
+
+def segment_path(key: str) -> str:
+    return f"{SEGMENT_DIR}/{key}.json"
+
+
+def split_data(data: Dict) -> Dict[str, bytes]:
+    """Split a {'stations', 'history'} document into shard files.
+
+    Returns relative path -> encoded content.
+    """
+    stations: Dict[str, Dict] = {}
+    segments: Dict[str, Dict] = {}
+
+    def segment(timestamp: str) -> Dict:
+        key = segment_key(timestamp)
+        seg = segments.get(key)
+        if seg is None:
+            seg = segments[key] = {'history': [], 'station_history': {}}
+        return seg
+
+    for name, station in data.get('stations', {}).items():
+        fields = {k: v for k, v in station.items() if k != 'history'}
+        stations[name] = fields
+        for entry in station.get('history', []):
+            segment(entry['timestamp'])['station_history'].setdefault(name, []).append(entry)
+
+    for entry in data.get('history', []):
+        segment(entry['timestamp'])['history'].append(entry)
+
+    shards = {STATIONS_NAME: encode(stations)}
+    for key, seg in segments.items():
+        shards[segment_path(key)] = encode(seg)
+    return shards
+
+
+def join_shards(shards: Dict[str, bytes]) -> Dict:
+    """Rebuild the {'stations', 'history'} document from shard files."""
+    stations = {}
+    for name, fields in json.loads(shards[STATIONS_NAME]).items():
+        stations[name] = dict(fields, history=[])
+
+    history: List[Dict] = []
+    # Month keys sort chronologically, so history stays in time order
+    for path in sorted(p for p in shards if p.startswith(SEGMENT_DIR + "/")):
+        seg = json.loads(shards[path])
+        history.extend(seg.get('history', []))
+        for name, entries in seg.get('station_history', {}).items():
+            if name in stations:
+                stations[name]['history'].extend(entries)
+    return {'stations': stations, 'history': history}
+
+
+def build_manifest(shards: Dict[str, bytes]) -> Dict:
+    """Manifest describing shard files by git blob SHA."""
+    return {
+        'format': FORMAT_VERSION,
+        'files': {path: {'sha': blob_sha(content), 'size': len(content)}
+                  for path, content in sorted(shards.items())}
+    }
+
+
+def manifest_files(manifest: Dict) -> Dict[str, str]:
+    """path -> sha for a manifest (empty for None)."""
+    if not manifest:
+        return {}
+    if manifest.get('format') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported sync manifest format: {manifest.get('format')}")
+    return {path: info['sha'] for path, info in manifest.get('files', {}).items()}
+
+
+def diff_manifests(local: Dict, remote: Dict) -> Tuple[List[str], List[str]]:
+    """Paths to upload (new or changed locally) and to delete remotely."""
+    local_files = manifest_files(local)
+    remote_files = manifest_files(remote)
+    upload = [path for path, sha in local_files.items() if remote_files.get(path) != sha]
+    delete = [path for path in remote_files if path not in local_files]
+    return upload, delete
+
+
+def keep_segments_before(local: Dict, remote: Dict, since: str) -> List[str]:
+    """Add remote segments for months before since to the local manifest.
+
+    Used when the local data only covers history from since on: those
+    months weren't sent, so they must stay on the remote as they are
+    rather than be deleted. Returns the paths kept.
+    """
+    first = segment_path(segment_key(since))
+    kept = []
+    for path, info in (remote or {}).get('files', {}).items():
+        if path.startswith(SEGMENT_DIR + "/") and path < first \
+                and path not in local['files']:
+            local['files'][path] = info
+            kept.append(path)
+    return kept
+
+
+def missing_files(manifest: Dict, cached: Iterable[Tuple[str, str]]) -> List[str]:
+    """Manifest paths whose content isn't in the cache (path, sha) pairs."""
+    have = set(cached)
+    return [path for path, sha in manifest_files(manifest).items() if (path, sha) not in have]
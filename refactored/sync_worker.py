@@ -0,0 +1,248 @@
+"""Background GitHub sync service.
+
+One thread does all sync network traffic, so the Tk loop never waits
+on GitHub:
+
+- every interval it checks for remote changes (a conditional GET, see
+  github_sync_manager) and pulls them when there are any;
+- request_push() (called after saves) pushes shortly afterwards,
+  pulling first when someone else pushed in the meantime;
+- failures back off exponentially with jitter, and rate limits wait at
+  least as long as GitHub asks.
+
+Pulled data is handed to on_remote_data for merging on the Tk thread;
+until merged() is called nothing else is synced, so a push can never
+overwrite remote changes that haven't been merged yet. Callbacks run
+on the worker thread; UI code should hand them to the Tk loop with
+root.after().
+"""
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from logger import get_logger
+
+logger = get_logger()
+
+CHECK = 'check'
+PULL = 'pull'
+PUSH = 'push'
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Wait requested by a rate-limit response in error or its causes."""
+    while error is not None:
+        getter = getattr(error, 'retry_after', None)
+        if callable(getter):
+            return getter()
+        error = error.__cause__
+    return None
+
+
+class SyncWorker:
+    """Periodic check/pull and after-save push on a background thread."""
+
+    def __init__(self, sync_manager, document_source: Callable[[], Dict],
+                 interval: float = 300.0,
+                 push_delay: float = 5.0,
+                 min_backoff: float = 30.0,
+                 max_backoff: float = 1800.0,
+                 auto_pull: bool = True,
+                 on_remote_data: Optional[Callable[[Optional[Dict], bool], None]] = None,
+                 on_checked: Optional[Callable[[bool, Optional[Dict], bool], None]] = None,
+                 on_pushed: Optional[Callable[[bool], None]] = None,
+                 on_error: Optional[Callable[[str, Exception, bool], None]] = None,
+                 jitter: Callable[[], float] = random.random):
+        """
+        Args:
+            sync_manager: GitHubSyncManager to sync through
+            document_source: Returns the local data as a sync document;
+                called on the worker thread, so it must be thread-safe
+            interval: Seconds between remote change checks
+            push_delay: Seconds to wait after request_push(), so a burst
+                of saves turns into one push
+            min_backoff: Wait after the first failure (doubles per failure)
+            max_backoff: Longest wait between retries
+            auto_pull: Pull remote changes found by the periodic check
+                (False = only report them through on_checked)
+            on_remote_data: Called with (data, manual) after a pull; data
+                is None when the remote has none. Call merged() when done.
+            on_checked: Called with (has_changes, info, manual) after a
+                check that didn't pull
+            on_pushed: Called with (manual) after a successful push
+            on_error: Called with (job kind, exception, manual) on failure
+            jitter: Source of [0, 1) randomness for backoff
+        """
+        self.sync_manager = sync_manager
+        self.document_source = document_source
+        self.interval = interval
+        self.push_delay = push_delay
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.auto_pull = auto_pull
+        self.on_remote_data = on_remote_data
+        self.on_checked = on_checked
+        self.on_pushed = on_pushed
+        self.on_error = on_error
+        self._jitter = jitter
+
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._awaiting_merge = False
+        # Due times (monotonic) and whether the user asked for them
+        self._check_at = time.monotonic()
+        self._check_manual = False
+        self._pull_manual: Optional[bool] = None
+        self._push_at: Optional[float] = None
+        self._push_manual = False
+
+        self.failures = 0
+        self._backoff_until = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start syncing; the first check runs right away."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """Stop after the operation in progress, if any."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def request_check(self, manual: bool = False) -> None:
+        with self._cond:
+            self._check_at = time.monotonic()
+            self._check_manual = self._check_manual or manual
+            self._cond.notify_all()
+
+    def request_pull(self, manual: bool = False) -> None:
+        with self._cond:
+            self._pull_manual = bool(self._pull_manual) or manual
+            self._cond.notify_all()
+
+    def request_push(self, delay: Optional[float] = None, manual: bool = False) -> None:
+        """Push the local document after delay (default push_delay)."""
+        with self._cond:
+            at = time.monotonic() + (self.push_delay if delay is None else delay)
+            self._push_at = at if self._push_at is None else min(self._push_at, at)
+            self._push_manual = self._push_manual or manual
+            self._cond.notify_all()
+
+    def merged(self) -> None:
+        """Tell the worker pulled data has been merged (or discarded)."""
+        with self._cond:
+            self._awaiting_merge = False
+            self._cond.notify_all()
+
+    def backoff_delay(self, failures: int, requested: Optional[float] = None) -> float:
+        """Seconds to wait after the given number of consecutive failures."""
+        delay = min(self.max_backoff, self.min_backoff * 2 ** (failures - 1))
+        # Equal jitter: keep half, randomize half, so computers that failed
+        # together don't retry together
+        delay = delay / 2 + self._jitter() * delay / 2
+        if requested is not None:
+            delay = max(delay, requested)
+        return delay
+
+    def _due(self, at: float, manual: bool) -> float:
+        return at if manual else max(at, self._backoff_until)
+
+    def _next_job(self, now: float) -> Tuple[Optional[Tuple[str, bool]], Optional[float]]:
+        """(job, None) if one is due, else (None, seconds to wait or None)."""
+        if self._awaiting_merge:
+            return None, None
+        if self._pull_manual is not None:
+            manual, self._pull_manual = self._pull_manual, None
+            return (PULL, manual), None
+
+        due = []
+        if self._push_at is not None:
+            at = self._due(self._push_at, self._push_manual)
+            if at <= now:
+                manual, self._push_manual = self._push_manual, False
+                self._push_at = None
+                return (PUSH, manual), None
+            due.append(at)
+        at = self._due(self._check_at, self._check_manual)
+        if at <= now:
+            manual, self._check_manual = self._check_manual, False
+            self._check_at = now + self.interval
+            return (CHECK, manual), None
+        due.append(at)
+        return None, min(due) - now
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping:
+                        return
+                    job, wait = self._next_job(time.monotonic())
+                    if job is not None:
+                        break
+                    self._cond.wait(wait)
+            self._perform(*job)
+
+    def _perform(self, kind: str, manual: bool) -> None:
+        try:
+            if kind == PULL:
+                self._deliver(self.sync_manager.pull_from_github(), manual)
+            elif kind == CHECK:
+                has_changes, info = self.sync_manager.check_remote_changes()
+                if has_changes and info and self.auto_pull and not manual:
+                    self._deliver(self.sync_manager.pull_from_github(), manual)
+                else:
+                    self._notify(self.on_checked, has_changes, info, manual)
+            else:
+                has_changes, info = self.sync_manager.check_remote_changes()
+                if has_changes and info:
+                    # Merge theirs first; the push stays queued until merged()
+                    with self._cond:
+                        self._push_at = time.monotonic()
+                        self._push_manual = self._push_manual or manual
+                    self._deliver(self.sync_manager.pull_from_github(), False)
+                else:
+                    self.sync_manager.push_to_github(self.document_source())
+                    self._notify(self.on_pushed, manual)
+        except Exception as e:
+            self._failed(kind, e, manual)
+            return
+        with self._cond:
+            self.failures = 0
+            self._backoff_until = 0.0
+
+    def _deliver(self, data: Optional[Dict], manual: bool) -> None:
+        with self._cond:
+            self._awaiting_merge = data is not None and self.on_remote_data is not None
+        self._notify(self.on_remote_data, data, manual)
+
+    def _failed(self, kind: str, error: Exception, manual: bool) -> None:
+        with self._cond:
+            self.failures += 1
+            delay = self.backoff_delay(self.failures, retry_after(error))
+            self._backoff_until = time.monotonic() + delay
+            if kind == PUSH and self._push_at is None:
+                # Keep the local changes queued; retried after the backoff
+                self._push_at = time.monotonic()
+            elif kind == CHECK:
+                self._check_at = time.monotonic()
+        logger.warning(f"Sync {kind} failed ({self.failures} in a row), "
+                       f"retrying in {delay:.0f}s: {error}")
+        self._notify(self.on_error, kind, error, manual)
+
+    @staticmethod
+    def _notify(callback: Optional[Callable], *args) -> None:
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.warning(f"Sync callback failed: {e}")
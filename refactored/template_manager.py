@@ -1,10 +1,9 @@
 """Template management for bulk station import."""
 import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.worksheet.worksheet import Worksheet
 from typing import Dict, List, Tuple
 from models import Station
-from config import Colors
+from excel_styles import StyleRegistry
 from validators import validate_station_name, validate_number
 from logger import get_logger
 
@@ -19,22 +18,20 @@ class TemplateManager:
         wb = openpyxl.Workbook()
         ws: Worksheet = wb.active
         ws.title = "Station Setup"
+        styles = StyleRegistry(wb)
         
         # Title
         ws.merge_cells('A1:E1')
         title_cell = ws['A1']
         title_cell.value = "LRU Station Setup Template"
-        title_cell.font = Font(size=16, bold=True, color="FFFFFF")
-        title_cell.fill = PatternFill(start_color=Colors.HEADER_BG, end_color=Colors.HEADER_BG, fill_type="solid")
-        title_cell.alignment = Alignment(horizontal='center', vertical='center')
+        styles.apply(title_cell, 'template_title')
         ws.row_dimensions[1].height = 30
         
         # Instructions
         ws.merge_cells('A2:E2')
         instructions = ws['A2']
         instructions.value = "Fill in your stations below. Do not modify the header row (row 3)."
-        instructions.font = Font(italic=True)
-        instructions.alignment = Alignment(horizontal='center')
+        styles.apply(instructions, 'template_note')
         ws.row_dimensions[2].height = 25
         
         # Headers
@@ -42,9 +39,7 @@ class TemplateManager:
         for col_num, header in enumerate(headers, 1):
             cell = ws.cell(3, col_num)
             cell.value = header
-            cell.font = Font(bold=True, size=12, color="FFFFFF")
-            cell.fill = PatternFill(start_color=Colors.HEADER_SECONDARY, end_color=Colors.HEADER_SECONDARY, fill_type="solid")
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+            styles.apply(cell, 'template_header')
         
         ws.row_dimensions[3].height = 25
         
@@ -55,14 +50,12 @@ class TemplateManager:
             ["Induct Station 1", 3, 15, 8, "Induction line"],
         ]
         
-        example_fill = PatternFill(start_color=Colors.EXAMPLE_BG, end_color=Colors.EXAMPLE_BG, fill_type="solid")
         for row_num, example in enumerate(examples, 4):
             for col_num, value in enumerate(example, 1):
                 cell = ws.cell(row_num, col_num)
                 cell.value = value
-                cell.fill = example_fill
-                if col_num in [2, 3, 4]:
-                    cell.alignment = Alignment(horizontal='center')
+                styles.apply(cell, 'template_example_center' if col_num in [2, 3, 4]
+                             else 'template_example')
         
         # Column widths
         ws.column_dimensions['A'].width = 25
@@ -71,14 +64,9 @@ class TemplateManager:
         ws.column_dimensions['D'].width = 20
         ws.column_dimensions['E'].width = 30
         
-        # Borders
-        thin_border = Border(
-            left=Side(style='thin'), right=Side(style='thin'),
-            top=Side(style='thin'), bottom=Side(style='thin')
-        )
-        for row in range(3, 30):
-            for col in range(1, 6):
-                ws.cell(row, col).border = thin_border
+        # Borders (header and example rows get theirs from their styles)
+        for row in range(4 + len(examples), 30):
+            styles.apply_row(ws, row, ['template_input'] * 5)
         
         # Instructions sheet
         ws_inst = wb.create_sheet("Instructions")
@@ -107,7 +95,7 @@ class TemplateManager:
         for row_num, (text,) in enumerate(instructions_text, 1):
             ws_inst.cell(row_num, 1).value = text
             if row_num == 1:
-                ws_inst.cell(row_num, 1).font = Font(size=14, bold=True)
+                styles.apply(ws_inst.cell(row_num, 1), 'template_heading')
         
         ws_inst.column_dimensions['A'].width = 50
         
@@ -0,0 +1,134 @@
+"""Local stand-in for the GitHub repository contents API, for sync tests."""
+import base64
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+REPO_PREFIX = "/repos/owner/repo"
+
+
+def git_sha(content: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class ContentsAPIStub:
+    """Serves GET/PUT/DELETE on /repos/owner/repo/contents/<path>.
+
+    files maps path -> bytes. requests records (method, path, body bytes
+    sent or received) for each call. GETs carry an ETag and answer 304 to
+    a matching If-None-Match; connections counts accepted connections.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this each
+            # keep-alive response waits out a delayed ACK
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub.lock:
+                    stub.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _path(self):
+                path = urlsplit(self.path).path
+                prefix = REPO_PREFIX + "/contents/"
+                return path[len(prefix):] if path.startswith(prefix) else None
+
+            def _send(self, status, body=None, etag=None, record=None):
+                data = json.dumps(body).encode() if body is not None else b""
+                # Record before responding, so the client never sees a
+                # response whose request isn't in the log yet
+                if record:
+                    stub.requests.append((record, self._path(), len(data)))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return len(data)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length", 0))
+                return self.rfile.read(length) if length else b""
+
+            def do_GET(self):
+                if urlsplit(self.path).path == REPO_PREFIX:
+                    self._send(200, {"name": "repo", "private": True})
+                    return
+                path = self._path()
+                with stub.lock:
+                    content = stub.files.get(path)
+                etag = f'"{git_sha(content)}"' if content is not None else None
+                if content is None:
+                    self._send(404, {"message": "Not Found"}, record="GET")
+                elif self.headers.get("If-None-Match") == etag:
+                    self._send(304, etag=etag, record="GET304")
+                else:
+                    self._send(200, {
+                        "path": path, "sha": git_sha(content), "encoding": "base64",
+                        "content": base64.encodebytes(content).decode()},
+                        etag=etag, record="GET")
+
+            def do_PUT(self):
+                raw = self._body()
+                body = json.loads(raw)
+                path = self._path()
+                with stub.lock:
+                    current = stub.files.get(path)
+                    if current is not None and body.get("sha") != git_sha(current):
+                        status = 409 if body.get("sha") else 422
+                        stub.requests.append(("PUT", path, len(raw)))
+                        self._send(status, {"message": "sha mismatch"})
+                        return
+                    content = base64.b64decode(body["content"])
+                    stub.files[path] = content
+                stub.requests.append(("PUT", path, len(raw)))
+                self._send(201 if current is None else 200,
+                           {"content": {"path": path, "sha": git_sha(content)},
+                            "commit": {"message": body.get("message")}})
+
+            def do_DELETE(self):
+                body = json.loads(self._body())
+                path = self._path()
+                with stub.lock:
+                    current = stub.files.get(path)
+                    if current is None or body.get("sha") != git_sha(current):
+                        self._send(409 if current is not None else 404, {"message": "no"})
+                        return
+                    del stub.files[path]
+                stub.requests.append(("DELETE", path, 0))
+                self._send(200, {"commit": {"message": body.get("message")}})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def api_base(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}{REPO_PREFIX}"
+
+    def start(self) -> "ContentsAPIStub":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def calls(self, method=None):
+        return [r for r in self.requests if method is None or r[0] == method]
@@ -0,0 +1,95 @@
+"""Unit tests for analytics module."""
+import random
+import openpyxl
+import pytest
+import analytics
+from analytics import analyze, AT_MAX, NORMAL, UNDER_MIN
+from export_manager import ExportManager
+from history_archive import HistoryArchive
+from models import GlobalHistoryEntry, GlobalHistoryLog, parse_timestamp
+
+START = parse_timestamp("2024-01-01 00:00:00")
+MODES = [False, pytest.param(True, marks=pytest.mark.skipif(
+    not analytics.HAS_NUMPY, reason="NumPy not installed"))]
+
+
+def log(rows):
+    """GlobalHistoryLog from (station, minutes after START, count) with limits 5-20."""
+    history = GlobalHistoryLog()
+    for station, minutes, count in rows:
+        history.append_values(station, START + minutes * 60, count, 5, 20)
+    return history
+
+
+@pytest.mark.parametrize("use_numpy", MODES)
+class TestAnalyze:
+    def test_time_in_status_and_breaches(self, use_numpy):
+        # A: 10 min low, 20 min normal, 30 min low (2 updates), 40 min at max
+        history = log([("A", 0, 2), ("A", 10, 8), ("A", 30, 1), ("A", 45, 3), ("A", 60, 20)])
+        result = analyze(history, now=START + 100 * 60, use_numpy=use_numpy)["A"]
+
+        assert result.updates == 5
+        assert result.seconds == {UNDER_MIN: 40 * 60, NORMAL: 20 * 60, AT_MAX: 40 * 60}
+        assert result.time_in_status(UNDER_MIN) == 0.4
+        assert result.breaches == {UNDER_MIN: 2, AT_MAX: 1}
+        assert result.longest_breach == {UNDER_MIN: 30 * 60, AT_MAX: 40 * 60}
+
+    def test_stations_are_independent(self, use_numpy):
+        # Interleaved rows, out of time order
+        history = log([("B", 20, 30), ("A", 10, 2), ("A", 0, 2), ("B", 0, 8)])
+        result = analyze(history, now=START + 30 * 60, use_numpy=use_numpy)
+
+        assert result["A"].seconds[UNDER_MIN] == 30 * 60
+        assert result["A"].breaches[UNDER_MIN] == 1
+        assert result["B"].seconds == {UNDER_MIN: 0, NORMAL: 20 * 60, AT_MAX: 10 * 60}
+        assert result["B"].breaches == {UNDER_MIN: 0, AT_MAX: 1}
+
+    def test_percentiles_and_hourly_profile(self, use_numpy):
+        history = log([("A", 0, 10), ("A", 20, 20), ("A", 61, 30), ("A", 62, 40)])
+        result = analyze(history, percentiles=(0, 50, 90), use_numpy=use_numpy)["A"]
+
+        assert result.percentiles == {0: 10.0, 50: 25.0, 90: 37.0}
+        assert result.hourly_profile[:3] == [15.0, 35.0, None]
+        assert len(result.hourly_profile) == 24
+
+    def test_limits_come_from_each_row(self, use_numpy):
+        history = GlobalHistoryLog([GlobalHistoryEntry("A", START, 6, 5, 20),
+                                    GlobalHistoryEntry("A", START + 60, 6, 10, 20)])
+        result = analyze(history, now=START + 120, use_numpy=use_numpy)["A"]
+        assert result.seconds[NORMAL] == 60
+        assert result.seconds[UNDER_MIN] == 60
+
+    def test_empty(self, use_numpy):
+        assert analyze(GlobalHistoryLog(), use_numpy=use_numpy) == {}
+
+
+@pytest.mark.skipif(not analytics.HAS_NUMPY, reason="NumPy not installed")
+def test_numpy_matches_pure_python():
+    rng = random.Random(3)
+    rows = [(f"S{rng.randrange(30)}", rng.randrange(20000), rng.randrange(40))
+            for _ in range(5000)]
+    history = log(rows)
+    # Stations dropped from the log keep their interned name
+    history.append_values("gone", START - 60, 1, 5, 20)
+    history.drop_before(START)
+
+    result = analyze(history, use_numpy=True)
+    assert "gone" not in result
+    assert result == analyze(history, use_numpy=False)
+
+
+def test_analytics_report_includes_archive(tmp_path):
+    archive = HistoryArchive(str(tmp_path / "history"))
+    archive.add({}, [{'station': "A", 'timestamp': "2023-12-31 23:30:00", 'count': 2,
+                      'min': 5, 'max': 20}])
+    filename = str(tmp_path / "analytics.xlsx")
+    history = log([("A", 0, 8), ("A", 30, 8)])
+    ExportManager().create_analytics_report(filename, history, archive=archive)
+
+    rows = list(openpyxl.load_workbook(filename)["Station Analytics"]
+                .iter_rows(min_row=3, values_only=True))
+    assert rows == [("A", 3, 50.0, 50.0, 0.0, 1, 0.5, 0, 0.0, 8.0, 8.0, 8.0)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,78 @@
+"""Unit tests for autosave_manager module."""
+import threading
+import time
+import pytest
+from autosave_manager import AutoSaveManager
+
+
+@pytest.fixture
+def saves():
+    return []
+
+
+def make_manager(saves, **kwargs):
+    event = threading.Event()
+
+    def save():
+        saves.append(time.monotonic())
+        event.set()
+
+    manager = AutoSaveManager(save, **kwargs)
+    manager.saved = event
+    return manager
+
+
+class TestAutoSaveManager:
+    def test_no_wakeups_without_changes(self, saves):
+        manager = make_manager(saves, auto_save_interval=0, idle_threshold=0)
+        manager.start()
+        time.sleep(0.2)
+        assert manager.wakeups == 0
+        manager.stop()
+        assert saves == []
+
+    def test_saves_once_idle(self, saves):
+        manager = make_manager(saves, auto_save_interval=0, idle_threshold=0.1)
+        manager.start()
+        manager.mark_changed()
+        assert manager.saved.wait(5)
+        manager.stop()
+        assert len(saves) == 1
+        assert not manager.has_unsaved_changes
+
+    def test_activity_postpones_save(self, saves):
+        manager = make_manager(saves, auto_save_interval=0, idle_threshold=0.3, max_latency=None)
+        manager.mark_changed()
+        time.sleep(0.2)
+        manager.register_activity()
+        assert not manager.should_auto_save()
+        assert manager.next_save_due() > time.monotonic() + 0.2
+
+    def test_max_latency_overrides_activity(self, saves):
+        manager = make_manager(saves, auto_save_interval=0, idle_threshold=60, max_latency=0.2)
+        manager.start()
+        manager.mark_changed()
+        start = time.monotonic()
+        while not manager.saved.is_set() and time.monotonic() - start < 5:
+            manager.register_activity()  # User never goes idle
+            time.sleep(0.02)
+        manager.stop()
+        assert len(saves) == 1
+
+    def test_failed_save_backs_off(self):
+        calls = []
+
+        def failing_save():
+            calls.append(1)
+            raise IOError("disk full")
+
+        manager = AutoSaveManager(failing_save, auto_save_interval=60, idle_threshold=0)
+        manager.mark_changed()
+        manager.force_save()
+        assert calls == [1]
+        assert manager.has_unsaved_changes
+        assert not manager.should_auto_save()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
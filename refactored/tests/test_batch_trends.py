@@ -0,0 +1,58 @@
+"""Unit tests for batch_trends module."""
+import os
+import openpyxl
+import pytest
+from batch_trends import BatchTrendJob, filter_stations, trend_filename
+from models import Station
+
+
+@pytest.fixture
+def stations():
+    result = {}
+    for name in ["Pack 1", "Pack 2", "Dock/A", "Idle"]:
+        result[name] = Station(name, current=0, min_lru=5, max_lru=20)
+    for name in ["Pack 1", "Pack 2", "Dock/A"]:
+        for hour, count in [(8, 3), (9, 12)]:
+            result[name].add_history(count, f"2024-01-01 {hour:02d}:00:00")
+    return result
+
+
+class TestFilterStations:
+    def test_all_with_history(self, stations):
+        assert [s.name for s in filter_stations(stations)] == ["Dock/A", "Pack 1", "Pack 2"]
+
+    def test_substring_and_glob(self, stations):
+        assert [s.name for s in filter_stations(stations, "pack")] == ["Pack 1", "Pack 2"]
+        assert [s.name for s in filter_stations(stations, "*2")] == ["Pack 2"]
+
+    def test_filename_is_safe(self, tmp_path):
+        assert trend_filename(str(tmp_path), "Dock/A") == str(tmp_path / "Trend_Dock_A.xlsx")
+
+
+class TestBatchTrendJob:
+    def test_one_file_per_station(self, tmp_path, stations):
+        job = BatchTrendJob(filter_stations(stations), str(tmp_path / "out"), max_workers=2)
+        job.start()
+        assert job.wait(60)
+
+        assert job.poll() == (3, 3, True)
+        assert job.errors == []
+        assert sorted(os.listdir(tmp_path / "out")) == [
+            "Trend_Dock_A.xlsx", "Trend_Pack 1.xlsx", "Trend_Pack 2.xlsx"]
+        ws = openpyxl.load_workbook(tmp_path / "out" / "Trend_Pack 1.xlsx").active
+        assert ws["C9"].value == 3
+
+    def test_single_workbook(self, tmp_path, stations):
+        filename = str(tmp_path / "trends.xlsx")
+        job = BatchTrendJob(filter_stations(stations), filename, single_workbook=True)
+        job.start()
+        assert job.wait(60)
+
+        assert job.files == [filename]
+        wb = openpyxl.load_workbook(filename)
+        assert wb.sheetnames == ["Dock_A", "Pack 1", "Pack 2"]
+        assert wb["Pack 2"]["C10"].value == 12
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,197 @@
+"""Unit tests for data_manager module."""
+import json
+import pytest
+from data_manager import (DataManager, DataLoadError, DATA_FORMATS, append_record,
+                          delete_record, upsert_record)
+from models import Station, GlobalHistoryEntry, LazyHistory
+
+
+def make_entry(station, count, timestamp="2024-01-01 10:00:00"):
+    return GlobalHistoryEntry(station=station, timestamp=timestamp,
+                              count=count, min_lru=5, max_lru=20)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return DataManager(str(tmp_path / "lru_data.json"), journaled=True)
+
+
+@pytest.fixture
+def saved_manager(manager):
+    stations = {"A": Station("A", current=0, min_lru=5, max_lru=20)}
+    manager.save_data(stations, [])
+    return manager
+
+
+class TestSaveLoad:
+    def test_missing_file(self, manager):
+        assert manager.load_data() == ({}, [])
+
+    def test_round_trip(self, manager):
+        station = Station("A", current=0, min_lru=5, max_lru=20)
+        station.add_history(7, "2024-01-01 10:00:00")
+        manager.save_data({"A": station}, [make_entry("A", 7)])
+
+        stations, history = DataManager(manager.data_file).load_data()
+        assert stations["A"].current == 7
+        assert len(stations["A"].history) == 1
+        assert history[0].count == 7
+
+    def test_malformed_history_entry_still_saves(self, manager):
+        with open(manager.data_file, 'w') as f:
+            json.dump({'stations': {'A': {'current': 7, 'min': 5, 'max': 20, 'history': [
+                {'timestamp': "not a time", 'count': 1},
+                {'timestamp': "2024-01-01 10:00:00", 'count': 7}]}}, 'history': []}, f)
+        stations, history = manager.load_data()
+        manager.save_data(stations, history)
+
+        stations, _ = DataManager(manager.data_file).load_data()
+        assert stations["A"].stats.count == 1
+        assert stations["A"].stats.mean == 7
+
+
+class TestFormats:
+    @pytest.mark.parametrize("data_format", DATA_FORMATS)
+    def test_round_trip(self, tmp_path, data_format):
+        station = Station("A", current=0, min_lru=5, max_lru=20)
+        station.add_history(7, "2024-01-01 10:00:00")
+        path = str(tmp_path / "lru_data.json")
+        DataManager(path, data_format=data_format).save_data({"A": station}, [make_entry("A", 7)])
+
+        # The reader's own format setting doesn't matter
+        stations, history = DataManager(path, data_format="json").load_data()
+        assert [h.count for h in stations["A"].history] == [7]
+        assert history[0].count == 7
+
+    def test_compressed_is_smaller(self, tmp_path):
+        stations = {"A": Station("A", current=0, min_lru=5, max_lru=20)}
+        history = [make_entry("A", i, f"2024-01-01 10:{i % 60:02d}:00") for i in range(500)]
+        sizes = {}
+        for data_format in DATA_FORMATS:
+            path = tmp_path / f"{data_format}.json"
+            DataManager(str(path), data_format=data_format).save_data(stations, history)
+            sizes[data_format] = path.stat().st_size
+        assert sizes["compact"] < sizes["json"]
+        assert sizes["gzip"] < sizes["compact"] / 5
+        assert (tmp_path / "gzip.json").read_bytes().startswith(b"\x1f\x8b")
+
+    def test_corrupt_compressed_file(self, tmp_path):
+        path = tmp_path / "lru_data.json"
+        path.write_bytes(b"\x1f\x8b" + b"not really gzip")
+        with pytest.raises(DataLoadError):
+            DataManager(str(path)).load_data()
+
+    @pytest.mark.parametrize("content", ['[1, 2]', '{"stations": {"A": {}', ''])
+    def test_invalid_document(self, tmp_path, content):
+        path = tmp_path / "lru_data.json"
+        path.write_text(content)
+        with pytest.raises(DataLoadError):
+            DataManager(str(path)).load_data()
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            DataManager(str(tmp_path / "x.json"), data_format="xml")
+
+
+class TestJournal:
+    def test_append_is_replayed(self, saved_manager):
+        saved_manager.append_update(make_entry("A", 3, "2024-01-01 10:00:00"))
+        saved_manager.append_update(make_entry("A", 9, "2024-01-01 11:00:00"))
+
+        stations, history = DataManager(saved_manager.data_file).load_data()
+        assert stations["A"].current == 9
+        assert [h.count for h in stations["A"].history] == [3, 9]
+        assert [h.count for h in history] == [3, 9]
+        # Stats saved with the snapshot are carried forward by the replay
+        assert (stations["A"].stats.count, stations["A"].stats.total) == (2, 12)
+
+    def test_station_records_are_replayed(self, saved_manager):
+        b = Station("B", current=2, min_lru=1, max_lru=4)
+        b.add_history(2, "2024-01-01 09:00:00")
+        a = Station("A", current=0, min_lru=1, max_lru=9)
+        saved_manager.append_records([
+            upsert_record(b, include_history=True),
+            upsert_record(a),
+            append_record(make_entry("B", 2, "2024-01-01 09:00:00")),
+            delete_record("A"),
+        ])
+
+        stations, history = DataManager(saved_manager.data_file).load_data()
+        assert list(stations) == ["B"]
+        assert [h.count for h in stations["B"].history] == [2]
+        assert [e.station for e in history] == ["B"]
+
+    def test_upsert_keeps_history(self, saved_manager):
+        saved_manager.append_update(make_entry("A", 3))
+        saved_manager.append_records([upsert_record(Station("A", current=3, min_lru=1, max_lru=9))])
+
+        stations, _ = DataManager(saved_manager.data_file).load_data()
+        assert (stations["A"].min_lru, stations["A"].max_lru) == (1, 9)
+        assert [h.count for h in stations["A"].history] == [3]
+
+    def test_settings_upsert_leaves_history_unloaded(self):
+        loads = []
+        station = Station("A", current=3, min_lru=1, max_lru=9,
+                          history=LazyHistory(loader=lambda: loads.append(1) or []))
+        record = upsert_record(station)
+        assert 'history' not in record and 'stats' not in record
+        assert record['min'] == 1
+        assert not loads
+
+    def test_append_does_not_touch_snapshot(self, saved_manager):
+        with open(saved_manager.data_file) as f:
+            before = f.read()
+        saved_manager.append_update(make_entry("A", 3))
+        with open(saved_manager.data_file) as f:
+            assert f.read() == before
+
+    def test_checkpoint_truncates_journal(self, saved_manager):
+        saved_manager.append_update(make_entry("A", 3))
+        stations, history = DataManager(saved_manager.data_file).load_data()
+        saved_manager.save_data(stations, history)
+
+        with open(saved_manager.journal_file) as f:
+            assert f.read() == ""
+        assert not saved_manager.journal_pending
+        stations, history = DataManager(saved_manager.data_file).load_data()
+        assert len(history) == 1
+
+    def test_records_covered_by_snapshot_are_skipped(self, saved_manager):
+        # Simulate a crash between snapshot rename and journal truncation
+        saved_manager.append_update(make_entry("A", 3))
+        with open(saved_manager.journal_file) as f:
+            journal = f.read()
+        loader = DataManager(saved_manager.data_file)
+        stations, history = loader.load_data()
+        loader.save_data(stations, history)
+        with open(saved_manager.journal_file, 'w') as f:
+            f.write(journal)
+
+        stations, history = DataManager(saved_manager.data_file).load_data()
+        assert len(history) == 1
+        assert len(stations["A"].history) == 1
+
+    def test_checkpoint_signalled_after_interval(self, saved_manager, monkeypatch):
+        monkeypatch.setattr("data_manager.JOURNAL_CHECKPOINT_INTERVAL", 2)
+        assert saved_manager.append_update(make_entry("A", 1)) is False
+        assert saved_manager.append_update(make_entry("A", 2)) is True
+
+    def test_torn_tail_is_dropped(self, saved_manager):
+        saved_manager.append_update(make_entry("A", 3))
+        with open(saved_manager.journal_file, 'a') as f:
+            f.write('{"seq":2,"op":"upd')
+
+        loader = DataManager(saved_manager.data_file)
+        stations, history = loader.load_data()
+        assert len(history) == 1
+
+        loader.append_update(make_entry("A", 4, "2024-01-01 12:00:00"))
+        stations, history = DataManager(saved_manager.data_file).load_data()
+        assert [h.count for h in history] == [3, 4]
+        with open(saved_manager.journal_file) as f:
+            for line in f:
+                json.loads(line)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,123 @@
+"""Unit tests for export_manager module."""
+import zipfile
+import openpyxl
+import pytest
+from excel_styles import StyleRegistry
+from export_manager import ExportManager
+from models import Station, GlobalHistoryLog, parse_timestamp
+
+
+@pytest.fixture
+def stations():
+    under = Station("A", current=1, min_lru=5, max_lru=20)
+    under.add_history(1, "2024-01-01 08:00:00")
+    return {"A": under, "B": Station("B", current=10, min_lru=5, max_lru=20)}
+
+
+@pytest.fixture
+def history():
+    log = GlobalHistoryLog()
+    base = parse_timestamp("2024-01-01 08:00:00")
+    for i in range(10):
+        log.append_values("A" if i % 2 else "B", base + i * 60, i, 5, 20)
+    return log
+
+
+class TestStreamingExport:
+    def test_matches_regular_report(self, tmp_path, stations, history):
+        streamed = str(tmp_path / "streamed.xlsx")
+        regular = str(tmp_path / "regular.xlsx")
+        ExportManager().export_new_report(streamed, stations, history, streaming=True)
+        ExportManager().export_new_report(regular, stations, history, streaming=False)
+
+        a = openpyxl.load_workbook(streamed)
+        b = openpyxl.load_workbook(regular)
+        assert a.sheetnames == b.sheetnames == ["Current Status", "History"]
+        for name in a.sheetnames:
+            rows_a = list(a[name].iter_rows(min_row=2, values_only=True))
+            rows_b = list(b[name].iter_rows(min_row=2, values_only=True))
+            assert rows_a == rows_b
+        assert len(rows_a) == len(history) + 1
+
+    def test_named_styles(self, tmp_path, stations, history):
+        filename = str(tmp_path / "streamed.xlsx")
+        ExportManager().export_new_report(filename, stations, history, streaming=True)
+
+        ws = openpyxl.load_workbook(filename)["Current Status"]
+        assert ws["A2"].style == "lru_header"
+        assert ws["E3"].style == "lru_status_critical"
+        assert ws["E4"].style == "lru_status_success"
+        assert ws["A4"].fill.fgColor.rgb.endswith("ECF0F1")
+        assert "A1:F1" in ws.merged_cells
+        assert ws.freeze_panes == "A3"
+
+
+class TestStyleRegistry:
+    def test_registers_once_on_first_use(self):
+        wb = openpyxl.Workbook()
+        styles = StyleRegistry(wb)
+        before = len(wb.style_names)
+        for row in range(1, 50):
+            styles.apply(wb.active.cell(row, 1), "lru_cell")
+        assert len(wb.style_names) == before + 1
+
+    def test_unknown_style(self):
+        with pytest.raises(KeyError):
+            StyleRegistry(openpyxl.Workbook()).name("no_such_style")
+
+
+class TestTrendReport:
+    def test_table_header_on_chart_row(self, tmp_path, stations):
+        stations["A"].add_history(25, "2024-01-01 09:00:00")
+        filename = str(tmp_path / "trend.xlsx")
+        ExportManager().create_trend_report(filename, stations["A"])
+
+        ws = openpyxl.load_workbook(filename).active
+        assert ws["A8"].value == "#"
+        assert ws["A8"].style == "lru_header"
+        assert [ws["F9"].value, ws["F10"].value] == ["Critical", "Warning"]
+        assert ws["F9"].style == "trend_status_critical"
+
+
+class TestAppendToExisting:
+    @pytest.fixture
+    def report(self, tmp_path, stations):
+        filename = str(tmp_path / "report.xlsx")
+        ExportManager().export_new_report(filename, stations, [])
+        return filename
+
+    def test_adds_sheet_without_touching_others(self, report, stations):
+        with zipfile.ZipFile(report) as zf:
+            original = zf.read("xl/worksheets/sheet1.xml")
+
+        first = ExportManager().append_to_existing(report, stations)
+        second = ExportManager().append_to_existing(report, stations)
+        assert first != second
+
+        with zipfile.ZipFile(report) as zf:
+            assert zf.read("xl/worksheets/sheet1.xml") == original
+        wb = openpyxl.load_workbook(report)
+        assert wb.sheetnames == ["Current Status", first, second]
+        ws = wb[second]
+        assert [c.value for c in ws[3]][:4] == ["A", 1, 5, 20]
+        assert ws["E3"].fill.fgColor.rgb.endswith("E74C3C")
+        assert ws.freeze_panes == "A3"
+
+    def test_style_table_does_not_grow(self, report, stations):
+        ExportManager().append_to_existing(report, stations)
+        styles = len(openpyxl.load_workbook(report)._cell_styles)
+        ExportManager().append_to_existing(report, stations)
+        assert len(openpyxl.load_workbook(report)._cell_styles) == styles
+
+    def test_rollup_sheet(self, report, stations):
+        for _ in range(2):
+            assert ExportManager().append_to_existing(report, stations, rollup=True) == "Snapshots"
+
+        ws = openpyxl.load_workbook(report)["Snapshots"]
+        assert [c.value for c in ws[1]][:2] == ["Timestamp", "Station Name"]
+        assert ws.max_row == 1 + 2 * len(stations)
+        assert [ws["B2"].value, ws["B4"].value] == ["A", "A"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
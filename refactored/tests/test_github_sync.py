@@ -0,0 +1,291 @@
+"""Unit tests for sharded GitHub sync (sync_shards + GitHubSyncManager)."""
+import json
+import socket
+import pytest
+from github_sync_manager import GitHubSyncManager
+from history_archive import split_closed
+from models import parse_timestamp
+from state_store import StationStore, merge_pulled
+from sync_merge import SINCE
+from sync_shards import blob_sha, join_shards, split_data
+from tests.contents_api_stub import ContentsAPIStub, git_sha
+
+
+def make_data(months=3, per_month=4):
+    history = []
+    station_history = []
+    for month in range(1, months + 1):
+        for day in range(1, per_month + 1):
+            ts = f"2024-{month:02d}-{day:02d} 08:00:00"
+            history.append({'station': 'A', 'timestamp': ts, 'count': day,
+                            'min': 5, 'max': 20})
+            station_history.append({'timestamp': ts, 'count': day})
+    return {
+        'stations': {
+            'A': {'current': per_month, 'min': 5, 'max': 20, 'history': station_history,
+                  'test_description': '', 'rack_location': 'R1'},
+            'B': {'current': 0, 'min': 1, 'max': 2, 'history': [],
+                  'test_description': 'x', 'rack_location': ''},
+        },
+        'history': history
+    }
+
+
+@pytest.fixture
+def stub():
+    server = ContentsAPIStub().start()
+    yield server
+    server.stop()
+
+
+def make_manager(stub, **kwargs):
+    kwargs.setdefault('sharded', True)
+    return GitHubSyncManager("owner", "repo", api_base=stub.api_base, **kwargs)
+
+
+class TestShards:
+    def test_round_trip(self):
+        data = make_data()
+        shards = split_data(data)
+        assert sorted(shards) == ["history/2024-01.json", "history/2024-02.json",
+                                  "history/2024-03.json", "stations.json"]
+        assert join_shards(shards) == data
+
+    def test_blob_sha_matches_git(self):
+        assert blob_sha(b"hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+    def test_unchanged_months_keep_their_bytes(self):
+        data = make_data()
+        before = split_data(data)
+        data['history'].append({'station': 'A', 'timestamp': '2024-03-20 08:00:00',
+                                'count': 9, 'min': 5, 'max': 20})
+        after = split_data(data)
+        changed = [p for p in after if after[p] != before.get(p)]
+        assert changed == ["history/2024-03.json"]
+
+
+class TestShardedSync:
+    def test_push_then_pull(self, stub):
+        data = make_data()
+        assert make_manager(stub).push_to_github(data, "first")
+        assert "shared_data/lru_data/manifest.json" in stub.files
+        assert "shared_data/lru_data/history/2024-02.json" in stub.files
+
+        other = make_manager(stub)
+        assert other.pull_from_github() == data
+        assert other.last_transfer['files'] == 4
+
+    def test_push_sends_only_changed_segment(self, stub):
+        manager = make_manager(stub)
+        data = make_data()
+        manager.push_to_github(data, "first")
+        stub.requests.clear()
+
+        data['history'].append({'station': 'A', 'timestamp': '2024-03-20 08:00:00',
+                                'count': 9, 'min': 5, 'max': 20})
+        manager.push_to_github(data, "second")
+        assert [r[1] for r in stub.calls("PUT")] == [
+            "shared_data/lru_data/history/2024-03.json",
+            "shared_data/lru_data/manifest.json"]
+
+    def test_pull_fetches_only_new_files(self, stub, tmp_path):
+        writer = make_manager(stub)
+        data = make_data()
+        writer.push_to_github(data, "first")
+        reader = make_manager(stub, cache_dir=str(tmp_path / "cache"))
+        reader.pull_from_github()
+
+        data['history'].append({'station': 'B', 'timestamp': '2024-04-01 08:00:00',
+                                'count': 1, 'min': 1, 'max': 2})
+        writer.push_to_github(data, "second")
+        stub.requests.clear()
+
+        # A fresh manager on the same cache dir behaves like an app restart
+        restarted = make_manager(stub, cache_dir=str(tmp_path / "cache"))
+        assert restarted.pull_from_github() == data
+        assert [r[1] for r in stub.calls("GET")] == [
+            "shared_data/lru_data/manifest.json",
+            "shared_data/lru_data/history/2024-04.json"]
+
+    def test_unchanged_push_writes_nothing(self, stub):
+        manager = make_manager(stub)
+        manager.push_to_github(make_data(), "first")
+        stub.requests.clear()
+        manager.push_to_github(make_data(), "again")
+        assert stub.calls("PUT") == []
+
+    def test_removed_segment_is_deleted(self, stub):
+        manager = make_manager(stub)
+        data = make_data()
+        manager.push_to_github(data, "first")
+        data['history'] = [e for e in data['history'] if not e['timestamp'].startswith('2024-01')]
+        data['stations']['A']['history'] = [
+            e for e in data['stations']['A']['history'] if not e['timestamp'].startswith('2024-01')]
+        manager.push_to_github(data, "trim")
+        assert "shared_data/lru_data/history/2024-01.json" not in stub.files
+        assert make_manager(stub).pull_from_github() == data
+
+    def test_months_before_since_are_kept(self, stub, tmp_path):
+        make_manager(stub).push_to_github(make_data(), "full")
+        manager = make_manager(stub, cache_dir=str(tmp_path / "cache"))
+        manager.pull_from_github()
+        live = split_closed(make_data(), "2024-03-01 00:00:00")[0]
+        live['stations']['A']['max'] = 30
+        live[SINCE] = "2024-03-01 00:00:00"
+        stub.requests.clear()
+        manager.push_to_github(live, "live month")
+        assert [r[1] for r in stub.calls("PUT")] == [
+            "shared_data/lru_data/stations.json", "shared_data/lru_data/manifest.json"]
+        assert stub.calls("DELETE") == []
+
+        expected = make_data()
+        expected['stations']['A']['max'] = 30
+        assert make_manager(stub).pull_from_github() == expected
+        # The kept months stay cached
+        stub.requests.clear()
+        manager.pull_from_github()
+        assert [r[1] for r in stub.calls("GET")] == ["shared_data/lru_data/manifest.json"]
+
+    def test_stale_sha_is_recovered(self, stub):
+        manager = make_manager(stub)
+        data = make_data()
+        manager.push_to_github(data, "first")
+        # stations.json updated but the manifest never written (interrupted push)
+        data['stations']['B']['max'] = 9
+        stub.files["shared_data/lru_data/stations.json"] = split_data(data)["stations.json"]
+        manager.push_to_github(data, "again")
+        assert make_manager(stub).pull_from_github() == data
+
+    def test_falls_back_to_single_file(self, stub):
+        legacy = make_data(months=1)
+        stub.files["shared_data/lru_data.json"] = json.dumps(legacy).encode()
+        manager = make_manager(stub)
+        has_changes, info = manager.check_remote_changes()
+        assert has_changes
+        assert info['sha'] == git_sha(stub.files["shared_data/lru_data.json"])
+        assert manager.pull_from_github() == legacy
+
+    def test_base_remembered_across_restart(self, stub, tmp_path):
+        data = make_data()
+        make_manager(stub, cache_dir=str(tmp_path / "cache")).push_to_github(data, "first")
+        assert make_manager(stub, cache_dir=str(tmp_path / "cache")).synced_base() == data
+
+    def test_base_forgotten_on_new_location(self, stub, tmp_path):
+        manager = make_manager(stub, cache_dir=str(tmp_path / "cache"))
+        manager.push_to_github(make_data(), "first")
+        manager.set_location("owner", "repo", "other/lru_data.json", "main")
+        assert manager.synced_base() is None
+
+    def test_check_remote_changes_uses_manifest(self, stub):
+        manager = make_manager(stub)
+        manager.push_to_github(make_data(), "first")
+        assert manager.check_remote_changes()[0] is False
+        make_manager(stub).push_to_github(make_data(months=4), "other pc")
+        assert manager.check_remote_changes()[0] is True
+
+
+class TestConditionalRequests:
+    def test_unchanged_check_is_not_modified(self, stub):
+        manager = make_manager(stub)
+        manager.push_to_github(make_data(), "first")
+        manager.check_remote_changes()
+        stub.requests.clear()
+        assert manager.check_remote_changes()[0] is False
+        assert [r[0] for r in stub.requests] == ["GET304"]
+        assert manager.not_modified_count >= 1
+
+    def test_document_push_keeps_history_before_since(self, stub):
+        stub.files["shared_data/lru_data.json"] = json.dumps(make_data()).encode()
+        live = split_closed(make_data(), "2024-03-01 00:00:00")[0]
+        live['history'].append({'station': 'A', 'timestamp': '2024-03-20 08:00:00',
+                                'count': 9, 'min': 5, 'max': 20})
+        live[SINCE] = "2024-03-01 00:00:00"
+        make_manager(stub, sharded=False).push_to_github(live, "live month")
+
+        expected = make_data()
+        expected['history'].append(live['history'][-1])
+        assert json.loads(stub.files["shared_data/lru_data.json"]) == expected
+
+    def test_document_push_reuses_checked_sha(self, stub):
+        stub.files["shared_data/lru_data.json"] = json.dumps(make_data(months=1)).encode()
+        manager = make_manager(stub, sharded=False)
+        manager.check_remote_changes()
+        stub.requests.clear()
+        assert manager.push_to_github(make_data(), "update")
+        assert [r[0] for r in stub.requests] == ["PUT"]
+        assert json.loads(stub.files["shared_data/lru_data.json"]) == make_data()
+
+    def test_sharded_push_after_check_revalidates_manifest(self, stub):
+        manager = make_manager(stub)
+        data = make_data()
+        manager.push_to_github(data, "first")
+        manager.check_remote_changes()
+        stub.requests.clear()
+        data['stations']['B']['max'] = 3
+        manager.push_to_github(data, "second")
+        assert [r[0] for r in stub.requests] == ["GET304", "PUT", "PUT"]
+
+    def test_connection_is_reused(self, stub):
+        manager = make_manager(stub)
+        manager.push_to_github(make_data(), "first")
+        manager.check_remote_changes()
+        manager.pull_from_github()
+        assert manager.request_count > 5
+        assert stub.connections == 1
+
+    def test_reconnects_after_server_closes(self, stub):
+        manager = make_manager(stub)
+        manager.push_to_github(make_data(), "first")
+        # Simulate an idle keep-alive connection dropped by the server
+        manager._connection._conn.sock.shutdown(socket.SHUT_RDWR)
+        assert manager.check_remote_changes()[0] is False
+
+
+def sync_document(store):
+    snap = store.snapshot()
+    return {'stations': {name: s.to_dict() for name, s in snap.stations.items()},
+            'history': snap.history.to_list()}
+
+
+@pytest.mark.parametrize("sharded", [False, True])
+class TestPullAndMerge:
+    def pull(self, manager, store):
+        return merge_pulled(store, manager, manager.pull_from_github(), sync_document(store))
+
+    def test_remote_edits_survive_the_merge(self, stub, sharded):
+        here, there = make_manager(stub, sharded=sharded), make_manager(stub, sharded=sharded)
+        local, other = StationStore(), StationStore()
+        make_manager(stub, sharded=sharded).push_to_github(make_data(months=1), "first")
+        self.pull(here, local)
+        self.pull(there, other)
+
+        # The other computer edits a limit and records a count...
+        other.set_limits('B', 1, 3)
+        other.record_count('A', 9, parse_timestamp("2024-01-10 08:00:00"))
+        there.push_to_github(sync_document(other), "other pc")
+        # ...while this one records a count it hasn't pushed yet
+        local.record_count('B', 1, parse_timestamp("2024-01-11 08:00:00"))
+
+        result = self.pull(here, local)
+        assert not result.conflicts
+        assert local.stations['B'].max_lru == 3
+        assert [h.count for h in local.stations['A'].history][-1] == 9
+        assert [(e.station, e.count) for e in local.history][-2:] == [('A', 9), ('B', 1)]
+
+        # A second pull before pushing still keeps the local count
+        other.record_count('A', 4, parse_timestamp("2024-01-12 08:00:00"))
+        there.push_to_github(sync_document(other), "other pc again")
+        self.pull(here, local)
+        assert [(e.station, e.count) for e in local.history][-3:] == \
+            [('A', 9), ('B', 1), ('A', 4)]
+
+    def test_pull_leaves_base_until_merged(self, stub, sharded):
+        manager = make_manager(stub, sharded=sharded)
+        manager.push_to_github(make_data(months=1), "first")
+        make_manager(stub, sharded=sharded).push_to_github(make_data(months=2), "other pc")
+        assert manager.pull_from_github() == make_data(months=2)
+        assert manager.synced_base() == make_data(months=1)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
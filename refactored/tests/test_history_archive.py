@@ -0,0 +1,213 @@
+"""Unit tests for history_archive module."""
+import json
+import os
+import openpyxl
+import pytest
+from data_manager import DataManager
+from export_manager import ExportManager
+from history_archive import HistoryArchive, month_start, split_closed
+from models import (Station, GlobalHistoryEntry, GlobalHistoryLog, LazyHistory,
+                    now_epoch, parse_timestamp)
+from retention import RetentionPolicy
+
+OLD = ["2024-01-05 08:00:00", "2024-01-20 09:00:00", "2024-02-03 10:00:00"]
+
+
+def row(station, timestamp, count):
+    return {'station': station, 'timestamp': timestamp, 'count': count, 'min': 5, 'max': 20}
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = HistoryArchive(str(tmp_path / "history"))
+    archive.add({'A': [{'timestamp': ts, 'count': i} for i, ts in enumerate(OLD)],
+                 'B': [{'timestamp': OLD[2], 'count': 7}]},
+                [row('A', ts, i) for i, ts in enumerate(OLD)] + [row('B', OLD[2], 7)])
+    return archive
+
+
+class TestHistoryArchive:
+    def test_one_file_per_month_with_index(self, archive):
+        assert sorted(os.listdir(archive.directory)) == \
+            ["2024-01.json.gz", "2024-02.json.gz", "index.json"]
+        with open(archive.index_file) as f:
+            index = json.load(f)['months']
+        assert index['2024-01']['rows'] == 2
+        assert index['2024-01']['stations'] == {'A': [OLD[0], OLD[1], 2]}
+        assert index['2024-02']['first'] == OLD[2]
+
+    def test_months_overlapping_window(self, archive):
+        assert archive.months() == ["2024-01", "2024-02"]
+        assert archive.months(start=parse_timestamp("2024-01-21 00:00:00")) == ["2024-02"]
+        assert archive.months(end=parse_timestamp("2024-01-06 00:00:00")) == ["2024-01"]
+        assert archive.months(station='B') == ["2024-02"]
+        assert archive.row_count() == 4
+
+    def test_station_history_reads_only_its_months(self, archive, monkeypatch):
+        opened = []
+        read_month = archive.read_month
+        monkeypatch.setattr(archive, 'read_month', lambda m: opened.append(m) or read_month(m))
+        assert [e.count for e in archive.station_history('B')] == [7]
+        assert opened == ["2024-02"]
+
+    def test_iter_history_window(self, archive):
+        rows = archive.iter_history(parse_timestamp("2024-01-10 00:00:00"),
+                                    parse_timestamp("2024-02-28 00:00:00"))
+        assert [(e.station, e.count) for e in rows] == [('A', 1), ('A', 2), ('B', 7)]
+
+    def test_add_unions_with_existing(self, archive):
+        written = archive.add({}, [row('A', OLD[0], 0), row('C', "2024-01-06 00:00:00", 4)])
+        assert written == ["2024-01"]
+        assert [(e.station, e.count) for e in archive.iter_history(
+            end=parse_timestamp("2024-02-01 00:00:00"))] == [('A', 0), ('C', 4), ('A', 1)]
+        # The same month content again is skipped
+        assert archive.add({}, [row('A', OLD[0], 0), row('C', "2024-01-06 00:00:00", 4)]) == []
+        # As many entries as last time, but different ones
+        assert archive.add({}, [row('A', OLD[0], 0), row('D', "2024-01-07 00:00:00", 5)]) == \
+            ["2024-01"]
+        assert archive.row_count() == 6
+
+    def test_index_rebuilt_when_unreadable(self, archive):
+        with open(archive.index_file, 'w') as f:
+            f.write("{broken")
+        reopened = HistoryArchive(archive.directory)
+        assert reopened.months() == ["2024-01", "2024-02"]
+
+    def test_attach(self, archive):
+        station = Station("A", 0, 5, 20)
+        station.add_history(9, "2024-03-01 08:00:00")
+        attached = archive.attach([station])[0]
+        assert [e.count for e in attached.history] == [0, 1, 2, 9]
+        assert len(station.history) == 1
+
+
+class TestArchiveRetention:
+    NOW = parse_timestamp("2024-06-01 00:00:00")
+
+    def test_rolls_whole_months_to_hourly_then_daily(self, archive):
+        result = archive.apply_retention(RetentionPolicy(raw_days=30, hourly_days=None), self.NOW)
+        assert (result.stations, result.rolled_entries, result.dropped_rows) == (['A', 'B'], 4, 4)
+        assert archive.row_count() == 0
+        assert archive.station_history('A') == []
+        assert archive.months(station='A') == ["2024-01", "2024-02"]
+        attached = archive.attach([Station("A", 0, 5, 20)])[0]
+        assert [(r.timestamp, r.last) for r in attached.hourly] == \
+            [("2024-01-05 08:00:00", 0), ("2024-01-20 09:00:00", 1), ("2024-02-03 10:00:00", 2)]
+        # Raw entries for a rolled month are not archived again
+        assert archive.add({}, [row('A', OLD[0], 0)]) == []
+
+        result = archive.apply_retention(RetentionPolicy(raw_days=30, hourly_days=60), self.NOW)
+        assert result.rolled_hours == 4
+        attached = archive.attach([Station("A", 0, 5, 20)])[0]
+        assert attached.hourly == []
+        assert [(r.timestamp, r.samples) for r in attached.daily] == \
+            [("2024-01-05 00:00:00", 1), ("2024-01-20 00:00:00", 1), ("2024-02-03 00:00:00", 1)]
+        assert not archive.apply_retention(RetentionPolicy(raw_days=30, hourly_days=60), self.NOW)
+
+    def test_months_inside_the_window_stay_raw(self, archive):
+        now = parse_timestamp("2024-03-15 00:00:00")
+        result = archive.apply_retention(RetentionPolicy(raw_days=30, hourly_days=None), now)
+        assert result.stations == ['A']
+        assert HistoryArchive(archive.directory).months(station='B') == ["2024-02"]
+        assert [e.count for e in archive.station_history('B')] == [7]
+
+
+def test_split_closed():
+    station = Station("A", 0, 5, 20)
+    station.add_history(1, OLD[2])
+    station.add_history(9, "2024-03-01 08:00:00")
+    document = {'stations': {'A': station.to_dict(), 'B': {'history': []}},
+                'history': [row('A', OLD[2], 1), row('A', "2024-03-01 08:00:00", 9)]}
+
+    live, station_history, closed = split_closed(document, "2024-03-01 00:00:00")
+    assert [e['count'] for e in live['stations']['A']['history']] == [9]
+    assert live['stations']['A']['min'] == 5
+    assert [e['count'] for e in live['history']] == [9]
+    assert station_history == {'A': [{'timestamp': OLD[2], 'count': 1}]}
+    assert [e['count'] for e in closed] == [1]
+    # The input document is left alone
+    assert len(document['stations']['A']['history']) == 2
+
+
+class TestDataManagerArchiving:
+    def build(self):
+        now = now_epoch()
+        station = Station("A", 0, 5, 20)
+        history = GlobalHistoryLog()
+        for timestamp, count in [(OLD[0], 1), (OLD[2], 2), (now, 3)]:
+            station.add_history(count, timestamp)
+            history.append(GlobalHistoryEntry("A", timestamp, count, 5, 20))
+        return {"A": station}, history
+
+    def test_save_moves_closed_months_out(self, tmp_path):
+        manager = DataManager(str(tmp_path / "lru_data.json"), journaled=False,
+                              archive_dir=str(tmp_path / "history"))
+        manager.save_data(*self.build())
+
+        stations, history = manager.load_data()
+        assert [e.count for e in stations["A"].history] == [3]
+        assert [e.count for e in history] == [3]
+        assert manager.archive.months() == ["2024-01", "2024-02"]
+        assert [e.count for e in manager.archive.station_history("A")] == [1, 2]
+
+    def test_load_archives_legacy_file(self, tmp_path):
+        path = str(tmp_path / "lru_data.json")
+        DataManager(path, journaled=False).save_data(*self.build())
+
+        manager = DataManager(path, journaled=False, archive_dir=str(tmp_path / "history"))
+        stations, history = manager.load_data()
+        assert [e.count for e in history] == [3]
+        assert [e.count for e in stations["A"].history] == [3]
+        assert manager.archive.row_count() == 2
+        # The data file itself was rewritten without the closed months
+        stations, _ = DataManager(path, journaled=False).load_data()
+        assert [e.count for e in stations["A"].history] == [3]
+
+    def test_load_leaves_current_stations_unloaded(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "lru_data.json")
+        stations, history = self.build()
+        current = Station("B", 0, 5, 20)
+        current.add_history(4, now_epoch())
+        stations["B"] = current
+        DataManager(path, journaled=False).save_data(stations, history)
+
+        manager = DataManager(path, journaled=False, archive_dir=str(tmp_path / "history"))
+        stations, _ = manager.load_data()
+        assert not stations["B"].history.is_loaded
+        assert [e.count for e in stations["A"].history] == [3]
+
+        # Nothing closed left: the next load neither rewrites the file nor
+        # copies any station's history to look for closed entries
+        saves, copies = [], []
+        to_list = LazyHistory.to_list
+        monkeypatch.setattr(DataManager, 'save_data', lambda *args: saves.append(args))
+        monkeypatch.setattr(LazyHistory, 'to_list', lambda h: copies.append(h) or to_list(h))
+        manager.load_data()
+        assert saves == [] and copies == []
+
+    def test_month_start(self):
+        epoch = parse_timestamp("2024-02-17 13:45:00")
+        assert month_start(epoch) == "2024-02-01 00:00:00"
+
+
+class TestExportWithArchive:
+    def test_history_sheet_includes_archive(self, archive, tmp_path):
+        filename = str(tmp_path / "report.xlsx")
+        live = GlobalHistoryLog([GlobalHistoryEntry("A", "2024-03-01 08:00:00", 9, 5, 20)])
+        ExportManager().export_new_report(filename, {"A": Station("A", 9, 5, 20)}, live,
+                                          archive=archive)
+        ws = openpyxl.load_workbook(filename)["History"]
+        counts = [r[2] for r in ws.iter_rows(min_row=3, values_only=True)]
+        assert counts == [0, 1, 2, 7, 9]
+
+    def test_history_sheet_window(self, archive, tmp_path):
+        wb = openpyxl.Workbook()
+        live = GlobalHistoryLog([GlobalHistoryEntry("A", "2024-03-01 08:00:00", 9, 5, 20)])
+        ExportManager()._add_history_sheet(wb, live, archive=archive,
+                                           start=parse_timestamp("2024-02-01 00:00:00"))
+        counts = [r[2] for r in wb["History"].iter_rows(min_row=3, values_only=True)]
+        assert counts == [2, 7, 9]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,67 @@
+"""Unit tests for json_stream module."""
+import io
+import json
+import pytest
+from json_stream import JSONStreamReader
+
+
+def read_all(reader):
+    """Rebuild a value by walking it with the streaming API."""
+    kind = reader.peek_type()
+    if kind == 'object':
+        return {key: read_all(reader) for key in reader.items()}
+    if kind == 'array':
+        return [read_all(reader) for _ in reader.array()]
+    return reader.value()
+
+
+DOCUMENT = {
+    "stations": {
+        "LRU1 - {Rack} 1": {"current": 12345678901, "min": -5, "max": 2.5e3,
+                            "history": [{"timestamp": "2024-01-01 08:00:00", "count": 7}],
+                            "test_description": "quote \" and \\u00e9 é , ] }"},
+        "empty": {}
+    },
+    "history": [{"station": "A", "count": 1}, [], [1, [2, [3]]], None, True, False],
+    "journal_seq": 42
+}
+
+
+class TestJSONStreamReader:
+    @pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 1 << 16])
+    @pytest.mark.parametrize("indent", [None, 2])
+    def test_matches_json_loads(self, chunk_size, indent):
+        text = json.dumps(DOCUMENT, indent=indent, ensure_ascii=False)
+        reader = JSONStreamReader(io.StringIO(text), chunk_size=chunk_size)
+        assert read_all(reader) == DOCUMENT
+        reader.end()
+
+    def test_number_split_across_chunks(self):
+        reader = JSONStreamReader(io.StringIO("[123456789, 5]"), chunk_size=4)
+        assert [reader.value() for _ in reader.array()] == [123456789, 5]
+
+    def test_skipping_values(self):
+        reader = JSONStreamReader(io.StringIO(json.dumps(DOCUMENT)), chunk_size=5)
+        seen = []
+        for key in reader.items():
+            seen.append(key)
+            if key == 'journal_seq':
+                assert reader.value() == 42
+            else:
+                reader.value()
+        assert seen == ["stations", "history", "journal_seq"]
+
+    @pytest.mark.parametrize("text", ['{"a": 1', '{"a" 1}', '[1 2]', '{"a": [1, }', '{1: 2}'])
+    def test_malformed(self, text):
+        with pytest.raises(ValueError):
+            read_all(JSONStreamReader(io.StringIO(text), chunk_size=2))
+
+    def test_trailing_data(self):
+        reader = JSONStreamReader(io.StringIO('{} {}'))
+        read_all(reader)
+        with pytest.raises(ValueError):
+            reader.end()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,6 +1,8 @@
 """Unit tests for models module."""
 import pytest
-from models import Station, HistoryEntry, GlobalHistoryEntry
+from config import STATS_RECENT_WINDOW
+from models import (Station, HistoryEntry, GlobalHistoryEntry, LazyHistory,
+                    HistoryColumns, GlobalHistoryLog, Rollup, parse_timestamp, format_timestamp)
 
 
 class TestStation:
@@ -58,6 +60,116 @@ class TestStation:
         assert station.min_lru == 5
         assert station.max_lru == 20
         assert len(station.history) == 1
+    
+    def test_rollups_round_trip(self):
+        station = Station("Test", current=10, min_lru=5, max_lru=20)
+        assert 'hourly' not in station.to_dict()
+        station.hourly = [Rollup(parse_timestamp("2024-01-01 10:00:00"), 2, 8, 15, 8, 3)]
+        data = station.to_dict()
+        assert data['hourly'] == [{'timestamp': '2024-01-01 10:00:00', 'min': 2, 'max': 8,
+                                   'sum': 15, 'last': 8, 'samples': 3}]
+        
+        loaded = Station.from_dict("Test", data)
+        assert loaded.hourly == station.hourly
+        assert loaded.hourly[0].avg == 5.0
+        assert loaded.daily == []
+
+
+class TestStationStats:
+    def make_station(self):
+        station = Station("Test", current=0, min_lru=5, max_lru=20)
+        station.stats  # Track from the first update on
+        for hour, count in [(8, 3), (9, 10), (11, 25), (12, 10)]:
+            station.add_history(count, f"2024-01-01 {hour:02d}:00:00")
+        return station
+    
+    def test_running_aggregates(self):
+        stats = self.make_station().stats
+        assert (stats.count, stats.total, stats.min_count, stats.max_count) == (4, 48, 3, 25)
+        assert stats.mean == 12.0
+        assert stats.variance == pytest.approx((81 + 4 + 169 + 4) / 4)
+        assert list(stats.recent) == [3, 10, 25, 10]
+    
+    def test_time_in_status(self):
+        stats = self.make_station().stats
+        # under_min 8-9, normal 9-11, at_max 11-12, normal from 12 on
+        assert stats.time_in_status() == {'under_min': 3600, 'normal': 7200, 'at_max': 3600}
+        now = parse_timestamp("2024-01-01 13:00:00")
+        assert stats.time_in_status(now)['normal'] == 3 * 3600
+    
+    def test_incremental_matches_rebuild(self):
+        station = self.make_station()
+        data = station.to_dict()
+        del data['stats']
+        assert Station.from_dict("Test", data).stats == station.stats
+    
+    def test_persisted_without_touching_history(self):
+        station = self.make_station()
+        loaded = Station.from_dict("Test", station.to_dict())
+        assert loaded.stats == station.stats
+        assert not loaded.history.is_loaded
+        
+        loaded.add_history(7, "2024-01-01 14:00:00")
+        assert loaded.stats.count == 5
+        assert station.stats.count == 4
+    
+    def test_recent_window_is_bounded(self):
+        station = Station("Test", current=0, min_lru=5, max_lru=20)
+        for minute in range(STATS_RECENT_WINDOW + 5):
+            station.add_history(minute, f"2024-01-01 10:{minute:02d}:00")
+        assert len(station.stats.recent) == STATS_RECENT_WINDOW
+        assert station.stats.recent[-1] == STATS_RECENT_WINDOW + 4
+    
+    def test_rollups_count_towards_stats(self):
+        station = Station("Test", current=0, min_lru=5, max_lru=20)
+        station.hourly = [Rollup(parse_timestamp("2024-01-01 10:00:00"), 2, 8, 15, 8, 3)]
+        station.add_history(5, "2024-01-02 10:00:00")
+        assert (station.stats.count, station.stats.total, station.stats.min_count) == (4, 20, 2)
+
+
+class TestLazyHistory:
+    def test_from_dict_defers_materialization(self):
+        data = {'current': 10, 'min': 5, 'max': 20,
+                'history': [{'timestamp': '2024-01-01 10:00:00', 'count': 10},
+                            {'timestamp': '2024-01-01 11:00:00', 'count': 12}]}
+        station = Station.from_dict("Test", data)
+        
+        assert not station.history.is_loaded
+        assert len(station.history) == 2
+        assert station.to_dict()['history'] == data['history']
+        assert station.history.last_timestamp() == '2024-01-01 11:00:00'
+        assert station.history.first_timestamp() == '2024-01-01 10:00:00'
+        assert not station.history.is_loaded
+        
+        assert station.history[-1].count == 12
+        assert station.history.is_loaded
+    
+    def test_loader_called_once_on_first_access(self):
+        calls = []
+        
+        def loader():
+            calls.append(1)
+            return [HistoryEntry("2024-01-01 10:00:00", 3)]
+        
+        history = LazyHistory(loader=loader, length=1)
+        assert len(history) == 1
+        assert calls == []
+        assert [h.count for h in history] == [3]
+        assert [h.count for h in history] == [3]
+        assert calls == [1]
+    
+    def test_append_after_lazy_load(self):
+        station = Station.from_dict("Test", {
+            'history': [{'timestamp': '2024-01-01 10:00:00', 'count': 1}]})
+        station.add_history(2, "2024-01-01 11:00:00")
+        assert [h.count for h in station.history] == [1, 2]
+        assert station.history == [HistoryEntry("2024-01-01 10:00:00", 1),
+                                   HistoryEntry("2024-01-01 11:00:00", 2)]
+    
+    def test_plain_list_is_wrapped(self):
+        station = Station("Test", 0, 5, 20, history=[HistoryEntry("2024-01-01 10:00:00", 1)])
+        assert isinstance(station.history, LazyHistory)
+        assert len(station.history) == 1
 
 
 class TestHistoryEntry:
@@ -79,6 +191,26 @@ class TestHistoryEntry:
         
         assert entry.timestamp == "2024-01-01 10:00:00"
         assert entry.count == 15
+    
+    def test_stores_epoch(self):
+        entry = HistoryEntry("2024-01-01 10:30:00", 15)
+        assert entry.epoch == parse_timestamp("2024-01-01 10:30:00")
+        assert entry.hour == 10
+        assert HistoryEntry(entry.epoch, 15) == entry
+
+
+class TestStationCopy:
+    def test_copy_has_own_history(self):
+        station = Station.from_dict("A", {'current': 1, 'history': [
+            {'timestamp': '2024-01-01 10:00:00', 'count': 1}]})
+        clone = station.copy()
+        assert not clone.history.is_loaded
+        station.add_history(4, "2024-01-01 11:00:00")
+        assert clone.current == 1
+        assert len(clone.history) == 1
+        clone2 = station.copy()
+        station.add_history(6, "2024-01-01 12:00:00")
+        assert [h.count for h in clone2.history] == [1, 4]
 
 
 class TestGlobalHistoryEntry:
@@ -95,6 +227,92 @@ class TestGlobalHistoryEntry:
         assert entry.count == 15
         assert entry.min_lru == 5
         assert entry.max_lru == 20
+    
+    def test_string_round_trip(self):
+        data = {'station': 'Test', 'timestamp': '2024-01-01 22:15:00',
+                'count': 15, 'min': 5, 'max': 20}
+        entry = GlobalHistoryEntry.from_dict(data)
+        
+        assert entry.epoch == parse_timestamp(data['timestamp'])
+        assert entry.hour == 22
+        assert entry.to_dict() == data
+
+
+
+class TestTimestamps:
+    def test_round_trip(self):
+        for ts in ["2024-01-01 10:00:00", "1999-12-31 23:59:59", "2024-02-29 00:00:01"]:
+            assert format_timestamp(parse_timestamp(ts)) == ts
+    
+    def test_epoch_is_wall_clock(self):
+        assert parse_timestamp("1970-01-02 01:00:00") == 86400 + 3600
+    
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            parse_timestamp("2024-13-01 10:00:00")
+        with pytest.raises(ValueError):
+            parse_timestamp("yesterday")
+
+
+class TestHistoryColumns:
+    def test_append_and_read(self):
+        columns = HistoryColumns()
+        columns.append(HistoryEntry("2024-01-01 10:00:00", 3))
+        columns.append_values(parse_timestamp("2024-01-01 11:00:00"), 5)
+        
+        assert len(columns) == 2
+        assert columns[-1] == HistoryEntry("2024-01-01 11:00:00", 5)
+        assert list(columns.counts) == [3, 5]
+        assert columns.to_list() == [
+            {'timestamp': '2024-01-01 10:00:00', 'count': 3},
+            {'timestamp': '2024-01-01 11:00:00', 'count': 5}]
+
+
+class TestGlobalHistoryLog:
+    def make_entry(self, station, count, hour=10):
+        return GlobalHistoryEntry(station=station, timestamp=f"2024-01-01 {hour:02d}:00:00",
+                                  count=count, min_lru=5, max_lru=20)
+    
+    def test_interns_station_names(self):
+        log = GlobalHistoryLog([self.make_entry("A", 1), self.make_entry("B", 2),
+                                self.make_entry("A", 3, 11)])
+        assert log.station_names == ["A", "B"]
+        assert list(log.station_ids) == [0, 1, 0]
+    
+    def test_list_api(self):
+        entries = [self.make_entry("A", 1), self.make_entry("B", 2, 11)]
+        log = GlobalHistoryLog()
+        for entry in entries:
+            log.append(entry)
+        
+        assert len(log) == 2
+        assert log == entries
+        assert log[-1] == entries[1]
+        assert log[0:1] == entries[:1]
+        assert [e.to_dict() for e in log] == log.to_list()
+        with pytest.raises(IndexError):
+            log[2]
+    
+    def test_delete_and_insert(self):
+        log = GlobalHistoryLog([self.make_entry("A", 1), self.make_entry("B", 2)])
+        del log[0]
+        log.insert(0, self.make_entry("C", 9))
+        assert [e.station for e in log] == ["C", "B"]
+    
+    def test_copy_is_independent(self):
+        log = GlobalHistoryLog([self.make_entry("A", 1)])
+        clone = log.copy()
+        log.append(self.make_entry("B", 2, 11))
+        clone.append(self.make_entry("C", 3, 12))
+        assert [e.station for e in log] == ["A", "B"]
+        assert [e.station for e in clone] == ["A", "C"]
+
+    
+    def test_drop_before(self):
+        log = GlobalHistoryLog([self.make_entry("A", 1, 8), self.make_entry("B", 2, 9),
+                                self.make_entry("A", 3, 10)])
+        assert log.drop_before(parse_timestamp("2024-01-01 09:00:00")) == 1
+        assert [(e.station, e.count) for e in log] == [("B", 2), ("A", 3)]
 
 
 if __name__ == "__main__":
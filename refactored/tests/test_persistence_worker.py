@@ -0,0 +1,136 @@
+"""Unit tests for persistence_worker module."""
+import threading
+import pytest
+from data_manager import DataManager, DataSaveError
+from models import Station, GlobalHistoryEntry, GlobalHistoryLog
+from persistence_worker import PersistenceWorker, APPEND, SAVE
+
+
+class BlockingManager:
+    """Records saves; the first save waits until released."""
+
+    journaled = False
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.saved = []
+
+    def save_data(self, stations, history):
+        self.started.set()
+        self.release.wait(5)
+        self.saved.append(({name: s.current for name, s in stations.items()}, len(history)))
+
+    def append_records(self, records):
+        return False
+
+
+@pytest.fixture
+def data():
+    stations = {"A": Station("A", current=1, min_lru=0, max_lru=10)}
+    stations["A"].add_history(1, "2024-01-01 08:00:00")
+    history = GlobalHistoryLog([GlobalHistoryEntry("A", "2024-01-01 08:00:00", 1, 0, 10)])
+    return stations, history
+
+
+class TestPersistenceWorker:
+    def test_snapshot_taken_on_enqueue(self, data):
+        stations, history = data
+        manager = BlockingManager()
+        worker = PersistenceWorker(manager)
+        worker.request_save(stations, history)
+        assert manager.started.wait(5)
+
+        # Mutations after the request are not part of the save in progress
+        stations["A"].add_history(7)
+        history.append(GlobalHistoryEntry("A", "2024-01-01 09:00:00", 7, 0, 10))
+        manager.release.set()
+        assert worker.stop(5)
+        assert manager.saved == [({"A": 1}, 1)]
+
+    def test_back_to_back_saves_coalesce(self, data):
+        stations, history = data
+        manager = BlockingManager()
+        worker = PersistenceWorker(manager)
+        worker.request_save(stations, history)
+        assert manager.started.wait(5)
+
+        for count in (2, 3, 4):
+            stations["A"].add_history(count)
+            worker.request_save(stations, history)
+        manager.release.set()
+        assert worker.flush(5)
+
+        assert manager.saved == [({"A": 1}, 1), ({"A": 4}, 1)]
+        assert worker.saves_coalesced == 2
+        worker.stop(5)
+
+    def test_journal_order_preserved(self, tmp_path, data):
+        stations, history = data
+        manager = DataManager(str(tmp_path / "data.json"), journaled=True)
+        worker = PersistenceWorker(manager)
+
+        worker.request_save(stations, history)
+        entry = GlobalHistoryEntry("A", "2024-01-01 09:00:00", 5, 0, 10)
+        stations["A"].add_history(entry.count, entry.timestamp)
+        history.append(entry)
+        worker.append_update(entry)
+        worker.request_save(stations, history)
+        assert worker.stop(5)
+
+        # Neither save was dropped in favour of the other around the append,
+        # so the journaled update is neither lost nor replayed twice
+        assert worker.saves_written == 2
+        loaded, loaded_history = DataManager(str(tmp_path / "data.json"), journaled=True).load_data()
+        assert loaded["A"].current == 5
+        assert len(loaded["A"].history) == 2
+        assert len(loaded_history) == 2
+
+    def test_errors_reported(self, data):
+        class FailingManager(BlockingManager):
+            def save_data(self, stations, history):
+                raise DataSaveError("disk full")
+
+        errors = []
+        worker = PersistenceWorker(FailingManager(), on_error=lambda kind, e: errors.append((kind, str(e))))
+        worker.request_save(*data)
+        assert worker.stop(5)
+        assert errors == [(SAVE, "disk full")]
+
+    def test_checkpoint_requested(self, data):
+        class CheckpointManager(BlockingManager):
+            def append_records(self, records):
+                return True
+
+        checkpoints = []
+        worker = PersistenceWorker(CheckpointManager(), on_checkpoint=lambda: checkpoints.append(APPEND))
+        worker.append_update(GlobalHistoryEntry("A", "2024-01-01 09:00:00", 5, 0, 10))
+        assert worker.flush(5)
+        assert checkpoints == [APPEND]
+        worker.stop(5)
+
+    def test_tasks_run_in_order_on_the_worker(self, data):
+        manager = BlockingManager()
+        worker = PersistenceWorker(manager)
+        worker.request_save(*data)
+        assert manager.started.wait(5)
+
+        results, errors, threads = [], [], []
+        worker.run_task(lambda: threads.append(threading.current_thread()) or len(manager.saved),
+                        on_done=results.append)
+        worker.run_task(lambda: 1 / 0, on_done=results.append, on_error=errors.append)
+        manager.release.set()
+        assert worker.stop(5)
+        assert results == [1]
+        assert [type(e) for e in errors] == [ZeroDivisionError]
+        assert threads[0] is not threading.current_thread()
+
+    def test_no_requests_after_stop(self, data):
+        worker = PersistenceWorker(BlockingManager())
+        assert worker.stop(5)
+        with pytest.raises(RuntimeError):
+            worker.request_save(*data)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,118 @@
+"""Unit tests for retention module."""
+import pytest
+from models import Station, GlobalHistoryEntry, GlobalHistoryLog, Rollup, parse_timestamp
+from retention import (RetentionPolicy, DAY, HOUR, RAW, HOURLY, DAILY, merge_rollups,
+                       trend_points, summarize)
+from state_store import StationStore
+from time_slot_engine import TimeSlotBucketer
+
+START = parse_timestamp("2024-01-01 00:00:00")
+
+
+def populated(hours):
+    """Station A with counts 1, 2, 3 at :10, :20, :30 of each hour."""
+    station = Station("A", 0, 5, 20)
+    history = GlobalHistoryLog()
+    for hour in range(hours):
+        for minute, count in ((10, 1), (20, 2), (30, 3)):
+            epoch = START + hour * HOUR + minute * 60
+            station.add_history(count, epoch)
+            history.append(GlobalHistoryEntry("A", epoch, count, 5, 20))
+    return {"A": station}, history
+
+
+class TestRetentionPolicy:
+    def test_rolls_raw_into_hourly(self):
+        stations, history = populated(48)
+        now = START + 48 * HOUR
+        result = RetentionPolicy(raw_days=1, hourly_days=None).apply(stations, history, now)
+
+        station = stations["A"]
+        assert result.stations == ["A"]
+        assert result.rolled_entries == 24 * 3
+        assert len(station.history) == 24 * 3
+        assert min(station.history.epochs) >= START + DAY
+        assert len(station.hourly) == 24
+        first = station.hourly[0]
+        assert (first.start, first.min_count, first.max_count, first.last, first.samples) == \
+            (START, 1, 3, 3, 3)
+        assert first.avg == 2.0
+        assert result.dropped_rows == 24 * 3
+        assert len(history) == 24 * 3
+
+    def test_rolls_hourly_into_daily(self):
+        stations, history = populated(72)
+        now = START + 72 * HOUR
+        RetentionPolicy(raw_days=2, hourly_days=None).apply(stations, history, now)
+        result = RetentionPolicy(raw_days=1, hourly_days=2).apply(stations, history, now)
+
+        station = stations["A"]
+        assert result.rolled_hours == 24
+        assert [r.start for r in station.daily] == [START]
+        assert station.daily[0].samples == 72
+        assert [r.start for r in station.hourly][0] == START + DAY
+
+    def test_nothing_to_do(self):
+        stations, history = populated(2)
+        result = RetentionPolicy(raw_days=1).apply(stations, history, START + 3 * HOUR)
+        assert not result
+        assert len(stations["A"].history) == 6
+
+    def test_reapplying_combines_buckets(self):
+        existing = [Rollup(START, 1, 3, 6, 3, 3)]
+        merged = merge_rollups(existing, [Rollup(START, 0, 2, 2, 2, 1),
+                                          Rollup(START + HOUR, 4, 4, 4, 4, 1)])
+        assert [(r.start, r.min_count, r.total, r.last, r.samples) for r in merged] == \
+            [(START, 0, 8, 2, 4), (START + HOUR, 4, 4, 4, 1)]
+
+    def test_store_journals_or_requires_full_save(self):
+        stations, history = populated(48)
+        store = StationStore(stations, history)
+        store.take_changes()
+        store.apply_retention(RetentionPolicy(raw_days=1, hourly_days=None), START + 48 * HOUR)
+        assert store.take_changes().full
+
+        # Without global rows to drop the rolled stations are journaled
+        stations, _ = populated(48)
+        store = StationStore(stations, GlobalHistoryLog())
+        store.take_changes()
+        store.apply_retention(RetentionPolicy(raw_days=1, hourly_days=None), START + 48 * HOUR)
+        changes = store.take_changes()
+        assert not changes.full
+        assert [r['op'] for r in changes.records] == ['upsert']
+        assert len(changes.records[0]['hourly']) == 24
+
+
+class TestTrendPoints:
+    def test_points_cover_all_tiers(self):
+        stations, history = populated(72)
+        now = START + 72 * HOUR
+        RetentionPolicy(raw_days=2, hourly_days=None).apply(stations, history, now)
+        RetentionPolicy(raw_days=1, hourly_days=2).apply(stations, history, now)
+        points = trend_points(stations["A"])
+
+        assert [p.tier for p in points[:2]] == [DAILY, HOURLY]
+        assert points[-1].tier == RAW
+        assert points[0].label == "2024-01-01 (daily avg)"
+        assert points[1].label == "2024-01-02 00:00 (hourly avg)"
+        assert sum(p.samples for p in points) == 72 * 3
+        assert summarize(points) == (2.0, 1, 3, 72 * 3)
+
+    def test_summarize_empty(self):
+        assert summarize([]) == (0.0, 0, 0, 0)
+
+
+class TestBucketerUsesRollups:
+    def test_rolled_hours_fill_slots(self):
+        stations, history = populated(24)
+        station = stations["A"]
+        RetentionPolicy(raw_days=0, hourly_days=None).apply(stations, history, START + DAY)
+        assert not station.history
+
+        slots = TimeSlotBucketer().bucket(station, START, START + DAY)
+        assert slots
+        assert set(slots.values()) == {"3"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,172 @@
+"""Unit tests for sqlite_manager module."""
+import sqlite3
+import pytest
+from data_manager import (DataManager, DataSaveError, create_data_manager,
+                          upsert_record, delete_record)
+from models import Station, GlobalHistoryEntry, Rollup, parse_timestamp
+from retention import RetentionPolicy
+from sqlite_manager import SQLiteDataManager, migrate_json_to_sqlite
+
+
+def make_entry(station, count, timestamp):
+    return GlobalHistoryEntry(station=station, timestamp=timestamp,
+                              count=count, min_lru=5, max_lru=20)
+
+
+@pytest.fixture
+def populated(tmp_path):
+    station = Station("A", current=0, min_lru=5, max_lru=20, rack_location="R1")
+    history = []
+    for hour, count in [(8, 3), (9, 6), (10, 9)]:
+        timestamp = f"2024-01-01 {hour:02d}:00:00"
+        station.add_history(count, timestamp)
+        history.append(make_entry("A", count, timestamp))
+    manager = SQLiteDataManager(str(tmp_path / "lru_data.db"))
+    manager.save_data({"A": station, "B": Station("B", 1, 2, 3)}, history)
+    return manager
+
+
+class TestSQLiteDataManager:
+    def test_missing_file(self, tmp_path):
+        assert SQLiteDataManager(str(tmp_path / "none.db")).load_data() == ({}, [])
+
+    def test_round_trip(self, populated):
+        stations, history = SQLiteDataManager(populated.db_file).load_data()
+        assert set(stations) == {"A", "B"}
+        assert stations["A"].rack_location == "R1"
+        assert [h.count for h in stations["A"].history] == [3, 6, 9]
+        assert [e.count for e in history] == [3, 6, 9]
+
+    def test_rollups_round_trip(self, populated):
+        stations, history = populated.load_data()
+        stations["A"].hourly = [Rollup(parse_timestamp("2023-12-01 08:00:00"), 1, 4, 10, 4, 4)]
+        stations["A"].daily = [Rollup(parse_timestamp("2023-11-01 00:00:00"), 0, 9, 90, 5, 30)]
+        populated.save_data(stations, history)
+
+        loaded, _ = populated.load_data()
+        assert loaded["A"].hourly == stations["A"].hourly
+        assert loaded["A"].daily == stations["A"].daily
+        assert loaded["B"].hourly == []
+
+    def test_stats_follow_appended_updates(self, populated):
+        stations, _ = populated.load_data()
+        assert stations["A"].stats.count == 3
+        populated.append_update(make_entry("A", 30, "2024-01-01 11:00:00"))
+
+        stats = SQLiteDataManager(populated.db_file).load_data()[0]["A"].stats
+        assert (stats.count, stats.total, stats.max_count) == (4, 48, 30)
+        assert stats.last_status == 'at_max'
+
+    def test_history_loaded_lazily(self, populated):
+        stations, _ = SQLiteDataManager(populated.db_file).load_data()
+        assert not stations["A"].history.is_loaded
+        assert len(stations["A"].history) == 3
+        last = stations["A"].history.last_timestamp()
+        assert not stations["A"].history.is_loaded
+        assert last == stations["A"].history[-1].timestamp
+        assert stations["A"].history[0].count == 3
+
+    def test_save_keeps_unloaded_history(self, populated):
+        stations, history = populated.load_data()
+        stations["B"].add_history(7, "2024-01-02 08:00:00")
+        populated.save_data(stations, history)
+
+        stations, _ = populated.load_data()
+        assert [h.count for h in stations["A"].history] == [3, 6, 9]
+        assert [h.count for h in stations["B"].history] == [7]
+
+    def test_save_leaves_unknown_stats_unbuilt(self, populated):
+        with sqlite3.connect(populated.db_file) as conn:
+            conn.execute("DELETE FROM station_stats WHERE station = 'A'")
+        stations, history = populated.load_data()
+        stations["B"].add_history(2, "2024-01-02 08:00:00")
+        populated.save_data(stations, history)
+        assert not stations["A"].history.is_loaded
+
+        stations, _ = populated.load_data()
+        assert not stations["A"].has_stats
+        assert stations["B"].stats.count == 1
+        assert stations["A"].stats.count == 3
+
+    def test_append_update(self, populated):
+        populated.append_update(make_entry("A", 12, "2024-01-01 11:00:00"))
+        stations, history = populated.load_data()
+        assert stations["A"].current == 12
+        assert stations["A"].history[-1].count == 12
+        assert len(history) == 4
+
+    def test_append_records(self, populated):
+        c = Station("C", current=4, min_lru=0, max_lru=9)
+        c.add_history(4, "2024-01-02 08:00:00")
+        populated.append_records([
+            upsert_record(c, include_history=True),
+            upsert_record(Station("A", current=9, min_lru=1, max_lru=30)),
+            delete_record("B"),
+        ])
+
+        stations, _ = populated.load_data()
+        assert set(stations) == {"A", "C"}
+        assert stations["A"].max_lru == 30
+        assert stations["A"].rack_location == ""
+        assert [h.count for h in stations["A"].history] == [3, 6, 9]
+        assert [h.count for h in stations["C"].history] == [4]
+
+    def test_station_history_window(self, populated):
+        entries = populated.get_station_history("A", start="2024-01-01 09:00:00",
+                                                end="2024-01-01 10:00:00")
+        assert [e.count for e in entries] == [6]
+        assert populated.count_station_history("A") == 3
+        assert populated.count_station_history("B") == 0
+
+    def test_iter_history_window(self, populated):
+        rows = list(populated.iter_history(start="2024-01-01 09:00:00"))
+        assert [r.count for r in rows] == [6, 9]
+
+
+class TestMigration:
+    def test_migrate_from_json(self, tmp_path):
+        json_file = str(tmp_path / "lru_data.json")
+        station = Station("A", current=0, min_lru=5, max_lru=20)
+        station.add_history(4, "2024-01-01 10:00:00")
+        DataManager(json_file).save_data(
+            {"A": station}, [make_entry("A", 4, "2024-01-01 10:00:00")])
+
+        db_file = str(tmp_path / "lru_data.db")
+        assert migrate_json_to_sqlite(json_file, db_file, archive_dir=None) == (1, 1)
+        stations, history = SQLiteDataManager(db_file).load_data()
+        assert stations["A"].current == 4
+
+        with pytest.raises(DataSaveError):
+            migrate_json_to_sqlite(json_file, db_file, archive_dir=None)
+
+    def test_migrate_includes_archive(self, tmp_path):
+        json_file = str(tmp_path / "lru_data.json")
+        archive_dir = str(tmp_path / "history")
+        station = Station("A", current=0, min_lru=5, max_lru=20)
+        history = []
+        for timestamp, count in [("2024-01-05 08:00:00", 1), ("2024-02-03 08:00:00", 2)]:
+            station.add_history(count, timestamp)
+            history.append(make_entry("A", count, timestamp))
+        source = DataManager(json_file, journaled=False, archive_dir=archive_dir)
+        source.save_data({"A": station}, history)
+        source.archive.apply_retention(RetentionPolicy(raw_days=30, hourly_days=None),
+                                       parse_timestamp("2024-03-15 00:00:00"))
+
+        db_file = str(tmp_path / "lru_data.db")
+        assert migrate_json_to_sqlite(json_file, db_file, archive_dir=archive_dir) == (1, 1)
+        stations, history = SQLiteDataManager(db_file).load_data()
+        # January was rolled up; February is still raw
+        assert [h.count for h in stations["A"].history] == [2]
+        assert [(r.timestamp, r.last) for r in stations["A"].hourly] == \
+            [("2024-01-05 08:00:00", 1)]
+        assert [e.count for e in history] == [2]
+
+    def test_factory(self):
+        assert isinstance(create_data_manager("sqlite"), SQLiteDataManager)
+        assert isinstance(create_data_manager("json"), DataManager)
+        with pytest.raises(ValueError):
+            create_data_manager("xml")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,134 @@
+"""Unit tests for state_store module."""
+import threading
+import pytest
+from data_manager import DataManager
+from models import Station, GlobalHistoryEntry, GlobalHistoryLog
+from state_store import ReadWriteLock, StationStore
+
+
+@pytest.fixture
+def store():
+    return StationStore({"A": Station("A", current=0, min_lru=5, max_lru=20)}, GlobalHistoryLog())
+
+
+class TestStationStore:
+    def test_record_count_updates_both(self, store):
+        entry = store.record_count("A", 7, 1704096000)
+        assert store.stations["A"].current == 7
+        assert len(store.stations["A"].history) == 1
+        assert list(store.history) == [entry]
+        assert entry.min_lru == 5
+
+    def test_snapshot_is_isolated(self, store):
+        snap = store.snapshot()
+        store.record_count("A", 7, 1704096000)
+        store.add_station(Station("B", current=1, min_lru=0, max_lru=5))
+        assert snap.stations["A"].current == 0
+        assert len(snap.stations["A"].history) == 0
+        assert len(snap.history) == 0
+        assert list(snap.stations) == ["A"]
+
+    def test_snapshot_reused_until_write(self, store):
+        first = store.snapshot()
+        assert store.snapshot() is first
+        store.set_limits("A", 1, 2)
+        second = store.snapshot()
+        assert second is not first
+        assert second.version == store.version
+        assert (second.stations["A"].min_lru, second.stations["A"].max_lru) == (1, 2)
+
+    def test_replace_and_remove(self, store):
+        store.replace({"B": Station("B", current=1, min_lru=0, max_lru=5)}, GlobalHistoryLog())
+        assert list(store.stations) == ["B"]
+        store.remove_station("B")
+        assert store.snapshot().stations == {}
+
+    def test_snapshot_waits_for_writer(self, store):
+        started = threading.Event()
+        release = threading.Event()
+
+        def writer():
+            with store.write():
+                store.stations["A"].current = 99
+                started.set()
+                release.wait(5)
+                store.stations["A"].current = 3
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        assert started.wait(5)
+        result = []
+        reader = threading.Thread(target=lambda: result.append(store.snapshot()))
+        reader.start()
+        reader.join(0.1)
+        assert reader.is_alive()  # Blocked while the write is half done
+        release.set()
+        thread.join(5)
+        reader.join(5)
+        assert result[0].stations["A"].current == 3
+
+
+class TestChangeTracking:
+    def test_helpers_record_changes(self, store):
+        store.add_station(Station("B", current=0, min_lru=0, max_lru=5))
+        store.record_count("A", 7, 1704096000)
+        store.set_limits("A", 1, 2)
+        store.remove_station("B")
+
+        changes = store.take_changes()
+        assert not changes.full
+        assert [r['op'] for r in changes.records] == ['upsert', 'update', 'upsert', 'delete']
+        assert 'history' in changes.records[0]
+        assert 'history' not in changes.records[2]
+        assert not store.take_changes()
+
+    def test_write_with_changed_names(self, store):
+        with store.write(changed=["C"]):
+            store.stations["C"] = Station("C", current=3, min_lru=0, max_lru=5)
+            store.history.append(GlobalHistoryEntry("C", 1704096000, 3, 0, 5))
+        changes = store.take_changes()
+        assert [r['op'] for r in changes.records] == ['upsert', 'append']
+
+    def test_untracked_write_needs_full_save(self, store):
+        with store.write():
+            store.stations["A"].current = 4
+        assert store.take_changes().full
+
+    def test_replace(self, store):
+        store.replace({}, GlobalHistoryLog(), persisted=True)
+        assert not store.take_changes()
+        store.replace({}, GlobalHistoryLog())
+        assert store.take_changes().full
+
+    def test_changes_replay_to_same_state(self, tmp_path, store):
+        manager = DataManager(str(tmp_path / "data.json"), journaled=True)
+        manager.save_data(store.stations, store.history)
+        store.take_changes()
+
+        store.record_count("A", 7, 1704096000)
+        store.add_station(Station("B", current=0, min_lru=0, max_lru=5))
+        store.record_count("B", 2, 1704099600)
+        manager.append_records(store.take_changes().records)
+
+        stations, history = DataManager(manager.data_file).load_data()
+        assert {n: s.current for n, s in stations.items()} == {"A": 7, "B": 2}
+        assert [h.count for h in stations["B"].history] == [2]
+        assert list(history) == list(store.history)
+
+
+class TestReadWriteLock:
+    def test_readers_share(self):
+        lock = ReadWriteLock()
+        with lock.read():
+            done = threading.Event()
+
+            def other_reader():
+                with lock.read():
+                    done.set()
+
+            threading.Thread(target=other_reader).start()
+            assert done.wait(5)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
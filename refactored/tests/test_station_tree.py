@@ -0,0 +1,89 @@
+"""Unit tests for station_tree module."""
+import pytest
+from models import Station
+from station_tree import StationTree
+
+
+class FakeTree:
+    """Records Treeview calls made by StationTree."""
+
+    def __init__(self):
+        self.order = []
+        self.rows = {}
+        self.calls = 0
+        self._next = 0
+
+    def insert(self, parent, index, text, values, tags):
+        self.calls += 1
+        self._next += 1
+        iid = f"I{self._next}"
+        self.order.insert(index, iid)
+        self.rows[iid] = (text, values, tags)
+        return iid
+
+    def item(self, iid, values, tags):
+        self.calls += 1
+        self.rows[iid] = (self.rows[iid][0], values, tags)
+
+    def delete(self, iid):
+        self.calls += 1
+        self.order.remove(iid)
+        del self.rows[iid]
+
+    def texts(self):
+        return [self.rows[iid][0] for iid in self.order]
+
+
+@pytest.fixture
+def stations():
+    return {
+        "B": Station("B", current=1, min_lru=5, max_lru=20),
+        "A": Station("A", current=10, min_lru=5, max_lru=20),
+        "C": Station("C", current=25, min_lru=5, max_lru=20),
+    }
+
+
+class TestStationTree:
+    def test_initial_sync_sorted(self, stations):
+        tree = FakeTree()
+        view = StationTree(tree)
+        assert view.sync(stations) is True
+        assert tree.texts() == ["A", "B", "C"]
+        assert view.status_counts == {"normal": 1, "under_min": 1, "at_max": 1}
+
+    def test_unchanged_rows_not_touched(self, stations):
+        tree = FakeTree()
+        view = StationTree(tree)
+        view.sync(stations)
+        tree.calls = 0
+        assert view.sync(stations) is False
+        assert tree.calls == 0
+
+    def test_single_update(self, stations):
+        tree = FakeTree()
+        view = StationTree(tree)
+        view.sync(stations)
+        tree.calls = 0
+
+        stations["B"].current = 10
+        assert view.sync(stations, ["B"]) is False
+        assert tree.calls == 1
+        assert tree.rows[view.items["B"]][1][0] == 10
+        assert view.status_counts["normal"] == 2
+        assert view.status_counts["under_min"] == 0
+
+    def test_add_and_delete(self, stations):
+        tree = FakeTree()
+        view = StationTree(tree)
+        view.sync(stations)
+
+        stations["AB"] = Station("AB", current=0, min_lru=0, max_lru=5)
+        del stations["C"]
+        assert view.sync(stations, ["AB", "C"]) is True
+        assert tree.texts() == ["A", "AB", "B"]
+        assert view.status_counts["at_max"] == 0
+        assert view.status_counts["normal"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,136 @@
+"""Unit tests for sync_merge module."""
+import pytest
+from sync_merge import merge_documents, merge_entries, SINCE
+
+
+def station(count_history=(), **fields):
+    history = [{'timestamp': f"2024-01-01 {hour:02d}:00:00", 'count': count}
+               for hour, count in count_history]
+    data = {'current': history[-1]['count'] if history else 0, 'min': 5, 'max': 20,
+            'history': history, 'test_description': '', 'rack_location': ''}
+    data.update(fields)
+    return data
+
+
+def entry(name, hour, count):
+    return {'station': name, 'timestamp': f"2024-01-01 {hour:02d}:00:00",
+            'count': count, 'min': 5, 'max': 20}
+
+
+def doc(stations, history=()):
+    return {'stations': stations, 'history': list(history)}
+
+
+class TestMergeEntries:
+    def key(self, e):
+        return (e['timestamp'], e['count'])
+
+    def test_union_in_time_order(self):
+        base = [{'timestamp': '2024-01-01 08:00:00', 'count': 1}]
+        local = base + [{'timestamp': '2024-01-01 10:00:00', 'count': 3}]
+        remote = base + [{'timestamp': '2024-01-01 09:00:00', 'count': 2}]
+        merged = merge_entries(base, local, remote, self.key)
+        assert [e['count'] for e in merged] == [1, 2, 3]
+
+    def test_dropped_on_one_side_stays_dropped(self):
+        base = [{'timestamp': '2024-01-01 08:00:00', 'count': 1},
+                {'timestamp': '2024-01-01 09:00:00', 'count': 2}]
+        local = base[1:]
+        remote = base + [{'timestamp': '2024-01-01 10:00:00', 'count': 3}]
+        merged = merge_entries(base, local, remote, self.key)
+        assert [e['count'] for e in merged] == [2, 3]
+
+
+class TestMergeDocuments:
+    def test_both_sides_record_counts(self):
+        base = doc({'A': station([(8, 1)])}, [entry('A', 8, 1)])
+        local = doc({'A': station([(8, 1), (9, 2)])}, [entry('A', 8, 1), entry('A', 9, 2)])
+        remote = doc({'A': station([(8, 1), (10, 3)])}, [entry('A', 8, 1), entry('A', 10, 3)])
+        result = merge_documents(base, local, remote)
+        merged = result.data['stations']['A']
+        assert [e['count'] for e in merged['history']] == [1, 2, 3]
+        assert merged['current'] == 3
+        assert [e['count'] for e in result.data['history']] == [1, 2, 3]
+        assert result.added_history == 1
+        assert result.conflicts == []
+
+    def test_edits_to_different_fields_merge(self):
+        base = doc({'A': station()})
+        local = doc({'A': station(min=7)})
+        remote = doc({'A': station(rack_location='R9')})
+        result = merge_documents(base, local, remote)
+        assert result.data['stations']['A']['min'] == 7
+        assert result.data['stations']['A']['rack_location'] == 'R9'
+        assert result.conflicts == []
+
+    def test_same_field_changed_both_sides_is_conflict(self):
+        base = doc({'A': station()})
+        result = merge_documents(base, doc({'A': station(max=30)}), doc({'A': station(max=40)}))
+        assert result.data['stations']['A']['max'] == 30
+        assert [(c.station, c.field, c.local, c.remote) for c in result.conflicts] == [
+            ('A', 'max', 30, 40)]
+
+    def test_same_change_both_sides_is_not_conflict(self):
+        base = doc({'A': station()})
+        result = merge_documents(base, doc({'A': station(max=30)}), doc({'A': station(max=30)}))
+        assert result.conflicts == []
+
+    def test_added_and_deleted_stations(self):
+        base = doc({'A': station(), 'B': station()})
+        local = doc({'A': station(), 'B': station(), 'C': station()})
+        remote = doc({'A': station()})
+        result = merge_documents(base, local, remote)
+        assert sorted(result.data['stations']) == ['A', 'C']
+
+    def test_delete_of_changed_station_is_conflict(self):
+        base = doc({'A': station(), 'B': station()})
+        local = doc({'A': station(), 'B': station(min=1)})
+        remote = doc({'A': station()})
+        result = merge_documents(base, local, remote)
+        assert 'B' in result.data['stations']
+        assert result.conflicts[0].field is None
+
+    def test_without_base_unions_everything(self):
+        local = doc({'A': station([(8, 1)])}, [entry('A', 8, 1)])
+        remote = doc({'B': station([(9, 2)])}, [entry('B', 9, 2)])
+        result = merge_documents(None, local, remote)
+        assert sorted(result.data['stations']) == ['A', 'B']
+        assert len(result.data['history']) == 2
+
+    def test_stats_dropped_when_remote_adds_history(self):
+        base = doc({'A': station([(8, 1)])})
+        local = doc({'A': station([(8, 1)], stats={'count': 1})})
+        unchanged = merge_documents(base, local, base)
+        assert unchanged.data['stations']['A']['stats'] == {'count': 1}
+
+        remote = doc({'A': station([(8, 1), (9, 2)])})
+        merged = merge_documents(base, local, remote)
+        assert 'stats' not in merged.data['stations']['A']
+
+    def test_rollups_unioned_by_bucket(self):
+        hour = lambda h, samples: {'timestamp': f"2024-01-01 {h:02d}:00:00", 'min': 1,
+                                   'max': 3, 'sum': 2 * samples, 'last': 3, 'samples': samples}
+        local = doc({'A': station(hourly=[hour(8, 3), hour(9, 2)])})
+        remote = doc({'A': station(hourly=[hour(9, 3), hour(10, 1)])})
+        result = merge_documents(doc({'A': station()}), local, remote)
+        assert [(r['timestamp'][11:13], r['samples']) for r in result.data['stations']['A']['hourly']] \
+            == [('08', 3), ('09', 3), ('10', 1)]
+        assert 'daily' not in result.data['stations']['A']
+
+    def test_since_limits_the_compared_range(self):
+        base = doc({'A': station([(8, 1)]), 'B': station([(8, 4)])},
+                   [entry('A', 8, 1), entry('B', 8, 4)])
+        # Local archived everything before 09:00; remote deleted B and added to A
+        local = doc({'A': station(current=1), 'B': station(current=4)})
+        local[SINCE] = "2024-01-01 09:00:00"
+        remote = doc({'A': station([(8, 1), (10, 2)])}, [entry('A', 8, 1), entry('A', 10, 2)])
+        result = merge_documents(base, local, remote)
+        assert not result.conflicts
+        assert list(result.data['stations']) == ['A']
+        assert [e['count'] for e in result.data['stations']['A']['history']] == [2]
+        assert [e['count'] for e in result.data['history']] == [2]
+        assert result.data[SINCE] == "2024-01-01 09:00:00"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
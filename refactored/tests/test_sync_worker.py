@@ -0,0 +1,123 @@
+"""Unit tests for sync_worker module."""
+import queue
+import pytest
+from github_sync_manager import GitHubSyncManager, GitHubHTTPError
+from sync_worker import SyncWorker, CHECK, PUSH, retry_after
+from tests.contents_api_stub import ContentsAPIStub
+from tests.test_github_sync import make_data
+
+
+@pytest.fixture
+def stub():
+    server = ContentsAPIStub().start()
+    yield server
+    server.stop()
+
+
+class Events:
+    """Collects worker callbacks for the test thread to wait on."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def __getattr__(self, name):
+        return lambda *args: self.queue.put((name, args))
+
+    def next(self, timeout=5):
+        return self.queue.get(timeout=timeout)
+
+
+def make_worker(manager, document, events, **kwargs):
+    kwargs.setdefault('interval', 3600)
+    return SyncWorker(manager, lambda: document, push_delay=0,
+                      on_remote_data=events.remote_data, on_checked=events.checked,
+                      on_pushed=events.pushed, on_error=events.error, **kwargs)
+
+
+class FailingManager:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def check_remote_changes(self):
+        self.calls += 1
+        raise self.error
+
+
+class TestSyncWorker:
+    def test_first_check_pulls_remote_changes(self, stub):
+        data = make_data()
+        GitHubSyncManager("owner", "repo", api_base=stub.api_base).push_to_github(data, "other pc")
+        events = Events()
+        worker = make_worker(GitHubSyncManager("owner", "repo", api_base=stub.api_base),
+                             {}, events)
+        worker.start()
+        assert events.next() == ('remote_data', (data, False))
+        worker.merged()
+        assert worker.stop(5)
+
+    def test_push_merges_remote_first(self, stub):
+        GitHubSyncManager("owner", "repo", api_base=stub.api_base).push_to_github(
+            make_data(months=1), "other pc")
+        local = make_data()
+        events = Events()
+        manager = GitHubSyncManager("owner", "repo", api_base=stub.api_base)
+        worker = make_worker(manager, local, events)
+        stub.requests.clear()
+        worker.start()
+        worker.request_push(manual=True)
+
+        name, _ = events.next()
+        assert name == 'remote_data'
+        # Nothing is pushed until the pulled data has been merged
+        assert stub.calls("PUT") == []
+        worker.merged()
+        assert events.next() == ('pushed', (True,))
+        assert GitHubSyncManager("owner", "repo", api_base=stub.api_base).pull_from_github() == local
+        assert worker.stop(5)
+
+    def test_failures_back_off(self):
+        events = Events()
+        manager = FailingManager(OSError("network down"))
+        worker = make_worker(manager, {}, events, min_backoff=60, jitter=lambda: 0.0)
+        worker.start()
+        name, (kind, error, manual) = events.next()
+        assert (name, kind, manual) == ('error', CHECK, False)
+        # Manual requests still go through; the periodic check waits
+        worker.request_check(manual=True)
+        assert events.next()[0] == 'error'
+        assert manager.calls == 2
+        assert worker.failures == 2
+        assert worker.stop(5)
+
+    def test_failed_push_is_kept(self):
+        worker = make_worker(FailingManager(OSError("down")), {}, Events())
+        worker._failed(PUSH, OSError("down"), True)
+        assert worker._push_at is not None
+
+
+class TestBackoff:
+    def test_exponential_with_cap(self):
+        worker = SyncWorker(None, dict, min_backoff=10, max_backoff=100, jitter=lambda: 1.0)
+        assert [worker.backoff_delay(n) for n in (1, 2, 3, 5)] == [10, 20, 40, 100]
+
+    def test_jitter_keeps_half(self):
+        worker = SyncWorker(None, dict, min_backoff=10, jitter=lambda: 0.0)
+        assert worker.backoff_delay(1) == 5
+
+    def test_rate_limit_wait_respected(self):
+        error = GitHubHTTPError(403, "Forbidden", headers={
+            'x-ratelimit-remaining': '0', 'x-ratelimit-reset': '1300'})
+        assert error.retry_after(now=1000) == 300
+        wrapped = Exception("Pull failed")
+        wrapped.__cause__ = error
+        assert retry_after(wrapped) == error.retry_after()
+        worker = SyncWorker(None, dict, min_backoff=10, jitter=lambda: 0.0)
+        assert worker.backoff_delay(1, 300) == 300
+
+    def test_plain_forbidden_is_not_rate_limit(self):
+        assert GitHubHTTPError(403, "Forbidden").retry_after() is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,75 @@
+"""Unit tests for time_slot_engine module."""
+import random
+import pytest
+from datetime import date, datetime
+from config import TIME_SLOT_MAP
+from models import Station, parse_timestamp
+from time_slot_engine import TimeSlotBucketer, build_hour_lookup, current_shift, shift_window
+
+
+def reference_slots(station):
+    """Original per-slot scan the engine replaces."""
+    result = {}
+    for time_slot, (start_hour, end_hour) in TIME_SLOT_MAP.items():
+        latest_value = None
+        for entry in station.history:
+            if start_hour <= entry.hour < end_hour:
+                latest_value = entry.count
+        if latest_value is not None:
+            result[time_slot] = str(latest_value)
+    return result
+
+
+class TestHourLookup:
+    def test_overlapping_slots(self):
+        lookup = build_hour_lookup()
+        assert lookup[16] == ('2PM', '4PM')
+        assert lookup[14] == ('2PM',)
+        assert lookup[0] == ('12AM',)
+        assert lookup[3] == ()
+
+
+class TestTimeSlotBucketer:
+    def test_matches_reference(self):
+        rng = random.Random(42)
+        station = Station("A", 0, 5, 20)
+        for day in range(1, 4):
+            for _ in range(60):
+                ts = f"2024-01-{day:02d} {rng.randrange(24):02d}:{rng.randrange(60):02d}:00"
+                station.add_history(rng.randrange(50), ts)
+        
+        assert TimeSlotBucketer().bucket(station) == reference_slots(station)
+    
+    def test_empty_history(self):
+        assert TimeSlotBucketer().bucket(Station("A", 0, 5, 20)) == {}
+    
+    def test_window(self):
+        station = Station("A", 0, 5, 20)
+        station.add_history(1, "2024-01-01 06:30:00")
+        station.add_history(2, "2024-01-02 06:30:00")
+        station.add_history(3, "2024-01-02 19:00:00")
+        
+        start, end = shift_window(date(2024, 1, 1), '1st')
+        assert TimeSlotBucketer().bucket(station, start, end) == {'6AM': '1'}
+        assert TimeSlotBucketer().bucket(station) == {'6AM': '2', '6PM': '3'}
+
+
+class TestShiftWindow:
+    def test_second_shift_crosses_midnight(self):
+        start, end = shift_window(date(2024, 1, 1), '2nd')
+        assert start == parse_timestamp("2024-01-01 18:00:00")
+        assert end == parse_timestamp("2024-01-02 06:00:00")
+    
+    def test_unknown_shift(self):
+        with pytest.raises(ValueError):
+            shift_window(date(2024, 1, 1), '3rd')
+    
+    def test_current_shift(self):
+        assert current_shift(datetime(2024, 1, 2, 6, 0)) == (date(2024, 1, 2), '1st')
+        assert current_shift(datetime(2024, 1, 2, 18, 30)) == (date(2024, 1, 2), '2nd')
+        # Early morning belongs to the 2nd shift that started the day before
+        assert current_shift(datetime(2024, 1, 2, 5, 59)) == (date(2024, 1, 1), '2nd')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
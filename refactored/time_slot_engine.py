@@ -0,0 +1,91 @@
+"""Single-pass bucketing of station history into FC schedule time slots."""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from models import Station, datetime_to_epoch
+from config import TIME_SLOT_MAP
+
+# Shift boundaries (start hour, length in hours) used for date/shift windows
+SHIFT_WINDOWS = {
+    '1st': (6, 12),    # 6:00am - 6:00pm
+    '2nd': (18, 12),   # 6:00pm - 6:00am next day
+    'day': (6, 24),    # Both shifts
+}
+
+# Names shown when choosing a shift to export
+SHIFT_LABELS = {
+    '1st': "1st shift (6am - 6pm)",
+    '2nd': "2nd shift (6pm - 6am)",
+    'day': "Full day (6am - 6am)",
+}
+
+
+def build_hour_lookup(slot_map: Dict[str, Tuple[int, int]] = TIME_SLOT_MAP) -> List[Tuple[str, ...]]:
+    """Map each hour of the day to the time slots covering it.
+
+    Slots may overlap (2PM covers 14-18 and 4PM covers 16-18), so an hour
+    can belong to more than one slot.
+    """
+    lookup: List[List[str]] = [[] for _ in range(24)]
+    for slot, (start_hour, end_hour) in slot_map.items():
+        for hour in range(start_hour, end_hour):
+            lookup[hour % 24].append(slot)
+    return [tuple(slots) for slots in lookup]
+
+
+def shift_window(day: date, shift: str = 'day') -> Tuple[int, int]:
+    """Return the (start, end) epoch window of a shift starting on a date."""
+    if shift not in SHIFT_WINDOWS:
+        raise ValueError(f"Unknown shift: {shift}")
+    start_hour, length = SHIFT_WINDOWS[shift]
+    start = datetime(day.year, day.month, day.day) + timedelta(hours=start_hour)
+    end = start + timedelta(hours=length)
+    return datetime_to_epoch(start), datetime_to_epoch(end)
+
+
+def current_shift(now: datetime) -> Tuple[date, str]:
+    """The (start date, shift) of the 1st or 2nd shift running at now."""
+    first_start, first_length = SHIFT_WINDOWS['1st']
+    if first_start <= now.hour < first_start + first_length:
+        return now.date(), '1st'
+    if now.hour < first_start:
+        return now.date() - timedelta(days=1), '2nd'
+    return now.date(), '2nd'
+
+
+class TimeSlotBucketer:
+    """Assigns history entries to time slots in one pass over the history."""
+
+    def __init__(self, slot_map: Dict[str, Tuple[int, int]] = TIME_SLOT_MAP):
+        self.slot_map = slot_map
+        self.hour_lookup = build_hour_lookup(slot_map)
+
+    def bucket(self, station: Station, start: Optional[int] = None,
+               end: Optional[int] = None) -> Dict[str, str]:
+        """Latest count per time slot, optionally limited to [start, end).
+
+        Entries are visited in history order, so a later entry overwrites
+        an earlier one in the same slot. Hours already rolled up by
+        retention come first and contribute their last count.
+        """
+        history = station.history
+        if not history and not station.hourly:
+            return {}
+
+        lookup = self.hour_lookup
+        latest: Dict[str, int] = {}
+        for rollup in station.hourly:
+            if start is not None and rollup.start < start:
+                continue
+            if end is not None and rollup.start >= end:
+                continue
+            for slot in lookup[(rollup.start // 3600) % 24]:
+                latest[slot] = rollup.last
+        for epoch, count in zip(history.epochs, history.counts):
+            if start is not None and epoch < start:
+                continue
+            if end is not None and epoch >= end:
+                continue
+            for slot in lookup[(epoch // 3600) % 24]:
+                latest[slot] = count
+
+        return {slot: str(latest[slot]) for slot in self.slot_map if slot in latest}
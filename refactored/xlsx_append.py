@@ -0,0 +1,331 @@
+"""Append sheets and rows to an .xlsx file without loading the workbook.
+
+An .xlsx file is a zip of XML parts. Adding a sheet only touches four
+small parts ([Content_Types].xml, xl/workbook.xml, its .rels and
+xl/styles.xml) plus the new worksheet part; every existing sheet is copied
+across as-is, so an append costs the same however many sheets the report
+already has. Rolling snapshots into one sheet rewrites only that sheet,
+inserting rows before </sheetData>.
+
+Cells are written as inline strings and numbers with direct formatting
+built from the named style specs in excel_styles.
+"""
+import os
+import re
+import shutil
+import zipfile
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from xml.etree.ElementTree import tostring
+from xml.sax.saxutils import escape, quoteattr
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles.numbers import BUILTIN_FORMATS_REVERSE
+from openpyxl.utils import get_column_letter
+from excel_styles import STYLE_SPECS
+from config import TEMP_SUFFIX
+
+# (values, style names) for one row
+Row = Tuple[list, List[str]]
+
+CONTENT_TYPES = '[Content_Types].xml'
+WORKBOOK = 'xl/workbook.xml'
+WORKBOOK_RELS = 'xl/_rels/workbook.xml.rels'
+STYLES = 'xl/styles.xml'
+
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+WORKSHEET_REL = REL_NS + '/worksheet'
+WORKSHEET_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+
+class XlsxPackageError(ValueError):
+    """Raised when a workbook's parts are not laid out as expected."""
+    pass
+
+
+class _StylesPart:
+    """Adds cell formats to styles.xml, reusing identical existing ones."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._xf_ids: Dict[str, int] = {}
+
+    def _children(self, section: str, child: str) -> List[str]:
+        match = re.search(rf'<{section}\b[^>]*(?<!/)>(.*?)</{section}>', self.text, re.S)
+        if match is None:
+            if re.search(rf'<{section}\b[^>]*/>', self.text) is None:
+                raise XlsxPackageError(f"styles.xml has no <{section}>")
+            return []
+        return re.findall(rf'<{child}\b[^>]*?/>|<{child}\b.*?</{child}>', match.group(1), re.S)
+
+    def _index(self, section: str, child: str, xml: str) -> int:
+        """Index of an identical child element, appending it if missing."""
+        children = self._children(section, child)
+        if xml in children:
+            return children.index(xml)
+
+        count = len(children) + 1
+        closing = f'</{section}>'
+        if closing in self.text:
+            self.text = self.text.replace(closing, xml + closing, 1)
+        else:
+            self.text = re.sub(rf'<{section}\b[^>]*/>', f'<{section}>{xml}{closing}',
+                               self.text, count=1)
+        opening = re.search(rf'<{section}\b[^>]*>', self.text)
+        tag = opening.group(0)
+        if 'count="' in tag:
+            new_tag = re.sub(r'count="\d+"', f'count="{count}"', tag)
+        else:
+            new_tag = tag.replace(f'<{section}', f'<{section} count="{count}"', 1)
+        self.text = self.text[:opening.start()] + new_tag + self.text[opening.end():]
+        return count - 1
+
+    def xf_id(self, style: str) -> int:
+        """Cell format index for a named style from excel_styles."""
+        if style in self._xf_ids:
+            return self._xf_ids[style]
+
+        spec = STYLE_SPECS[style]
+        attrs = []
+        number_format = spec.get('number_format')
+        if number_format:
+            if number_format not in BUILTIN_FORMATS_REVERSE:
+                raise XlsxPackageError(f"Unsupported number format: {number_format}")
+            attrs.append(f'numFmtId="{BUILTIN_FORMATS_REVERSE[number_format]}"')
+        else:
+            attrs.append('numFmtId="0"')
+        for key, section, child in (('font', 'fonts', 'font'), ('fill', 'fills', 'fill'),
+                                    ('border', 'borders', 'border')):
+            index = self._index(section, child, _xml(spec[key])) if key in spec else 0
+            attrs.append(f'{child}Id="{index}"')
+        attrs.append('xfId="0"')
+        attrs.extend(f'apply{name}="1"' for name, key in
+                     (('NumberFormat', 'number_format'), ('Font', 'font'),
+                      ('Fill', 'fill'), ('Border', 'border'), ('Alignment', 'alignment'))
+                     if key in spec)
+
+        if 'alignment' in spec:
+            xf = f'<xf {" ".join(attrs)}>{_xml(spec["alignment"])}</xf>'
+        else:
+            xf = f'<xf {" ".join(attrs)} />'
+        self._xf_ids[style] = self._index('cellXfs', 'xf', xf)
+        return self._xf_ids[style]
+
+
+def _xml(style_object) -> str:
+    return tostring(style_object.to_tree()).decode()
+
+
+def _cell(ref: str, value, style_id: int) -> str:
+    if value is None or value == '':
+        return f'<c r="{ref}" s="{style_id}" />'
+    if isinstance(value, bool):
+        return f'<c r="{ref}" s="{style_id}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}" s="{style_id}"><v>{value}</v></c>'
+    text = escape(ILLEGAL_CHARACTERS_RE.sub('', str(value)))
+    return (f'<c r="{ref}" s="{style_id}" t="inlineStr">'
+            f'<is><t xml:space="preserve">{text}</t></is></c>')
+
+
+def _rows_xml(rows: Iterable[Row], styles: _StylesPart, first_row: int,
+              heights: Optional[Dict[int, int]] = None) -> Tuple[str, int]:
+    """Serialize rows starting at first_row; returns (xml, last row number)."""
+    parts = []
+    row_num = first_row - 1
+    for row_num, (values, row_styles) in enumerate(rows, first_row):
+        height = (heights or {}).get(row_num)
+        attrs = f' ht="{height}" customHeight="1"' if height else ''
+        cells = ''.join(_cell(f'{get_column_letter(col)}{row_num}', value, styles.xf_id(style))
+                        for col, (value, style) in enumerate(zip(values, row_styles), 1))
+        parts.append(f'<row r="{row_num}"{attrs}>{cells}</row>')
+    return ''.join(parts), row_num
+
+
+def _sheet_xml(rows_xml: str, last_row: int, columns: int, widths: Sequence[int],
+               frozen_rows: int, merged: Optional[str] = None) -> str:
+    last_col = get_column_letter(columns)
+    cols = ''.join(f'<col min="{i}" max="{i}" width="{w}" customWidth="1" />'
+                   for i, w in enumerate(widths, 1))
+    top_left = f'A{frozen_rows + 1}'
+    merge = f'<mergeCells count="1"><mergeCell ref="{merged}" /></mergeCells>' if merged else ''
+    return (f'{XML_DECLARATION}<worksheet xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+            f'<dimension ref="A1:{last_col}{max(last_row, 1)}" />'
+            f'<sheetViews><sheetView workbookViewId="0">'
+            f'<pane ySplit="{frozen_rows}" topLeftCell="{top_left}" activePane="bottomLeft" '
+            f'state="frozen" /><selection pane="bottomLeft" activeCell="{top_left}" '
+            f'sqref="{top_left}" /></sheetView></sheetViews>'
+            f'<sheetFormatPr defaultRowHeight="15" /><cols>{cols}</cols>'
+            f'<sheetData>{rows_xml}</sheetData>{merge}</worksheet>')
+
+
+class _Package:
+    """The workbook-level parts of an .xlsx file, edited as text."""
+
+    def __init__(self, zf: zipfile.ZipFile):
+        names = set(zf.namelist())
+        missing = {CONTENT_TYPES, WORKBOOK, WORKBOOK_RELS, STYLES} - names
+        if missing:
+            raise XlsxPackageError(f"Missing workbook parts: {', '.join(sorted(missing))}")
+        self.names = names
+        self.parts = {name: zf.read(name).decode('utf-8')
+                      for name in (CONTENT_TYPES, WORKBOOK, WORKBOOK_RELS, STYLES)}
+        self.styles = _StylesPart(self.parts[STYLES])
+        if not re.search(r'<styleSheet\b[^>]*\bxmlns="' + re.escape(MAIN_NS), self.styles.text):
+            raise XlsxPackageError("styles.xml does not use the default namespace")
+
+    def sheet_names(self) -> Dict[str, str]:
+        """Sheet name -> relationship id."""
+        sheets = {}
+        for tag in re.findall(r'<sheet\b[^>]*>', self.parts[WORKBOOK]):
+            name = re.search(r'\bname="([^"]*)"', tag)
+            rid = re.search(r'\b\w+:id="([^"]*)"', tag)
+            if name and rid:
+                sheets[_unescape(name.group(1))] = rid.group(1)
+        return sheets
+
+    def sheet_part(self, sheet_name: str) -> Optional[str]:
+        """Zip path of a sheet's worksheet part, or None if no such sheet."""
+        rid = self.sheet_names().get(sheet_name)
+        if rid is None:
+            return None
+        for tag in re.findall(r'<Relationship\b[^>]*>', self.parts[WORKBOOK_RELS]):
+            if re.search(rf'\bId="{re.escape(rid)}"', tag):
+                target = re.search(r'\bTarget="([^"]*)"', tag).group(1)
+                return target.lstrip('/') if target.startswith('/') else 'xl/' + target
+        raise XlsxPackageError(f"No relationship for sheet {sheet_name}")
+
+    def unique_sheet_name(self, name: str) -> str:
+        existing = {n.lower() for n in self.sheet_names()}
+        candidate, suffix = name, 1
+        while candidate.lower() in existing:
+            candidate = f"{name[:31 - len(str(suffix))]}{suffix}"
+            suffix += 1
+        return candidate
+
+    def add_sheet(self, sheet_name: str) -> str:
+        """Register a new worksheet; returns its zip path."""
+        index = 1
+        while f'xl/worksheets/sheet{index}.xml' in self.names:
+            index += 1
+        part = f'xl/worksheets/sheet{index}.xml'
+        self.names.add(part)
+
+        rels = self.parts[WORKBOOK_RELS]
+        rel_ids = set(re.findall(r'\bId="([^"]*)"', rels))
+        number = len(rel_ids) + 1
+        while f'rId{number}' in rel_ids:
+            number += 1
+        rid = f'rId{number}'
+        self.parts[WORKBOOK_RELS] = rels.replace(
+            '</Relationships>',
+            f'<Relationship Type="{WORKSHEET_REL}" Target="/{part}" Id="{rid}" />'
+            '</Relationships>', 1)
+
+        self.parts[CONTENT_TYPES] = self.parts[CONTENT_TYPES].replace(
+            '</Types>',
+            f'<Override PartName="/{part}" ContentType="{WORKSHEET_TYPE}" /></Types>', 1)
+
+        workbook = self.parts[WORKBOOK]
+        if '</sheets>' not in workbook:
+            raise XlsxPackageError("workbook.xml has no <sheets>")
+        sheet_ids = [int(i) for i in re.findall(r'<sheet\b[^>]*\bsheetId="(\d+)"', workbook)]
+        prefix = re.search(r'xmlns:(\w+)="' + re.escape(REL_NS) + '"', workbook)
+        if prefix:
+            rid_attr = f'{prefix.group(1)}:id="{rid}"'
+        else:
+            rid_attr = f'xmlns:r="{REL_NS}" r:id="{rid}"'
+        self.parts[WORKBOOK] = workbook.replace(
+            '</sheets>',
+            f'<sheet name={quoteattr(sheet_name)} sheetId="{max(sheet_ids, default=0) + 1}" '
+            f'state="visible" {rid_attr} /></sheets>', 1)
+        return part
+
+
+def _unescape(text: str) -> str:
+    return (text.replace('&lt;', '<').replace('&gt;', '>').replace('&quot;', '"')
+            .replace('&apos;', "'").replace('&amp;', '&'))
+
+
+def _rewrite(filename: str, zin: zipfile.ZipFile, parts: Dict[str, str]) -> None:
+    """Copy the package with some parts replaced or added, then swap it in."""
+    temp_file = filename + TEMP_SUFFIX
+    try:
+        with zipfile.ZipFile(temp_file, 'w', zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
+                if info.filename in parts:
+                    continue
+                with zin.open(info) as src, zout.open(info, 'w') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+            for name, text in parts.items():
+                zout.writestr(name, text.encode('utf-8'))
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    zin.close()
+    os.replace(temp_file, filename)
+
+
+def append_sheet(filename: str, sheet_name: str, title: str, headers: List[str],
+                 rows: Iterable[Row], widths: Sequence[int]) -> str:
+    """Add a titled table sheet to an existing workbook.
+
+    Returns the sheet name actually used (a suffix is added if taken).
+    """
+    with zipfile.ZipFile(filename) as zin:
+        package = _Package(zin)
+        sheet_name = package.unique_sheet_name(sheet_name)
+        styles = package.styles
+
+        header_row = (headers, ['lru_header'] * len(headers))
+        title_row = ([title], ['lru_title'])
+        body, last_row = _rows_xml([title_row, header_row, *rows], styles, 1, {1: 30, 2: 25})
+        merged = f'A1:{get_column_letter(len(headers))}1'
+        sheet = _sheet_xml(body, last_row, len(headers), widths, frozen_rows=2, merged=merged)
+
+        part = package.add_sheet(sheet_name)
+        package.parts[STYLES] = styles.text
+        package.parts[part] = sheet
+        _rewrite(filename, zin, package.parts)
+    return sheet_name
+
+
+def append_rows(filename: str, sheet_name: str, headers: List[str],
+                rows: Iterable[Row], widths: Sequence[int]) -> int:
+    """Append rows to a long-format sheet, creating it on first use.
+
+    Only that sheet's part is rewritten. Returns the number of rows added.
+    """
+    rows = list(rows)
+    with zipfile.ZipFile(filename) as zin:
+        package = _Package(zin)
+        styles = package.styles
+        part = package.sheet_part(sheet_name)
+
+        if part is None:
+            header_row = (headers, ['lru_header'] * len(headers))
+            body, last_row = _rows_xml([header_row, *rows], styles, 1, {1: 25})
+            part = package.add_sheet(sheet_name)
+            package.parts[part] = _sheet_xml(body, last_row, len(headers), widths, frozen_rows=1)
+        else:
+            sheet = zin.read(part).decode('utf-8')
+            last = [int(r) for r in re.findall(r'<row\b[^>]*?\br="(\d+)"', sheet[-65536:])]
+            if not last and '<row' in sheet:
+                last = [int(r) for r in re.findall(r'<row\b[^>]*?\br="(\d+)"', sheet)]
+            first_row = max(last, default=0) + 1
+            body, last_row = _rows_xml(rows, styles, first_row)
+
+            if '</sheetData>' in sheet:
+                sheet = sheet.replace('</sheetData>', body + '</sheetData>', 1)
+            elif re.search(r'<sheetData\s*/>', sheet):
+                sheet = re.sub(r'<sheetData\s*/>', f'<sheetData>{body}</sheetData>', sheet, count=1)
+            else:
+                raise XlsxPackageError(f"Sheet {sheet_name} has no <sheetData>")
+            sheet = re.sub(r'<dimension ref="([A-Z]+\d+):([A-Z]+)\d+"',
+                           rf'<dimension ref="\g<1>:\g<2>{last_row}"', sheet, count=1)
+            package.parts[part] = sheet
+
+        package.parts[STYLES] = styles.text
+        _rewrite(filename, zin, package.parts)
+    return len(rows)
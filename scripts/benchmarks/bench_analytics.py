@@ -0,0 +1,61 @@
+"""Benchmark station analytics.
+
+Builds a global history log and times analytics.analyze with NumPy and
+with the pure-Python fallback, checking both give the same results.
+
+Usage:
+    python scripts/benchmarks/bench_analytics.py [stations] [history_rows]
+"""
+import os
+import random
+import sys
+import time
+
+# Add refactored directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'refactored'))
+
+from models import GlobalHistoryLog, parse_timestamp
+import analytics
+
+
+def build_history(station_count: int, history_rows: int) -> GlobalHistoryLog:
+    """Spread history_rows updates randomly over station_count stations."""
+    rng = random.Random(1)
+    names = [f"LRU{i // 4} - Rack {i}" for i in range(station_count)]
+    history = GlobalHistoryLog()
+    base = parse_timestamp("2026-01-01 00:00:00")
+    for i in range(history_rows):
+        history.append_values(names[rng.randrange(station_count)],
+                              base + i * 60 + rng.randrange(60), rng.randrange(40), 5, 20)
+    return history
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    station_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    history_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+
+    print("=" * 60)
+    print(f"ANALYTICS BENCHMARK: {station_count} stations, {history_rows} history rows")
+    print("=" * 60)
+    history = build_history(station_count, history_rows)
+
+    python_time, expected = timed(lambda: analytics.analyze(history, use_numpy=False))
+    print(f"\n  {'pure Python':<12} {python_time:8.3f}s")
+    if not analytics.HAS_NUMPY:
+        print("  NumPy is not installed; skipping the vectorized run")
+        return
+    numpy_time = min(timed(lambda: analytics.analyze(history, use_numpy=True))[0]
+                     for _ in range(3))
+    print(f"  {'NumPy':<12} {numpy_time:8.3f}s  ({python_time / numpy_time:.1f}x)")
+    same = analytics.analyze(history, use_numpy=True) == expected
+    print(f"  Results match: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark data file formats.
+
+Saves and loads the same data set with each DataManager format and
+reports save time, load time and file size. Then compares peak memory
+of the streaming loader with parsing the whole document at once.
+
+Usage:
+    python scripts/benchmarks/bench_data_format.py [stations] [history_rows]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Add refactored directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'refactored'))
+
+from models import Station, GlobalHistoryEntry, GlobalHistoryLog, parse_timestamp
+from data_manager import DataManager, DATA_FORMATS, open_document
+
+
+def build_data(station_count: int, history_rows: int):
+    """Spread history_rows updates randomly over station_count stations."""
+    rng = random.Random(1)
+    stations = {f"LRU{i // 4} - Rack {i}": Station(f"LRU{i // 4} - Rack {i}", 0, 5, 20,
+                                                   rack_location=f"R{i % 40}")
+                for i in range(station_count)}
+    names = list(stations)
+    history = GlobalHistoryLog()
+    base = parse_timestamp("2026-01-01 00:00:00")
+    for i in range(history_rows):
+        name = names[rng.randrange(station_count)]
+        epoch = base + i * 60 + rng.randrange(60)
+        count = rng.randrange(40)
+        stations[name].add_history(count, epoch)
+        history.append(GlobalHistoryEntry(name, epoch, count, 5, 20))
+    return stations, history
+
+
+def best_of(runs: int, func) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def whole_document_load(path: str):
+    """The pre-streaming loader: read everything, json.loads, then convert."""
+    with open_document(path) as stream:
+        data = json.loads(stream.read())
+    stations = {name: Station.from_dict(name, s) for name, s in data['stations'].items()}
+    history = GlobalHistoryLog()
+    for entry in data['history']:
+        history.append_values(entry['station'], parse_timestamp(entry['timestamp']),
+                              entry['count'], entry['min'], entry['max'])
+    return stations, history
+
+
+def peak_memory(func) -> float:
+    """Peak traced allocation in MB while func runs."""
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak / 1024 / 1024
+
+
+def main():
+    station_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    history_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+    print("=" * 60)
+    print(f"DATA FORMAT BENCHMARK: {station_count} stations, {history_rows} history rows")
+    print("=" * 60)
+    stations, history = build_data(station_count, history_rows)
+
+    print(f"\n  {'format':<10} {'save':>9} {'load':>9} {'size':>12} {'vs json':>8}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for data_format in DATA_FORMATS:
+            path = os.path.join(tmp, f"lru_data_{data_format}.json")
+            manager = DataManager(path, journaled=False, data_format=data_format)
+            save = best_of(3, lambda: manager.save_data(stations, history))
+
+            def load():
+                loaded, _ = manager.load_data()
+                # Station history is lazy; touch it so parsing is included
+                for station in loaded.values():
+                    len(station.history)
+            load_time = best_of(3, load)
+
+            size = os.path.getsize(path)
+            baseline = baseline or size
+            print(f"  {data_format:<10} {save:8.3f}s {load_time:8.3f}s "
+                  f"{size / 1024:10.0f}KB {size / baseline:7.0%}")
+
+        print("\nPeak memory during load (compact file):")
+        path = os.path.join(tmp, "lru_data_compact.json")
+        whole = peak_memory(lambda: whole_document_load(path))
+        streamed = peak_memory(lambda: DataManager(path, journaled=False).load_data())
+        print(f"  {'whole document':<20} {whole:8.1f}MB")
+        print(f"  {'streaming':<20} {streamed:8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
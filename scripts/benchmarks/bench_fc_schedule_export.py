@@ -0,0 +1,83 @@
+"""Benchmark FC schedule time-slot bucketing and export.
+
+Compares the original per-slot history scan with the single-pass
+TimeSlotBucketer, then times the full CSV and Excel exports.
+
+Usage:
+    python scripts/benchmarks/bench_fc_schedule_export.py [stations] [history_rows]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add refactored directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'refactored'))
+
+from config import TIME_SLOT_MAP
+from models import Station, parse_timestamp
+from fc_schedule_manager import FCScheduleManager
+
+
+def build_stations(station_count: int, history_rows: int) -> dict:
+    """Spread history_rows updates randomly over station_count stations."""
+    rng = random.Random(1)
+    stations = {f"LRU{i // 4} - Rack {i}": Station(f"LRU{i // 4} - Rack {i}", 0, 5, 20)
+                for i in range(station_count)}
+    names = list(stations)
+    base = parse_timestamp("2026-01-01 00:00:00")
+    for i in range(history_rows):
+        epoch = base + i * 60 + rng.randrange(60)
+        stations[names[rng.randrange(station_count)]].add_history(rng.randrange(40), epoch)
+    return stations
+
+
+def per_slot_scan(station: Station) -> dict:
+    """The pre-engine algorithm: one full history scan per time slot."""
+    result = {}
+    for time_slot, (start_hour, end_hour) in TIME_SLOT_MAP.items():
+        latest_value = None
+        for entry in station.history:
+            if start_hour <= entry.hour < end_hour:
+                latest_value = entry.count
+        if latest_value is not None:
+            result[time_slot] = str(latest_value)
+    return result
+
+
+def timed(label: str, func) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<32} {elapsed:8.3f}s")
+    return elapsed
+
+
+def main():
+    station_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    history_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+
+    print("=" * 60)
+    print(f"FC SCHEDULE EXPORT BENCHMARK: {station_count} stations, {history_rows} history rows")
+    print("=" * 60)
+    stations = build_stations(station_count, history_rows)
+    manager = FCScheduleManager()
+
+    print("\nTime-slot bucketing (all stations):")
+    old = timed("per-slot scan (before)", lambda: [per_slot_scan(s) for s in stations.values()])
+    new = timed("single-pass bucketer", lambda: [manager._get_time_slot_data(s)
+                                                 for s in stations.values()])
+    print(f"  speedup: {old / new:.1f}x")
+
+    for s in stations.values():
+        assert per_slot_scan(s) == manager._get_time_slot_data(s)
+
+    print("\nFull export:")
+    with tempfile.TemporaryDirectory() as tmp:
+        timed("CSV export", lambda: manager.export_to_csv(os.path.join(tmp, "fc.csv"), stations))
+        timed("Excel export", lambda: manager.export_to_csv(os.path.join(tmp, "fc.xlsx"), stations))
+
+
+if __name__ == "__main__":
+    main()